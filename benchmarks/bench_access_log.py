@@ -0,0 +1,62 @@
+"""Benchmark formatting access logs with DatadogJSONFormatter, through its access log encoder or the generic path.
+
+Run from the repository root: `python -m benchmarks.bench_access_log`
+"""
+
+import logging
+import timeit
+
+from muselog import attributes, context, util
+from muselog.datadog import DatadogJSONFormatter
+
+from .support import format_uncached
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0",
+    "Referer": "https://www.themuse.com/search/jobs?keyword=engineer",
+}
+
+
+class _Capture(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        self.record = record
+
+
+def _access_log(user_id=None) -> logging.LogRecord:
+    capture = _Capture()
+    util.LOGGER.logger.addHandler(capture)
+    util.LOGGER.logger.setLevel(logging.INFO)
+    try:
+        util.log_request(
+            "/api/v2/jobs",
+            0.0123,
+            attributes.NetworkAttributes(HEADERS.get, remote_addr="203.0.113.7:51234", bytes_read=0, bytes_written=18234),
+            attributes.HttpAttributes(HEADERS.get, "https://www.themuse.com/api/v2/jobs?page=2", "GET", 200),
+            user_id=user_id,
+        )
+    finally:
+        util.LOGGER.logger.removeHandler(capture)
+    return capture.record
+
+
+def main() -> None:
+    encoder = DatadogJSONFormatter()
+    generic = DatadogJSONFormatter()
+    generic._access_logs = None
+    number = 20_000
+    print(f"{'access log':<22} {'encoder':>12} {'generic':>12}")
+    for name, bound, user_id in (("bare", {}, None), ("request_id, user", {"request_id": "4f0c9a8e"}, 1234)):
+        context.clear()
+        context.bind(**bound)
+        record = _access_log(user_id)
+        assert encoder.format(record) == generic.format(record)
+        row = []
+        for formatter in (encoder, generic):
+            seconds = timeit.timeit(lambda: format_uncached(formatter, record), number=number) / number
+            row.append(f"{seconds * 1e6:>9.2f} us")
+        print(f"{name:<22} {row[0]:>12} {row[1]:>12}")
+    context.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark the cost of a logging call under each caller lookup mode, with and without thread and process details.
+
+Run from the repository root: `python -m benchmarks.bench_callers`
+"""
+
+import logging
+import timeit
+
+from muselog import callers
+from muselog.logger import get_logger_with_context
+
+SETTINGS = (
+    ("full", True),
+    ("fast", True),
+    ("off", True),
+    ("off", False),
+)
+
+ROUNDS = 15
+
+
+def main() -> None:
+    logger = logging.getLogger("bench.callers")
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.INFO)
+    adapter = get_logger_with_context(logger)
+    number = 10_000
+    best = {(setting, log): float("inf") for setting in SETTINGS for log in (logger, adapter)}
+    try:
+        # Settings are interleaved, and the best round kept, as differences are small next to the noise.
+        for _ in range(ROUNDS):
+            for setting in SETTINGS:
+                mode, process_info = setting
+                callers.install(mode)
+                callers.record_process_info(process_info, process_info, process_info)
+                for log in (logger, adapter):
+                    seconds = timeit.timeit(lambda: log.info("Handled %s", 1), number=number) / number
+                    best[setting, log] = min(best[setting, log], seconds)
+    finally:
+        callers.install(None)
+        callers.record_process_info()
+
+    print(f"{'caller lookup':<16} {'thread/process':<16} {'Logger':>10} {'adapter':>10}")
+    for setting in SETTINGS:
+        mode, process_info = setting
+        row = [f"{best[setting, log] * 1e6:>7.2f} us" for log in (logger, adapter)]
+        print(f"{mode:<16} {'on' if process_info else 'off':<16} {row[0]:>10} {row[1]:>10}")
+
+
+if __name__ == "__main__":
+    main()
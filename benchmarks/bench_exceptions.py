@@ -0,0 +1,39 @@
+"""Benchmark formatting a storm of identical exceptions, with and without repeat suppression.
+
+Run from the repository root: `python -m benchmarks.bench_exceptions`
+"""
+
+import logging
+import sys
+import timeit
+
+from muselog.datadog import DatadogJSONFormatter
+
+from .support import format_uncached
+
+
+def _deep(depth: int):
+    if depth == 0:
+        raise ConnectionError("dependency unavailable")
+    _deep(depth - 1)
+
+
+def _record() -> logging.LogRecord:
+    try:
+        _deep(30)
+    except ConnectionError:
+        exc_info = sys.exc_info()
+    return logging.LogRecord("bench", logging.ERROR, __file__, 1, "Dependency failed", (), exc_info)
+
+
+def main() -> None:
+    number = 5000
+    for name, formatter in (("full stacks", DatadogJSONFormatter(exc_repeat_window=0)),
+                            ("suppressed repeats", DatadogJSONFormatter(exc_repeat_window=60))):
+        record = _record()
+        seconds = timeit.timeit(lambda: format_uncached(formatter, record), number=number)
+        print(f"{name:<20} {seconds / number * 1e6:>8.1f} us/record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark a logging call sent to the console and to DataDogUdpHandler, with one shared formatter or one each.
+
+Run from the repository root: `python -m benchmarks.bench_fanout`
+"""
+
+import io
+import logging
+import timeit
+
+from muselog import context
+from muselog.datadog import DataDogUdpHandler, DatadogJSONFormatter
+from muselog.logger import get_logger_with_context
+
+ROUNDS = 5
+
+
+def _logger(shared: bool) -> logging.Logger:
+    logger = logging.getLogger(f"bench.fanout.{'shared' if shared else 'separate'}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    formatter = DatadogJSONFormatter()
+    console = logging.StreamHandler(io.StringIO())
+    udp = DataDogUdpHandler("127.0.0.1", 10518)
+    udp.send = lambda s: None  # Only formatting is measured.
+    console.setFormatter(formatter)
+    udp.setFormatter(formatter if shared else DatadogJSONFormatter())
+    logger.handlers = [console, udp]
+    return logger
+
+
+def main() -> None:
+    context.clear()
+    context.bind(request_id="4f0c9a8e-1d2b-4c3d-9e8f-0a1b2c3d4e5f", user_id=1234)
+    number = 10_000
+    print(f"{'formatters':<12} {'time':>10}")
+    for shared in (True, False):
+        logger = get_logger_with_context(_logger(shared))
+        # Keep the console buffer from growing across rounds.
+        stream = logger.logger.handlers[0].stream
+
+        def log():
+            logger.info("Applied to job %s", 48213, job_id=48213, company="Acme")
+            stream.seek(0)
+            stream.truncate()
+
+        seconds = min(timeit.repeat(log, number=number, repeat=ROUNDS)) / number
+        print(f"{'shared' if shared else 'one each':<12} {seconds * 1e6:>7.2f} us")
+    context.clear()
+
+
+if __name__ == "__main__":
+    main()
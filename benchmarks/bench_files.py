@@ -0,0 +1,72 @@
+"""Benchmark logging to a rotating, compressed file: RotatingFileHandler against logging's own, with a gzip rotator.
+
+Reports the mean cost of a logging call, and the longest one, which for logging's handler
+includes compressing a full segment.
+
+Run from the repository root: `python -m benchmarks.bench_files`
+"""
+
+import gzip
+import logging
+import logging.handlers
+import os
+import shutil
+import tempfile
+import time
+
+from muselog.datadog import DatadogJSONFormatter
+from muselog.files import RotatingFileHandler
+
+RECORDS = 50_000
+MAX_BYTES = 4 * 1024 * 1024
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as f_in, gzip.open(dest + ".gz", "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _stdlib_handler(filename: str) -> logging.Handler:
+    handler = logging.handlers.RotatingFileHandler(filename, maxBytes=MAX_BYTES, backupCount=10)
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(DatadogJSONFormatter())
+    return handler
+
+
+def _muselog_handler(filename: str) -> logging.Handler:
+    # A buffer large enough that no record is dropped while the writer catches up.
+    return RotatingFileHandler(filename, max_bytes=MAX_BYTES, backup_count=10, max_buffer_size=64 * 1024 * 1024)
+
+
+def _run(make_handler) -> tuple:
+    with tempfile.TemporaryDirectory() as directory:
+        handler = make_handler(os.path.join(directory, "bench.log"))
+        logger = logging.getLogger("bench.files")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.handlers = [handler]
+        longest = 0.0
+        started = time.perf_counter()
+        for i in range(RECORDS):
+            call_started = time.perf_counter()
+            logger.info("Processed item %d of batch %s", i, "2024-01-01", extra={"ctx": {"item": i, "queue": "jobs"}})
+            longest = max(longest, time.perf_counter() - call_started)
+        emitted = time.perf_counter() - started
+        handler.close()
+        logger.handlers = []
+        dropped = getattr(handler, "dropped", 0)
+        segments = len(os.listdir(directory)) - 1
+    return emitted / RECORDS, longest, dropped, segments
+
+
+def main() -> None:
+    print(f"{'handler':<28} {'mean/call':>10} {'longest call':>13} {'dropped':>8} {'segments':>9}")
+    for name, make_handler in (("logging RotatingFileHandler", _stdlib_handler),
+                               ("muselog RotatingFileHandler", _muselog_handler)):
+        mean, longest, dropped, segments = _run(make_handler)
+        print(f"{name:<28} {mean * 1e6:>7.2f} us {longest * 1e3:>10.2f} ms {dropped:>8} {segments:>9}")
+
+
+if __name__ == "__main__":
+    main()
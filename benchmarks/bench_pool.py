@@ -0,0 +1,62 @@
+"""Compare inline JSON formatting with ProcessPoolHandler using 1, 2 and 4 worker processes.
+
+Reports end-to-end throughput (emit, format and write N records) and the CPU time the
+emitting thread spends per record, which is what a CPU-bound service pays on its GIL.
+
+Run from the repository root: `python -m benchmarks.bench_pool`
+"""
+
+import logging
+import os
+import time
+from typing import Tuple
+
+from muselog.datadog import DatadogJSONFormatter
+from muselog.pool import ProcessPoolHandler
+
+RECORDS = 20000
+
+
+def _run(handler: logging.Handler) -> Tuple[float, float]:
+    logger = logging.getLogger("bench.pool")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [handler]
+
+    # Warm up (starts worker processes).
+    logger.info("warm up")
+    handler.flush()
+
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    for i in range(RECORDS):
+        logger.info(
+            "Request %d handled",
+            i,
+            extra={
+                "ctx": {"request_id": f"req-{i}", "user": i % 100, "tags": ["a", "b", "c"]},
+                "http.url": f"https://example.com/items/{i}?q=search",
+                "payload": {"items": list(range(20)), "note": "x" * 200},
+            },
+        )
+    emit_cpu = time.thread_time() - cpu_started
+    handler.flush()
+    elapsed = time.perf_counter() - started
+    handler.close()
+    return elapsed, emit_cpu
+
+
+def main() -> None:
+    with open(os.devnull, "w") as devnull:
+        inline = logging.StreamHandler(devnull)
+        inline.setFormatter(DatadogJSONFormatter())
+        configurations = [("inline", inline)]
+        configurations += [(f"{n} worker(s)", ProcessPoolHandler(devnull, workers=n)) for n in (1, 2, 4)]
+
+        print(f"{'handler':<12} {'records/s':>12} {'emit CPU us/record':>20}")
+        for name, handler in configurations:
+            elapsed, emit_cpu = _run(handler)
+            print(f"{name:<12} {RECORDS / elapsed:>12.0f} {emit_cpu / RECORDS * 1e6:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
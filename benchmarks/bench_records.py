@@ -0,0 +1,59 @@
+"""Compare memory and CPU per record of logging.LogRecord and muselog.records.SlottedLogRecord.
+
+Records are kept in a list, as they would be in a queue or ring buffer, and memory is
+measured with tracemalloc. Records are made with and without extras (including `ctx`),
+and timed through creation and Datadog JSON formatting.
+
+Run from the repository root: `python -m benchmarks.bench_records`
+"""
+
+import logging
+import time
+import tracemalloc
+
+from muselog.datadog import DatadogJSONFormatter
+from muselog.records import SlottedLogRecord
+
+RECORDS = 20000
+
+EXTRA = {"ctx": {"request_id": "req-1", "user": 7}, "http.url": "https://example.com/items/1"}
+
+
+def _make(logger: logging.Logger, factory, extra) -> list:
+    logging.setLogRecordFactory(factory)
+    try:
+        return [logger.makeRecord(logger.name, logging.INFO, __file__, 1, "Request %d handled", (i,), None,
+                                  extra=extra) for i in range(RECORDS)]
+    finally:
+        logging.setLogRecordFactory(logging.LogRecord)
+
+
+def _bytes_per_record(logger: logging.Logger, factory, extra) -> float:
+    tracemalloc.start()
+    records = _make(logger, factory, extra)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size / RECORDS
+
+
+def _us_per_record(logger: logging.Logger, factory, extra, formatter) -> float:
+    started = time.perf_counter()
+    for record in _make(logger, factory, extra):
+        formatter.format(record)
+    return (time.perf_counter() - started) / RECORDS * 1e6
+
+
+def main() -> None:
+    logger = logging.getLogger("bench.records")
+    formatter = DatadogJSONFormatter()
+    print(f"{'record':<16} {'extras':<7} {'bytes/record':>13} {'create+format us/record':>24}")
+    for name, factory in (("LogRecord", logging.LogRecord), ("SlottedLogRecord", SlottedLogRecord)):
+        for extra in (None, EXTRA):
+            print(f"{name:<16} {'yes' if extra else 'no':<7} "
+                  f"{_bytes_per_record(logger, factory, extra):>13.0f} "
+                  f"{_us_per_record(logger, factory, extra, formatter):>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
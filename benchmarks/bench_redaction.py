@@ -0,0 +1,111 @@
+"""Benchmark formatting with Redactor, against a naive redaction loop (each field, each pattern, each key rule).
+
+Run from the repository root: `python -m benchmarks.bench_redaction`
+"""
+
+import logging
+import re
+import timeit
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from muselog import context
+from muselog.datadog import DatadogJSONFormatter
+from muselog.logger import get_logger_with_context
+from muselog.redaction import DEFAULT_KEYS, DEFAULT_PATTERNS, MASK, Redactor
+
+from .bench_access_log import _access_log
+from .support import format_uncached
+
+ROUNDS = 5
+
+_NAIVE_PATTERNS = [re.compile(pattern) for pattern in DEFAULT_PATTERNS]
+
+
+def _naive_secret(key) -> bool:
+    normalized = re.sub(r"[^a-z0-9]", "", str(key).lower())
+    return any(normalized.endswith(rule) for rule in DEFAULT_KEYS)
+
+
+def _naive_value(key, value):
+    if key is not None and _naive_secret(key):
+        return MASK
+    if isinstance(value, str):
+        for pattern in _NAIVE_PATTERNS:
+            value = pattern.sub(MASK, value)
+        return value
+    if isinstance(value, dict):
+        return {k: _naive_value(k, v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_naive_value(None, v) for v in value]
+    return value
+
+
+def _naive_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(name, MASK if _naive_secret(name) else value) for name, value in parse_qsl(parts.query)]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class NaiveRedactingFormatter(DatadogJSONFormatter):
+    """Redaction as an ad hoc formatter would do it."""
+
+    def mutate_json_record(self, json_record):
+        for key, value in list(json_record.items()):
+            if key in ("http.url", "http.referer"):
+                value = _naive_url(value)
+            json_record[key] = _naive_value(key, value)
+        return json_record
+
+
+class _Capture(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        self.record = record
+
+
+def _app_log(**kwargs) -> logging.LogRecord:
+    capture = _Capture()
+    logger = logging.getLogger("bench.redaction")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(capture)
+    try:
+        get_logger_with_context(logger, service="jobs").info("Applied to job %s", 48213, job_id=48213, **kwargs)
+    finally:
+        logger.removeHandler(capture)
+    return capture.record
+
+
+def main() -> None:
+    context.clear()
+    context.bind(request_id="4f0c9a8e-1d2b-4c3d-9e8f-0a1b2c3d4e5f", user_id=1234, tenant="themuse")
+    formatters = {
+        "none": DatadogJSONFormatter(),
+        "Redactor": DatadogJSONFormatter(redactor=Redactor()),
+        # Every string is new to it, as if no two records had the same values.
+        "cold": DatadogJSONFormatter(redactor=Redactor()),
+        "naive": NaiveRedactingFormatter(),
+    }
+    cases = (
+        ("app, clean", _app_log(company="Acme", source="search")),
+        ("app, secrets", _app_log(company="Acme", email="bob@example.com", api_key="k")),
+        ("access, clean", _access_log(1234)),
+    )
+    number = 10_000
+    print(f"{'record':<16}" + "".join(f"{name:>12}" for name in formatters))
+    for case, record in cases:
+        row = []
+        for name, formatter in formatters.items():
+            forget = formatter.redactor._clean.clear if name == "cold" else lambda: None
+
+            def run():
+                forget()
+                format_uncached(formatter, record)
+
+            seconds = min(timeit.repeat(run, number=number, repeat=ROUNDS)) / number
+            row.append(f"{seconds * 1e6:>9.2f} us")
+        print(f"{case:<16}" + "".join(f"{cell:>12}" for cell in row))
+    context.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Benchmark TextFormatter against logging.Formatter on the default console format.
+
+Run from the repository root: `python -m benchmarks.bench_text`
+"""
+
+import logging
+import timeit
+
+import muselog
+from muselog.text import TextFormatter
+
+#: Records per second of log time: a busy job (many per second) and one record every second.
+RATES = (1000, 1)
+
+
+def _records(rate: int, count: int):
+    records = []
+    for i in range(count):
+        record = logging.LogRecord("app.jobs.export", logging.INFO, __file__, 42, "Exported %d rows to %s", (i, "s3"), None)
+        record.created = 1700000000 + i / rate
+        record.msecs = int((record.created - int(record.created)) * 1000) + 0.0
+        records.append(record)
+    return records
+
+
+def main() -> None:
+    count = 20_000
+    print(f"{'records/second':<16} {'TextFormatter':>14} {'logging':>12}")
+    for rate in RATES:
+        records = _records(rate, count)
+        row = []
+        for formatter in (TextFormatter(muselog.DEFAULT_LOG_FORMAT), logging.Formatter(muselog.DEFAULT_LOG_FORMAT)):
+            seconds = min(timeit.repeat(lambda: list(map(formatter.format, records)), number=1, repeat=5)) / count
+            row.append(f"{seconds * 1e6:>9.2f} us")
+        print(f"{rate:<16} {row[0]:>14} {row[1]:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare the bytes sent per record by per-line UDP and by gzip-compressed HTTP batches.
+
+Records are formatted with DatadogJSONFormatter, like the handlers do. UDP sends each
+line in its own datagram (plus 28 bytes of IP and UDP headers); the HTTP intake handler
+sends gzip-compressed JSON arrays.
+
+Run from the repository root: `python -m benchmarks.bench_transport`
+"""
+
+import gzip
+import logging
+import time
+
+from muselog.datadog import DatadogJSONFormatter
+
+RECORDS = 10000
+UDP_OVERHEAD = 28
+
+
+def _lines() -> list:
+    formatter = DatadogJSONFormatter()
+    logger = logging.getLogger("bench.transport")
+    lines = []
+    for i in range(RECORDS):
+        record = logger.makeRecord(logger.name, logging.INFO, __file__, 1, "Request %d handled", (i,), None, extra={
+            "ctx": {"request_id": f"req-{i}", "user": i % 100},
+            "http.url": f"https://example.com/items/{i % 50}?q=search",
+            "http.status_code": 200,
+        })
+        lines.append(formatter.format(record).encode("utf-8"))
+    return lines
+
+
+def main() -> None:
+    lines = _lines()
+    udp = sum(len(line) + 1 + UDP_OVERHEAD for line in lines)
+    print(f"{'transport':<22} {'bytes/record':>13} {'compress us/record':>19}")
+    print(f"{'UDP, one per line':<22} {udp / RECORDS:>13.1f} {0:>19.1f}")
+    for batch_size in (100, 1000):
+        sent = 0
+        started = time.perf_counter()
+        for i in range(0, RECORDS, batch_size):
+            sent += len(gzip.compress(b"[" + b",".join(lines[i:i + batch_size]) + b"]", 6))
+        elapsed = time.perf_counter() - started
+        print(f"{f'HTTP gzip, batch {batch_size}':<22} {sent / RECORDS:>13.1f} {elapsed / RECORDS * 1e6:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Benchmark DatadogJSONFormatter on pathological payloads, with and without size budgets.
+
+Run from the repository root: `python -m benchmarks.bench_truncation`
+"""
+
+import logging
+import timeit
+
+from muselog.datadog import DatadogJSONFormatter
+
+from .support import format_uncached
+
+PAYLOADS = {
+    "huge message": dict(msg="%s", args=("m" * 10_000_000,)),
+    "huge extra string": dict(msg="extra", extra={"blob": "x" * 10_000_000}),
+    "long extra list": dict(msg="extra", extra={"items": list(range(1_000_000))}),
+    "wide ctx": dict(msg="ctx", extra={"ctx": {f"key{i}": i for i in range(200_000)}}),
+    "nested ctx": dict(msg="ctx", extra={"ctx": {"rows": [{"id": i, "name": "n" * 50} for i in range(100_000)]}}),
+}
+
+
+def _record(msg, args=(), extra=None) -> logging.LogRecord:
+    record = logging.LogRecord("bench", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra or {})
+    return record
+
+
+def main() -> None:
+    unbounded = DatadogJSONFormatter(max_record_size=0, max_field_size=0, max_ctx_items=0)
+    bounded = DatadogJSONFormatter()
+    print(f"{'payload':<20} {'unbounded':>14} {'bounded':>14} {'bytes':>22}")
+    for name, payload in PAYLOADS.items():
+        record = _record(**payload)
+        row = []
+        sizes = []
+        for formatter in (unbounded, bounded):
+            number = 3
+            seconds = timeit.timeit(lambda: format_uncached(formatter, record), number=number) / number
+            row.append(f"{seconds * 1000:>11.2f} ms")
+            sizes.append(len(formatter.format(record)))
+        print(f"{name:<20} {row[0]:>14} {row[1]:>14} {sizes[0]:>10} -> {sizes[1]:<9}")
+
+
+if __name__ == "__main__":
+    main()
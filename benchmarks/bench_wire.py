@@ -0,0 +1,58 @@
+"""Benchmark encoding records for the TCP handler as JSON lines or as MessagePack frames: time and bytes per record.
+
+Run from the repository root: `python -m benchmarks.bench_wire`
+"""
+
+import logging
+import timeit
+
+from muselog import context
+from muselog.datadog import DatadogJSONFormatter
+from muselog.logger import get_logger_with_context
+from muselog.wire import MsgpackFormatter
+
+from .bench_access_log import _access_log
+from .support import format_uncached
+
+ROUNDS = 5
+
+
+class _Capture(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        self.record = record
+
+
+def _app_log() -> logging.LogRecord:
+    capture = _Capture()
+    logger = logging.getLogger("bench.wire")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(capture)
+    try:
+        get_logger_with_context(logger, service="jobs").info(
+            "Applied to job %s", 48213, job_id=48213, company="Acme", source="search", attempt=1, latency=0.0125)
+    finally:
+        logger.removeHandler(capture)
+    return capture.record
+
+
+def main() -> None:
+    context.clear()
+    context.bind(request_id="4f0c9a8e-1d2b-4c3d-9e8f-0a1b2c3d4e5f", user_id=1234, tenant="themuse")
+    json_formatter, msgpack_formatter = DatadogJSONFormatter(), MsgpackFormatter()
+
+    def json_line(record: logging.LogRecord) -> bytes:
+        return (format_uncached(json_formatter, record) + "\n").encode("utf-8")
+
+    encoders = {"json": json_line, "msgpack": msgpack_formatter.encode_frame}
+    number = 20_000
+    print(f"{'record':<12} {'encoding':<10} {'time':>10} {'bytes':>7}")
+    for name, record in (("app", _app_log()), ("access", _access_log(1234))):
+        for encoding, encode in encoders.items():
+            seconds = min(timeit.repeat(lambda: encode(record), number=number, repeat=ROUNDS)) / number
+            print(f"{name:<12} {encoding:<10} {seconds * 1e6:>7.2f} us {len(encode(record)):>7}")
+    context.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""Helpers shared by the benchmarks."""
+
+from logging import LogRecord
+
+from muselog.datadog import DatadogJSONFormatter
+
+
+def format_uncached(formatter: DatadogJSONFormatter, record: LogRecord) -> str:
+    """Format `record` in full, rather than reuse the text of the same record formatted last."""
+    formatter.forget_last()
+    return formatter.format(record)
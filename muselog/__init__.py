@@ -3,14 +3,49 @@
 import logging
 import os
 import sys
+import warnings
 from types import TracebackType
-from typing import Callable, Mapping, Optional, Type, Union
-from muselog.datadog import DatadogJSONFormatter
+from typing import TYPE_CHECKING, Callable, Mapping, Optional, Type, Union
+from muselog.ratelimit import RateLimitFilter
+
+if TYPE_CHECKING:
+    from muselog.redaction import Redactor
+
+# NOTE: Keep imports here cheap. Every process started with `muselog-run` imports this
+# package at startup, so heavy dependencies (e.g., muselog.datadog, which pulls in
+# opentelemetry) are imported only once the features that need them are used.
 
 DEFAULT_LOG_FORMAT = "%(asctime)s - %(name)s:%(lineno)d - %(levelname)s - %(message)s"
 
 LOGGER = logging.getLogger(__name__)
 
+#: Tracks repeats of uncaught exceptions (a :class:`muselog.fingerprint.RepeatSuppressor`).
+#: Configured by `DATADOG_ERROR_REPEAT_WINDOW`.
+_UNCAUGHT_REPEATS = None
+if float(os.environ.get("DATADOG_ERROR_REPEAT_WINDOW", 0)) > 0:
+    from muselog.fingerprint import RepeatSuppressor
+    _UNCAUGHT_REPEATS = RepeatSuppressor.from_env()
+
+
+#: Watches the level file given to `setup_logging`, if any.
+_LEVEL_RELOADER = None
+
+
+def __getattr__(name: str):
+    # Backwards compatibility: `muselog.DatadogJSONFormatter` used to be imported eagerly.
+    if name == "DatadogJSONFormatter":
+        from muselog.datadog import DatadogJSONFormatter
+        return DatadogJSONFormatter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _datadog_json_enabled() -> bool:
+    """Return whether the environment asks for Datadog JSON logs (with trace correlation)."""
+    return (
+        os.environ.get("ENABLE_DATADOG_JSON_FORMATTER", "false").lower() == "true"
+        and os.environ.get("OTEL_SDK_DISABLED", "false").lower() != "true"
+    )
+
 
 def default_exc_handler(
     exc_type: Type[BaseException],
@@ -24,9 +59,30 @@ def default_exc_handler(
 
     import muselog.logger
     logger = muselog.logger.get_logger_with_context(LOGGER)
+    extra = dict()
+    if _UNCAUGHT_REPEATS is not None:
+        from muselog.fingerprint import fingerprint
+        error_fingerprint = fingerprint(exc_type, exc_value, exc_traceback)
+        repeat_count = _UNCAUGHT_REPEATS.hit(error_fingerprint)
+        if repeat_count > 1:
+            # Skip rendering the traceback; the first occurrence already carried it.
+            logger.critical(
+                "Uncaught exception (repeat %d of %s).",
+                repeat_count,
+                error_fingerprint,
+                extra={
+                    "error.kind": exc_type.__name__,
+                    "error.message": str(exc_value),
+                    "error.fingerprint": error_fingerprint,
+                    "error.repeat_count": repeat_count,
+                }
+            )
+            return None
+        extra["error.fingerprint"] = error_fingerprint
     logger.critical(
         "Uncaught exception.",
-        exc_info=(exc_type, exc_value, exc_traceback)
+        exc_info=(exc_type, exc_value, exc_traceback),
+        extra=extra
     )
     return None
 
@@ -36,7 +92,16 @@ def setup_logging(
     module_log_levels: Optional[Mapping[str, Union[str, int]]] = None,
     add_console_handler: bool = True,
     console_handler_format: Optional[str] = None,
-    exception_handler: Optional[Callable[[Type[BaseException], BaseException, TracebackType], None]] = default_exc_handler
+    exception_handler: Optional[Callable[[Type[BaseException], BaseException, TracebackType], None]] = default_exc_handler,
+    rate_limit: Optional[RateLimitFilter] = None,
+    log_level_file: Optional[str] = None,
+    slotted_records: Optional[bool] = None,
+    load_shedding: bool = False,
+    caller_lookup: Optional[Union[str, Mapping[str, str]]] = None,
+    log_threads: Optional[bool] = None,
+    log_processes: Optional[bool] = None,
+    log_multiprocessing: Optional[bool] = None,
+    redactor: Optional["Redactor"] = None
 ):
     """Configure and install the log handlers for each application's namespace.
 
@@ -47,7 +112,30 @@ def setup_logging(
     :param exception_handler: Specifies the exception handler to use after setting up muselog.
         If `None`, do not install an exception handler.
         (Default: default_exc_handler)
+    :param rate_limit: If provided, install this filter on the root logger's handlers, replacing
+        any rate limit filter installed previously. See :class:`muselog.ratelimit.RateLimitFilter`.
+    :param log_level_file: If provided, apply log levels from this file, and reload them whenever
+        the file changes or the process receives SIGHUP. See :class:`muselog.levels.LevelReloader`.
+    :param slotted_records: If `True`, create compact log records that store their attributes in slots,
+        and if `False`, logging's own records. See :class:`muselog.records.SlottedLogRecord`.
+        (Default: leave the record factory as it is)
+    :param load_shedding: If `True`, install a :class:`muselog.shedding.LoadShedFilter` on each of the
+        root logger's handlers that reports its pressure, replacing any installed previously. Those are
+        :class:`muselog.aio.AsyncioStreamHandler`, the Datadog TCP and HTTP handlers, and
+        :class:`muselog.files.RotatingFileHandler`; the console handler does not. Warns if no handler
+        reports its pressure. (Default: `False`)
+    :param caller_lookup: How records find the file, line and function that logged them: `"full"`, `"fast"`
+        (same result, with cached frame checks) or `"off"`, for every logger or by logger name prefix
+        (e.g., `{"root": "fast", "sqlalchemy": "off"}`). See :class:`muselog.callers.CallerPolicy`.
+        `"full"` is logging's own lookup. (Default: leave the lookup as it is)
+    :param log_threads: Whether records collect the current thread (`logging.logThreads`).
+    :param log_processes: Whether records collect the process id (`logging.logProcesses`).
+    :param log_multiprocessing: Whether records collect the process name (`logging.logMultiprocessing`).
+        For these three, the default leaves logging's switch as it is.
+    :param redactor: If provided, the console handler's formatter, Datadog JSON or text, redacts records with it.
+        See :class:`muselog.redaction.Redactor`.
     """
+    global _LEVEL_RELOADER
     if root_log_level is None:
         root_log_level = "WARNING"
 
@@ -58,18 +146,53 @@ def setup_logging(
         for module_name, log_level in module_log_levels.items():
             logging.getLogger(module_name).setLevel(log_level)
 
+    if _LEVEL_RELOADER is not None:
+        _LEVEL_RELOADER.stop()
+        _LEVEL_RELOADER = None
+    if log_level_file:
+        from muselog.levels import ROOT, LevelReloader
+        base_levels = {ROOT: root_log_level, **(module_log_levels or {})}
+        _LEVEL_RELOADER = LevelReloader(log_level_file, base_levels).start()
+
+    # Only what was asked for is changed, so that calling again with the defaults keeps the
+    # application's own settings (or those of an earlier call).
+    from muselog import callers, records
+    if slotted_records is not None:
+        records.install(slotted_records)
+    if caller_lookup is not None:
+        callers.install(caller_lookup)
+    callers.record_process_info(log_threads, log_processes, log_multiprocessing)
+
     if add_console_handler:
-        trace_enabled = (
-            os.environ.get("ENABLE_DATADOG_JSON_FORMATTER", "false").lower() == "true"
-            and os.environ.get("OTEL_SDK_DISABLED", "false").lower() != "true"
-        )
+        trace_enabled = _datadog_json_enabled()
         if trace_enabled:
-            formatter = DatadogJSONFormatter(trace_enabled=trace_enabled)
+            from muselog.datadog import DatadogJSONFormatter
+            formatter = DatadogJSONFormatter(trace_enabled=trace_enabled, redactor=redactor)
         else:
-            formatter = logging.Formatter(fmt=console_handler_format or DEFAULT_LOG_FORMAT)
+            from muselog.text import TextFormatter
+            formatter = TextFormatter(fmt=console_handler_format or DEFAULT_LOG_FORMAT, redactor=redactor)
 
         console_handler = root_logger.handlers[0] if root_logger.handlers else logging.StreamHandler()
         console_handler.setFormatter(formatter)
 
+    if rate_limit is not None:
+        for handler in root_logger.handlers:
+            for installed in [f for f in handler.filters if isinstance(f, RateLimitFilter)]:
+                handler.removeFilter(installed)
+            handler.addFilter(rate_limit)
+
+    if load_shedding:
+        from muselog.shedding import LoadShedFilter
+        shedding = False
+        for handler in root_logger.handlers:
+            if callable(getattr(handler, "pressure", None)):
+                for installed in [f for f in handler.filters if isinstance(f, LoadShedFilter)]:
+                    handler.removeFilter(installed)
+                handler.addFilter(LoadShedFilter(handler.pressure))
+                shedding = True
+        if not shedding:
+            warnings.warn("load_shedding has no effect: none of the root logger's handlers reports its pressure",
+                          RuntimeWarning, stacklevel=2)
+
     if exception_handler is not None:
         sys.excepthook = exception_handler
@@ -0,0 +1,194 @@
+"""Log handler that keeps stream I/O off of the asyncio event loop."""
+
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, TextIO
+
+
+class AsyncioStreamHandler(logging.StreamHandler):
+    """Stream handler whose writes never block the calling thread.
+
+    Records are formatted when they are emitted, so context and trace ids are
+    captured as usual. The formatted text is then written on a dedicated I/O thread:
+
+    * When called from a running event loop, text goes into a bounded buffer owned by
+      a writer task on that loop. The task batches whatever has accumulated and hands
+      it to the I/O thread, so a slow stdout pipe never stalls the loop.
+    * Otherwise, text is handed to the I/O thread directly, subject to the same bound.
+
+    Once `capacity` messages are waiting, new messages are dropped and counted in `dropped`.
+
+    When the loop shuts down (e.g., at the end of `asyncio.run`), the writer task writes
+    out anything left in its buffer. Call :func:`drain_handlers` (for example, during ASGI
+    lifespan shutdown) to wait for buffered messages without stopping the loop.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, capacity: int = 10000) -> None:
+        """Create the handler.
+
+        :param stream:   Stream to write to. (Default: `sys.stderr`, like :class:`logging.StreamHandler`)
+        :param capacity: Maximum number of messages waiting to be written, per event loop
+                         and for the thread fallback.
+        """
+        super().__init__(stream)
+        self.capacity = capacity
+        self.dropped = 0
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="muselog-io")
+        # Not weakly keyed: a writer's task and queue reference its loop. Writers remove
+        # themselves when their task ends, e.g., when `asyncio.run` cancels it at shutdown.
+        self._writers: Dict[asyncio.AbstractEventLoop, _LoopWriter] = {}
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._closed = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Format `record` and queue it for writing."""
+        try:
+            msg = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None and not loop.is_closed():
+            writer = self._writers.get(loop)
+            if writer is None:
+                # Loops closed without cancelling their tasks never end their writers.
+                for closed in [other for other in list(self._writers) if other.is_closed()]:
+                    self._writers.pop(closed).write_remaining()
+                writer = self._writers[loop] = _LoopWriter(self, loop)
+            writer.put(msg)
+        else:
+            self._submit(msg)
+
+    def flush(self) -> None:
+        """Wait until everything handed to the I/O thread is written, then flush the stream."""
+        if not self._closed:
+            self._io.submit(super().flush).result()
+
+    def close(self) -> None:
+        """Write out all buffered messages and stop the I/O thread."""
+        for writer in list(self._writers.values()):
+            writer.write_remaining()
+        self._writers.clear()
+        self._closed = True
+        self._io.shutdown(wait=True)
+        super().close()
+
+    def pressure(self) -> float:
+        """Return how full the fullest buffer is, from 0 to 1. See :class:`muselog.shedding.LoadShedFilter`."""
+        backlog = self._pending
+        for writer in list(self._writers.values()):
+            backlog = max(backlog, writer.queue.qsize())
+        return min(backlog / self.capacity, 1.0)
+
+    async def drain(self) -> None:
+        """Wait until every message emitted so far on the running loop is written."""
+        writer = self._writers.get(asyncio.get_running_loop())
+        if writer is not None:
+            await writer.queue.join()
+
+    def _submit(self, msg: str) -> None:
+        with self._pending_lock:
+            if self._pending >= self.capacity:
+                self.dropped += 1
+                return
+            self._pending += 1
+        try:
+            self._io.submit(self._write_pending, msg)
+        except RuntimeError:
+            # The I/O thread has been shut down; write inline as a last resort.
+            self._write_pending(msg)
+
+    def _write_pending(self, msg: str) -> None:
+        try:
+            self._write(msg)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+
+    def _write(self, text: str) -> None:
+        try:
+            self.stream.write(text)
+            self.stream.flush()
+        except Exception:
+            # Like logging.Handler.handleError, minus the record we no longer have.
+            if logging.raiseExceptions and sys.stderr:
+                sys.stderr.write("--- Logging error ---\n")
+                traceback.print_exc(file=sys.stderr)
+
+
+class _LoopWriter:
+    """Bounded buffer and writer task owned by a single event loop."""
+
+    def __init__(self, handler: AsyncioStreamHandler, loop: asyncio.AbstractEventLoop) -> None:
+        self.handler = handler
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=handler.capacity)
+        self.task = loop.create_task(self._run(), name="muselog-writer")
+
+    def put(self, msg: str) -> None:
+        try:
+            self.queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self.handler.dropped += 1
+
+    async def _run(self) -> None:
+        batch: List[str] = []
+        future: Optional[Future] = None
+        try:
+            while True:
+                batch = [await self.queue.get()]
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                future = self.handler._io.submit(self.handler._write, "".join(batch))
+                await asyncio.wrap_future(future)
+                future = None
+                for _ in batch:
+                    self.queue.task_done()
+                batch = []
+        except asyncio.CancelledError:
+            # The loop is shutting down. Finish without yielding back to it.
+            if future is not None and not future.cancel():
+                future.result()
+            elif batch:
+                self.handler._write("".join(batch))
+            for _ in batch:
+                self.queue.task_done()
+            self.write_remaining()
+            raise
+        finally:
+            if self.handler._writers.get(self.loop) is self:
+                self.handler._writers.pop(self.loop, None)
+
+    def write_remaining(self) -> None:
+        remaining = []
+        while True:
+            try:
+                remaining.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+            self.queue.task_done()
+        if remaining:
+            self.handler._write("".join(remaining))
+
+
+async def drain_handlers(logger: Optional[logging.Logger] = None) -> None:
+    """Wait for every :class:`AsyncioStreamHandler` on `logger` to write what the running loop has buffered.
+
+    :param logger: Logger whose handlers to drain. (Default: the root logger)
+    """
+    for handler in (logger or logging.getLogger()).handlers:
+        if isinstance(handler, AsyncioStreamHandler):
+            await handler.drain()
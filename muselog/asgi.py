@@ -1,56 +1,113 @@
 """Request logging middleware for any ASGI application."""
 
+import contextlib
 import logging
-import time
-from typing import Awaitable, Callable, Optional
+from typing import Any, AsyncIterator, Optional
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from . import attributes, util
+from . import aio, attributes, routes, util
 from .logger import get_logger_with_context
 
 LOGGER: logging.Logger = get_logger_with_context(logging.getLogger(__name__))
 
-RequestResponseEndpoint = Callable[[Request], Awaitable[Response]]
 
-
-def _make_network_attributes(request: Request, response: Optional[Response] = None) -> attributes.NetworkAttributes:
+def _make_network_attributes(request: Request, bytes_written: Optional[int] = None) -> attributes.NetworkAttributes:
     return attributes.NetworkAttributes(
         extract_header=request.headers.get,
         remote_addr=f"{request.client.host}:{request.client.port}",
         bytes_read=request.headers.get("Content-Length"),
-        bytes_written=response.headers.get("Content-Length") if response else None
+        bytes_written=bytes_written
     )
 
 
-def _make_http_attributes(request: Request, response: Optional[Response] = None) -> attributes.HttpAttributes:
+def _make_http_attributes(request: Request, status_code: int = 500) -> attributes.HttpAttributes:
     return attributes.HttpAttributes(
         extract_header=request.headers.get,
         url=str(request.url),
         method=request.method,
-        status_code=response.status_code if response else 500
+        status_code=status_code
     )
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Log entry and exit point of request, and add request details to the global context."""
+class RequestLoggingMiddleware:
+    """Log entry and exit point of request, and add request details to the global context.
+
+    The middleware observes the messages the application sends, without buffering them.
+    Body bytes are counted as they are sent, so streamed and chunked responses are
+    sized correctly, and the request is logged once its final body chunk has been sent.
+    """
+
+    def __init__(self, app: ASGIApp, route_policy: Optional[routes.RoutePolicy] = None) -> None:
+        """Create the middleware.
+
+        :param app:          The ASGI application to wrap.
+        :param route_policy: Per-route access log policy. (Default: :func:`muselog.routes.get_policy`)
+        """
+        self.app = app
+        self.route_policy = route_policy
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        timer = util.RequestTimer()
+        request = Request(scope)
         util.init_context(request.headers.get)
-        start_time = time.time()
+        timer.hooks_done()
+
+        status_code: Optional[int] = None
+        bytes_written = 0
+        logged = False
+
+        def log(status: int) -> None:
+            nonlocal logged
+            logged = True
+            level = util.access_log_level(scope["path"], status, self.route_policy)
+            if level is None:
+                return
+            network_attrs = _make_network_attributes(request, bytes_written)
+            http_attrs = _make_http_attributes(request, status)
+            util.log_request(request.url.path, None, network_attrs, http_attrs, level=level, phases=timer.phases())
+
+        async def send_observed(message: Message) -> None:
+            nonlocal status_code, bytes_written
+            if message["type"] == "http.response.start":
+                timer.handler_done()
+                status_code = message["status"]
+                await send(message)
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if body:
+                    timer.first_byte()
+                    bytes_written += len(body)
+                await send(message)
+                if not message.get("more_body", False) and not logged:
+                    log(status_code)
+            else:
+                await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_observed)
         except Exception:
-            network_attrs = _make_network_attributes(request)
-            http_attrs = _make_http_attributes(request)
-            util.log_request(request.url.path, time.time() - start_time, network_attrs, http_attrs)
+            # Exceptions raised before the response started are served as a 500.
+            if not logged:
+                log(status_code or 500)
             raise
+        if not logged and status_code is not None:
+            # The application returned without sending its final body chunk.
+            log(status_code)
 
-        network_attrs = _make_network_attributes(request, response)
-        http_attrs = _make_http_attributes(request, response)
 
-        util.log_request(request.url.path, time.time() - start_time, network_attrs, http_attrs)
+@contextlib.asynccontextmanager
+async def drain_logs_on_shutdown(app: Any) -> AsyncIterator[None]:
+    """Lifespan that waits for :class:`muselog.aio.AsyncioStreamHandler` buffers to be written at shutdown.
 
-        return response
+    Pass as (or call from) your application's lifespan, e.g. `Starlette(lifespan=drain_logs_on_shutdown)`.
+    """
+    try:
+        yield
+    finally:
+        await aio.drain_handlers()
@@ -1,8 +1,10 @@
 """Support application-wide exception hook with muselog integration."""
 
+import logging
 import os
 
 import muselog
+from muselog.ratelimit import RateLimitFilter
 
 module_log_levels = dict()
 if os.environ.get("MUSELOG_MODULE_LOG_LEVELS"):
@@ -10,8 +12,26 @@ if os.environ.get("MUSELOG_MODULE_LOG_LEVELS"):
         module, log_level = module_log_level.split("=")
         module_log_levels[module] = log_level
 
+rate_limit = None
+if os.environ.get("MUSELOG_RATE_LIMIT"):
+    rate_limit = RateLimitFilter(
+        rate=float(os.environ["MUSELOG_RATE_LIMIT"]),
+        burst=int(os.environ["MUSELOG_RATE_LIMIT_BURST"]) if os.environ.get("MUSELOG_RATE_LIMIT_BURST") else None,
+    )
+
+shipper_socket = os.environ.get("MUSELOG_SHIPPER_SOCKET")
+if shipper_socket:
+    # The shipper sidecar formats and writes our logs; we only send it snapshots.
+    from muselog.shipper import ShipperHandler
+    shipper_handler = ShipperHandler(shipper_socket, trace_enabled=muselog._datadog_json_enabled())
+    shipper_handler.setFormatter(logging.Formatter(os.environ.get("MUSELOG_LOG_FORMAT") or muselog.DEFAULT_LOG_FORMAT))
+    logging.getLogger().addHandler(shipper_handler)
+
 muselog.setup_logging(
     root_log_level=os.environ.get("MUSELOG_LOG_LEVEL"),
     module_log_levels=module_log_levels,
+    add_console_handler=not shipper_socket,
     console_handler_format=os.environ.get("MUSELOG_LOG_FORMAT"),
+    rate_limit=rate_limit,
+    log_level_file=os.environ.get("MUSELOG_LOG_LEVEL_FILE"),
 )
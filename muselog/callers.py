@@ -0,0 +1,144 @@
+"""Cheaper caller lookup and record attributes, for processes that log a lot."""
+
+import logging
+import sys
+from typing import Dict, Mapping, Optional, Union
+
+#: Caller lookup modes: the standard library's own lookup, the same lookup with cached frame
+#: checks, or none at all (records then have "(unknown file)", line 0 and "(unknown function)").
+FULL, FAST, OFF = "full", "fast", "off"
+
+_MODE_NAMES = {FULL: FULL, FAST: FAST, OFF: OFF}
+
+#: Name used for the root logger, i.e., the mode of loggers that no other prefix matches.
+ROOT = "root"
+
+_UNKNOWN_CALLER = ("(unknown file)", 0, "(unknown function)", None)
+
+#: `Logger.findCaller` of the standard library, put back by `install(None)`.
+_FIND_CALLER = logging.Logger.findCaller
+
+#: Whether code from each file seen is internal to logging, as decided by logging itself.
+#: Keyed by file name, whose hash (unlike that of a code object) is computed only once.
+_INTERNAL_FILES: Dict[str, bool] = dict()
+
+
+class CallerPolicy:
+    """Caller lookup mode of each logger, by logger name prefix.
+
+    As for levels, the longest matching prefix (`"app"` matches `"app"` and `"app.views"`,
+    but not `"apple"`) wins. Each logger's mode is resolved once, then cached.
+    """
+
+    def __init__(self, modes: Union[str, Mapping[str, str]]) -> None:
+        """Create the policy.
+
+        :param modes: A mode for every logger, or a mapping of logger name prefixes to modes.
+                      Use `root` for loggers no other prefix matches. (Default for those: `full`)
+        """
+        if isinstance(modes, str):
+            modes = {ROOT: modes}
+        self.modes: Dict[str, str] = dict()
+        for prefix, mode in modes.items():
+            if mode not in _MODE_NAMES:
+                raise ValueError(f"unknown caller lookup mode {mode!r} for {prefix!r}")
+            # The lookup compares modes by identity.
+            self.modes[prefix] = _MODE_NAMES[mode]
+        self._resolved: Dict[str, str] = dict()
+
+    def mode(self, name: str) -> str:
+        """Return the mode of the logger named `name`."""
+        mode = self._resolved.get(name)
+        if mode is None:
+            mode = self._resolved[name] = self._resolve(name)
+        return mode
+
+    def _resolve(self, name: str) -> str:
+        while name not in self.modes:
+            if "." not in name:
+                return self.modes.get(ROOT, FULL)
+            name = name.rpartition(".")[0]
+        return self.modes[name]
+
+
+#: Policy of the installed lookup, if any, and its resolved modes.
+_POLICY: Optional[CallerPolicy] = None
+_MODES: Dict[str, str] = dict()
+
+#: Value of `logging._srcfile` before :func:`install` turned every lookup off, if it did.
+_SRCFILE: Optional[str] = None
+
+
+def _find_caller(self: logging.Logger, stack_info: bool = False, stacklevel: int = 1):
+    """`Logger.findCaller`, following the installed policy.
+
+    The `fast` mode walks the stack exactly as logging does, but remembers which files
+    are internal to logging, rather than normalizing and comparing the file name of
+    every frame on every call.
+    """
+    mode = _MODES.get(self.name) or _POLICY.mode(self.name)
+    if mode is OFF:
+        return _UNKNOWN_CALLER
+    if mode is FULL or stack_info or stacklevel < 1:
+        # One more level, for this function's own frame.
+        return _FIND_CALLER(self, stack_info, stacklevel + 1)
+    f = sys._getframe(1)
+    while True:
+        internal = _INTERNAL_FILES.get(f.f_code.co_filename)
+        if internal is None:
+            internal = _INTERNAL_FILES[f.f_code.co_filename] = logging._is_internal_frame(f)
+        if not internal:
+            stacklevel -= 1
+            if stacklevel <= 0:
+                break
+        next_f = f.f_back
+        if next_f is None:
+            break
+        f = next_f
+    co = f.f_code
+    return co.co_filename, f.f_lineno, co.co_name, None
+
+
+def install(modes: Optional[Union[str, Mapping[str, str], CallerPolicy]]) -> None:
+    """Look up callers following `modes`, or, if `None`, the way logging does by default.
+
+    If every logger is `off`, logging skips the lookup altogether, as it does when
+    `logging._srcfile` is `None`.
+
+    :param modes: See :class:`CallerPolicy`.
+    """
+    global _POLICY, _MODES, _SRCFILE
+    policy = modes if isinstance(modes, CallerPolicy) or modes is None else CallerPolicy(modes)
+    _POLICY = policy
+    _MODES = policy._resolved if policy is not None else dict()
+    if _SRCFILE is not None:
+        logging._srcfile, _SRCFILE = _SRCFILE, None
+    used_modes = set(policy.modes.values()) if policy is not None else {FULL}
+    if used_modes == {OFF} and ROOT in policy.modes:
+        logging.Logger.findCaller = _FIND_CALLER
+        _SRCFILE, logging._srcfile = logging._srcfile, None
+    elif used_modes == {FULL}:
+        logging.Logger.findCaller = _FIND_CALLER
+    else:
+        logging.Logger.findCaller = _find_caller
+
+
+def record_process_info(threads: Optional[bool] = True,
+                        processes: Optional[bool] = True,
+                        multiprocessing: Optional[bool] = True) -> None:
+    """Choose which thread and process details records collect, through logging's module-level switches.
+
+    Records that skip a detail have `None` in its place (e.g., `threadName`, which
+    :class:`muselog.datadog.DatadogJSONFormatter` logs as `logger.thread_name`).
+    A switch given as `None` is left as it is.
+
+    :param threads:         Collect `thread` and `threadName` (`logging.logThreads`).
+    :param processes:       Collect `process` (`logging.logProcesses`).
+    :param multiprocessing: Collect `processName` (`logging.logMultiprocessing`).
+    """
+    if threads is not None:
+        logging.logThreads = threads
+    if processes is not None:
+        logging.logProcesses = processes
+    if multiprocessing is not None:
+        logging.logMultiprocessing = multiprocessing
@@ -1,6 +1,10 @@
 """Run an application with muselog pre-configured."""
 
 import os
+import subprocess  # nosec
+import sys
+import tempfile
+import time
 from distutils import spawn
 from enum import Enum
 from typing import List, Optional
@@ -38,6 +42,34 @@ def _validate_module_log_level(ctx, param, value):
     return value
 
 
+def _start_shipper(path: Optional[str], timeout: float = 5.0) -> str:
+    """Start the shipper sidecar, wait until it listens, and return its socket path.
+
+    The sidecar watches this process, which keeps its pid after `exec`,
+    and exits once the program does.
+
+    :param path: PYTHONPATH for the sidecar, which must not load the bootstrap `sitecustomize`.
+    """
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="muselog-"), "shipper.sock")
+    env = dict(os.environ)
+    if path:
+        env["PYTHONPATH"] = path
+    else:
+        env.pop("PYTHONPATH", None)
+    subprocess.Popen(  # nosec
+        [sys.executable, "-m", "muselog.shipper", "--socket", socket_path, "--watch-pid", str(os.getpid())],
+        env=env,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if time.monotonic() > deadline:
+            typer.echo("muselog shipper did not start", err=True)
+            raise typer.Exit(code=1)
+        time.sleep(0.01)
+    return socket_path
+
+
 app = typer.Typer()
 
 
@@ -73,6 +105,25 @@ Format: module=DEBUG|INFO|WARNING|ERROR|CRITICAL. (e.g., muselog.logger=CRITICAL
         muselog.DEFAULT_LOG_FORMAT,
         help="The format to use for the log messages. Has no effect for datadog logs.",
     ),
+    rate_limit: Optional[float] = typer.Option(
+        None,
+        min=0,
+        help="Maximum records per second for each distinct logger, level, and message template.",
+    ),
+    rate_limit_burst: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Records allowed in a burst before --rate-limit applies.",
+    ),
+    log_level_file: Optional[str] = typer.Option(
+        None,
+        help="File of module=LEVEL lines (use 'root' for the root logger), "
+             "reapplied whenever it changes or on SIGHUP.",
+    ),
+    shipper: bool = typer.Option(
+        False,
+        help="Format and transport logs in a sidecar process shared by *program* and its children.",
+    ),
 ):
     """Execute the given Python program with muselog configured."""
     from muselog import __file__ as muselog_root
@@ -88,6 +139,14 @@ Format: module=DEBUG|INFO|WARNING|ERROR|CRITICAL. (e.g., muselog.logger=CRITICAL
         os.environ["MUSELOG_MODULE_LOG_LEVELS"] = ",".join(module_log_level)
     if log_format:
         os.environ["MUSELOG_LOG_FORMAT"] = log_format
+    if rate_limit is not None:
+        os.environ["MUSELOG_RATE_LIMIT"] = str(rate_limit)
+    if rate_limit_burst is not None:
+        os.environ["MUSELOG_RATE_LIMIT_BURST"] = str(rate_limit_burst)
+    if log_level_file:
+        os.environ["MUSELOG_LOG_LEVEL_FILE"] = os.path.abspath(log_level_file)
+    if shipper:
+        os.environ["MUSELOG_SHIPPER_SOCKET"] = _start_shipper(path)
     if not args:
         args = []
     executable = spawn.find_executable(program)
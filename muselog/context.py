@@ -2,11 +2,207 @@
 
 from __future__ import annotations
 
+import contextlib
+import itertools
 from contextvars import ContextVar
-from typing import Any
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+#: Source of versions for :class:`BoundContext`. Versions are never reused, even across instances.
+_VERSIONS = itertools.count()
+
+
+class BoundContext(dict):
+    """Dictionary of bound context that caches its JSON encoding until it is changed.
+
+    Every change through the dictionary's own methods gives it a new `version` and
+    drops the cached encoding, so records can tell whether the context they were
+    made from is still the same. Values changed in place (e.g., a bound list that is
+    appended to) are not noticed; bind them again instead.
+    """
+
+    __slots__ = ("version", "_encoded")
+
+    def __init__(self, *args, **kwargs) -> None:  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self._changed()
+
+    def _changed(self) -> None:
+        self.version = next(_VERSIONS)
+        self._encoded: Optional[Tuple[Callable[[dict], str], int, str]] = None
+
+    def encoded(self, encode: Callable[[dict], str], version: int) -> Optional[str]:
+        """Return the members of this dictionary as a JSON fragment, without the enclosing braces.
+
+        Returns `None` if the dictionary is no longer at `version`, including when it is
+        changed (e.g., by another thread sharing it) while it is being encoded.
+
+        :param encode:  Function that encodes a dictionary as a JSON object. The fragment
+                        is cached for the last function used, compared by identity.
+        :param version: The `version` the fragment must be of.
+        """
+        if self.version != version:
+            return None
+        cached = self._encoded
+        if cached is None or cached[0] is not encode or cached[1] != version:
+            text = encode(self)[1:-1]
+            if self.version != version:
+                return None
+            # Stored with its version, so that a store racing a change is never read.
+            cached = self._encoded = (encode, version, text)
+        return cached[2]
+
+    def __setitem__(self, key, value) -> None:  # noqa: D105
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key) -> None:  # noqa: D105
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs) -> None:  # noqa: D102
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):  # noqa: D102
+        if key not in self:
+            self._changed()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):  # noqa: D102
+        try:
+            return super().pop(*args)
+        finally:
+            self._changed()
+
+    def popitem(self):  # noqa: D102
+        try:
+            return super().popitem()
+        finally:
+            self._changed()
+
+    def clear(self) -> None:  # noqa: D102
+        super().clear()
+        self._changed()
+
+    def __ior__(self, other):  # noqa: D105
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return BoundContext, (dict(self),)
+
+
+class RecordContext(dict):
+    """The `ctx` of one record: bound context, plus values passed with the logging call.
+
+    The record keeps the :class:`BoundContext` objects it was made from, with their
+    versions at the time. While they are unchanged, :meth:`encoded` splices their cached
+    encodings instead of encoding every bound value again, so only the values passed
+    with the call are encoded per record. Otherwise, or once the record's own `ctx` is
+    changed, it is encoded like any other dictionary.
+
+    It is still a plain copy of its values: comparing, copying, or pickling it
+    gives the same results as for a `dict`.
+    """
+
+    __slots__ = ("_sources", "_call", "_encoded")
+
+    def __init__(self, values: dict, sources: Tuple[BoundContext, ...], call: dict) -> None:
+        """Create the record's `ctx`.
+
+        :param values:  All of the record's context, merged.
+        :param sources: Bound context merged into `values`, in order. Their keys must not
+                        overlap each other's, nor those of `call`, or encodings are not spliced.
+        :param call:    Values passed with the logging call, merged last.
+        """
+        super().__init__(values)
+        self._sources = tuple((source, source.version) for source in sources if source)
+        self._call = call
+        self._encoded: Optional[str] = None
+
+    def encoded(self, encode: Callable[[dict], str]) -> Optional[str]:
+        """Return this context as a JSON object, splicing cached encodings of bound context.
+
+        Returns `None` if the encoding cannot be spliced, in which case encode the
+        dictionary as usual. The result is cached for the life of the record.
+
+        :param encode: Function that encodes a dictionary as a JSON object. Use the same
+                       function for every record, or bound context is encoded again each time.
+        """
+        if self._encoded is not None or self._sources is None:
+            return self._encoded
+        parts = []
+        for source, version in self._sources:
+            fragment = source.encoded(encode, version)
+            if fragment is None:
+                self._sources = None
+                return None
+            parts.append(fragment)
+        if self._call:
+            parts.append(encode(self._call)[1:-1])
+        self._encoded = "{" + ", ".join(parts) + "}"
+        return self._encoded
+
+    def _changed(self) -> None:
+        self._sources = None
+        self._encoded = None
+
+    def __setitem__(self, key, value) -> None:  # noqa: D105
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key) -> None:  # noqa: D105
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs) -> None:  # noqa: D102
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):  # noqa: D102
+        self._changed()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):  # noqa: D102
+        self._changed()
+        return super().pop(*args)
+
+    def popitem(self):  # noqa: D102
+        self._changed()
+        return super().popitem()
+
+    def clear(self) -> None:  # noqa: D102
+        super().clear()
+        self._changed()
+
+    def __ior__(self, other):  # noqa: D105
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+def record_context(sources: Tuple[BoundContext, ...], call: dict) -> dict:
+    """Merge bound context and a logging call's values into a record's `ctx`.
+
+    Later sources override earlier ones, and `call` overrides them all. Encodings of
+    bound context are only spliced when no key is overridden; otherwise a plain
+    dictionary is returned.
+    """
+    values = dict()
+    keys = 0
+    for source in sources:
+        values.update(source)
+        keys += len(source)
+    values.update(call)
+    if keys + len(call) != len(values):
+        return values
+    return RecordContext(values, sources, call)
+
 
 #: Global context that is always applied.
-_CONTEXT = ContextVar("muselog", default=dict())
+_CONTEXT = ContextVar("muselog", default=BoundContext())
 
 
 def copy() -> dict:
@@ -14,11 +210,30 @@ def copy() -> dict:
     return _CONTEXT.get().copy()
 
 
+def bound() -> BoundContext:
+    """Return the context-local context itself, rather than a copy. Do not change it directly."""
+    return _CONTEXT.get()
+
+
 def get(key: str, default=None) -> Any:
     """Get a specific key from the context-local context."""
     return _CONTEXT.get().get(key, default)
 
 
+@contextlib.contextmanager
+def restored(ctx: dict) -> Iterator[None]:
+    """Replace the context-local context with a copy of `ctx` for the duration of the block.
+
+    The previous context is put back on exit, whatever was bound in the meantime.
+    Use with a snapshot from :func:`copy` to carry context to another thread.
+    """
+    token = _CONTEXT.set(BoundContext(ctx))
+    try:
+        yield
+    finally:
+        _CONTEXT.reset(token)
+
+
 def clear():
     """Clear the context-local context.
 
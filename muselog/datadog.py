@@ -1,12 +1,22 @@
 """Module that houses all logic necessary to send well-formed logs to Datadog."""
+from collections import deque
 from datetime import timedelta
-from logging import LogRecord
+from functools import partial
+from logging import Handler, LogRecord
 from logging.handlers import DatagramHandler
-from typing import Any, Mapping
-import json, os, sys
+from itertools import islice
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+import gzip, http.client, json, logging, math, os, random, selectors, socket, sys, threading, time, weakref
 
 import json_log_formatter
-from opentelemetry import trace
+
+from . import context, records
+from .fingerprint import RepeatSuppressor, fingerprint
+from .redaction import Redactor
+from .truncation import TRUNCATION_MARKER, clip, fair_share
+from .util import ACCESS_LOG_MESSAGE
 
 class DataDogUdpHandler(DatagramHandler):
     """A handler class which writes logging records, in pickle format, to a datagram socket.
@@ -16,6 +26,9 @@ class DataDogUdpHandler(DatagramHandler):
 
     To unpickle the record at the receiving end into a LogRecord, use the
     makeLogRecord function.
+
+    With a :class:`DatadogJSONFormatter`, the formatter's output is sent instead. Share the
+    formatter with other handlers (e.g., the console's) to format each record only once.
     """
 
     def __init__(self, host: str, port: int):
@@ -44,11 +57,15 @@ class DataDogUdpHandler(DatagramHandler):
         Pickles the record in binary format with a length prefix, and
         returns it ready for transmission across the socket.
         """
+        if isinstance(self.formatter, DatadogJSONFormatter):
+            return self.format(record)
         ei = record.exc_info
         if ei:
-            _ = self.format(record)  # just to get traceback text into record.exc_text
+            if not record.exc_text:
+                # Only the traceback text is sent; the rest of the format is not needed.
+                record.exc_text = (self.formatter or logging._defaultFormatter).formatException(ei)
             record.exc_info = None  # to avoid Unpickleable error
-        d = dict(record.__dict__)
+        d = records.attributes(record)
         s = json.dumps(d)
         if ei:
             record.exc_info = ei  # for next handler
@@ -79,19 +96,84 @@ class ObjectEncoder(json.JSONEncoder):
             return result
 
 
+#: Encodes with :class:`ObjectEncoder`. One shared function, so that cached encodings of bound context are reused.
+_encode = partial(json.dumps, cls=ObjectEncoder)
+
+
+def _budget(value: Optional[int], env_var: str, default: int) -> int:
+    if value is None:
+        value = int(os.environ.get(env_var, default))
+    return max(value, 0)
+
+
 class DatadogJSONFormatter(json_log_formatter.JSONFormatter):
     """JSON log formatter that includes Datadog standard attributes."""
 
-    def __init__(self, trace_enabled: bool = False):
+    #: Fast path for access logs, if this class encodes records the generic way.
+    _access_logs: Optional["AccessLogEncoder"] = None
+
+    #: Weak reference to the last record formatted, and its text, so that handlers sharing
+    #: this formatter reuse it rather than format the record again.
+    _last: Optional[Tuple["weakref.ref[LogRecord]", str]] = None
+
+    def __init__(self,
+                 trace_enabled: bool = False,
+                 max_record_size: Optional[int] = None,
+                 max_field_size: Optional[int] = None,
+                 max_ctx_items: Optional[int] = None,
+                 exc_repeat_window: Optional[float] = None,
+                 redactor: Optional[Redactor] = None):
         """Create the formatter.
 
-        :param trace_enabled: Set to true to include trace information in the log.
+        Size budgets are approximate character counts of the encoded JSON. A budget of 0 disables it.
+
+        :param trace_enabled:   Set to true to include trace information in the log.
+        :param max_record_size: Budget for the whole record. (Default: `DATADOG_MAX_RECORD_SIZE` or 256000)
+        :param max_field_size:  Budget for any single top-level field. (Default: `DATADOG_MAX_FIELD_SIZE` or 65536)
+        :param max_ctx_items:   Maximum number of items kept in `ctx`. (Default: `DATADOG_MAX_CTX_ITEMS` or 128)
+        :param exc_repeat_window: Seconds during which repeats of an identical exception are logged
+                                  without `error.stack`. 0 disables suppression.
+                                  (Default: `DATADOG_ERROR_REPEAT_WINDOW` or 0)
+        :param redactor: If provided, redacts each record after :meth:`mutate_json_record`,
+                         before the size budgets apply. See :class:`muselog.redaction.Redactor`.
         """
         self.trace_enabled = trace_enabled
         self.enabled = trace_enabled
+        self.max_record_size = _budget(max_record_size, "DATADOG_MAX_RECORD_SIZE", 256000)
+        self.max_field_size = _budget(max_field_size, "DATADOG_MAX_FIELD_SIZE", 65536)
+        self.max_ctx_items = _budget(max_ctx_items, "DATADOG_MAX_CTX_ITEMS", 128)
+        if exc_repeat_window is None:
+            self.exc_repeats = RepeatSuppressor.from_env()
+        else:
+            self.exc_repeats = RepeatSuppressor(exc_repeat_window) if exc_repeat_window > 0 else None
+        self.redactor = redactor
+        if all(getattr(type(self), name) is getattr(DatadogJSONFormatter, name) for name in AccessLogEncoder.REQUIRES):
+            self._access_logs = AccessLogEncoder(self)
 
     def format(self, record: LogRecord):
-        """Return the record in the format usable by Datadog."""
+        """Return the record in the format usable by Datadog.
+
+        The text is reused if the same record is formatted again right after (e.g., by the
+        next handler sharing this formatter), so attributes handlers change in between are
+        not seen, unless :meth:`forget_last` is called first.
+        """
+        last = self._last
+        if last is not None and last[0]() is record:
+            return last[1]
+        encoded = None
+        if record.msg is ACCESS_LOG_MESSAGE and self._access_logs is not None:
+            encoded = self._access_logs.encode(record)
+        if encoded is None:
+            encoded = self.to_json(self.record_dict(record))
+        self._last = (weakref.ref(record), encoded)
+        return encoded
+
+    def forget_last(self) -> None:
+        """Forget the text of the last record formatted, so that :meth:`format` formats it again."""
+        self._last = None
+
+    def record_dict(self, record: LogRecord) -> Dict[str, Any]:
+        """Return the dictionary of Datadog attributes that :meth:`format` encodes, within the size budgets."""
         json_record = self.json_record(record.getMessage(), record)
         mutated_record = self.mutate_json_record(json_record)
         # Backwards compatibility: Functions that overwrite this but don't
@@ -99,18 +181,81 @@ class DatadogJSONFormatter(json_log_formatter.JSONFormatter):
         # argument passed in.
         if mutated_record is None:
             mutated_record = json_record
-        return self.to_json(mutated_record)
+        if self.redactor is not None:
+            self.redactor.redact(mutated_record)
+        self.limit_json_record(mutated_record)
+        return mutated_record
+
+    def limit_json_record(self, record_dict: Dict[str, Any]) -> None:
+        """Truncate values in `record_dict`, in place, so that it fits the configured budgets.
+
+        Truncated values end with :data:`muselog.truncation.TRUNCATION_MARKER`, and the
+        names of truncated fields are listed under `tm.logger.truncated`.
+        """
+        truncated = []
+
+        ctx = record_dict.get("ctx")
+        if self.max_ctx_items and isinstance(ctx, Mapping) and len(ctx) > self.max_ctx_items:
+            kept = dict(islice(ctx.items(), self.max_ctx_items))
+            kept[TRUNCATION_MARKER] = len(ctx) - self.max_ctx_items
+            record_dict["ctx"] = kept
+            truncated.append("ctx")
+
+        if not self.max_field_size and not self.max_record_size:
+            if truncated:
+                record_dict["tm.logger.truncated"] = truncated
+            return
+
+        field_budget = self.max_field_size or self.max_record_size
+        costs = {}
+        for key, value in list(record_dict.items()):
+            if type(value) is context.RecordContext and self.json_lib is json:
+                encoded = value.encoded(_encode)
+                if encoded is not None and len(encoded) <= field_budget:
+                    costs[key] = len(encoded)
+                    continue
+            value, costs[key], was_truncated = clip(value, field_budget)
+            if was_truncated:
+                record_dict[key] = value
+                if key not in truncated:
+                    truncated.append(key)
+
+        if self.max_record_size:
+            # Field names, quotes, colons and commas.
+            overhead = sum(len(key) + 4 for key in costs) + 64
+            if sum(costs.values()) + overhead > self.max_record_size:
+                cap = fair_share(costs.values(), self.max_record_size - overhead)
+                for key, cost in costs.items():
+                    if cost > cap:
+                        record_dict[key], _, _ = clip(record_dict[key], cap)
+                        if key not in truncated:
+                            truncated.append(key)
+
+        if truncated:
+            record_dict["tm.logger.truncated"] = truncated
 
     def to_json(self, record: Mapping[str, Any]):
         """Convert record dict to a JSON string.
 
         Override this method to change the way dict is converted to JSON.
+
+        If `ctx` holds bound context (see :class:`muselog.context.RecordContext`), its
+        cached encoding is spliced in at the end of the object, rather than encoded again.
         """
+        ctx = record.get("ctx")
+        if type(ctx) is context.RecordContext and self.json_lib is json:
+            encoded_ctx = ctx.encoded(_encode)
+            if encoded_ctx is not None:
+                rest = dict(record)
+                del rest["ctx"]
+                encoded = _encode(rest)
+                separator = ", " if rest else ""
+                return f'{encoded[:-1]}{separator}"ctx": {encoded_ctx}}}'
         return self.json_lib.dumps(record, cls=ObjectEncoder)
 
     def json_record(self, message: str, record: LogRecord):
         """Convert the record to JSON and inject Datadog attributes."""
-        record_dict = dict(record.__dict__)
+        record_dict = records.attributes(record)
 
         record_dict["message"] = message
         record_dict["tm.logger.library"] = "muselog"
@@ -137,6 +282,9 @@ class DatadogJSONFormatter(json_log_formatter.JSONFormatter):
         exc_info = record.exc_info
         try:
             if self.trace_enabled:
+                # Imported here so that merely importing muselog does not load opentelemetry.
+                from opentelemetry import trace
+
                 # get correlation ids from current tracer context
                 current_span = trace.get_current_span()
 
@@ -180,7 +328,595 @@ class DatadogJSONFormatter(json_log_formatter.JSONFormatter):
                 record_dict["error.kind"] = exc_info[0].__name__
             if "error.message" not in record_dict:
                 record_dict["error.message"] = str(exc_info[1])
+            if self.exc_repeats is not None and "error.fingerprint" not in record_dict:
+                record_dict["error.fingerprint"] = fingerprint(*exc_info)
+                repeat_count = self.exc_repeats.hit(record_dict["error.fingerprint"])
+                if repeat_count > 1:
+                    # Repeats only reference the first, fully rendered occurrence.
+                    record_dict["error.repeat_count"] = repeat_count
+                    return record_dict
             if "error.stack" not in record_dict:
                 limit = int(os.environ.get("DATADOG_ERROR_STACK_LIMIT", 10000))
                 record_dict["error.stack"] = self.formatException(exc_info)[0:limit]
         return record_dict
+
+
+def _encode_float(value: float) -> str:
+    # As the json module does, with allow_nan.
+    if math.isfinite(value):
+        return float.__repr__(value)
+    return "NaN" if value != value else ("Infinity" if value > 0 else "-Infinity")
+
+
+#: Encoders of the JSON scalars, by exact type, matching the json module's output.
+_SCALAR_ENCODERS: Dict[type, Callable[[Any], str]] = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+}
+
+
+def _encode_value(value: Any) -> Optional[str]:
+    """Encode a scalar, or a list or tuple of them, as the json module would. Return `None` for anything else."""
+    encode = _SCALAR_ENCODERS.get(type(value))
+    if encode is not None:
+        return encode(value)
+    if isinstance(value, (list, tuple)):
+        items = [_encode_value(item) for item in value]
+        return None if None in items else "[" + ", ".join(items) + "]"
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        # E.g., http.HTTPStatus.
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return _encode_float(value)
+    return None
+
+
+#: Attributes every record has.
+_RECORD_FIELDS = frozenset(records._FIELDS)
+
+#: Fields of access logs, other than the standard record attributes. Other formatters
+#: (e.g., that of a console handler) may already have set `message` and `asctime`.
+_ACCESS_LOG_FIELDS = frozenset(("duration", "usr.id", "ctx", "message", "asctime"))
+_ACCESS_LOG_PREFIXES = ("network.", "http.", "timing.")
+
+_MISSING = object()
+
+
+class AccessLogEncoder:
+    """Encode access logs (records logged by :func:`muselog.util.log_request`) for a :class:`DatadogJSONFormatter`.
+
+    Access logs have a known shape: the standard record attributes, then `duration`,
+    `network.*`, `http.*`, `usr.id`, `timing.*` and `ctx` fields. For each combination of
+    those fields, the JSON keys and separators are built once, as a template; values are
+    then written into it with the json module's own escaping, without copying the record
+    or walking it for the size budgets. Output is the same, byte for byte, as that of the
+    formatter's generic path, which is taken instead for any record that might come out
+    differently (e.g., one with an exception, unexpected fields, or values near a budget).
+    """
+
+    #: Formatter methods the encoder stands in for. It is only used if none are overridden.
+    REQUIRES = ("json_record", "mutate_json_record", "limit_json_record", "to_json")
+
+    #: Most templates kept. Records of other shapes take the generic path.
+    MAX_TEMPLATES = 64
+
+    def __init__(self, formatter: DatadogJSONFormatter) -> None:
+        """Create the encoder for `formatter`, whose settings (budgets, trace ids) it follows."""
+        self.formatter = formatter
+        self._templates: Dict[Tuple[str, ...], Optional[Tuple[Tuple[Optional[str], ...], bool]]] = dict()
+
+    def encode(self, record: LogRecord) -> Optional[str]:
+        """Return `record` encoded, or `None` if it must take the generic path."""
+        formatter = self.formatter
+        if record.exc_info or formatter.json_lib is not json:
+            return None
+        attributes = record.as_dict() if type(record) is records.SlottedLogRecord else record.__dict__
+        keys = tuple(attributes)
+        template = self._templates.get(keys, _MISSING)
+        if template is _MISSING:
+            template = self._compile(keys)
+        if template is None:
+            return None
+        prefixes, has_message = template
+
+        message = record.getMessage()
+        if has_message and attributes["message"] != message:
+            return None
+        redactor = formatter.redactor
+        if redactor is not None and (redactor.scrub(message) is not message or not redactor.is_clean(attributes)):
+            # Only records that need redaction are scanned again, on the generic path.
+            return None
+        parts = []
+        ctx = None
+        for prefix, value in zip(prefixes, attributes.values()):
+            if prefix is None:
+                ctx = value
+                continue
+            encode = _SCALAR_ENCODERS.get(type(value)) or _encode_value
+            encoded = encode(value)
+            if encoded is None:
+                return None
+            parts.append(prefix)
+            parts.append(encoded)
+
+        # Fields added by DatadogJSONFormatter.json_record, in the same order.
+        if not has_message:
+            parts += (', "message": ', encode_basestring_ascii(message))
+        parts += (
+            ', "tm.logger.library": "muselog", "timestamp": ', int.__repr__(int(record.created * 1000)),
+            ', "severity": ', _encode_value(record.levelname),
+            ', "logger.name": ', _encode_value(record.name),
+            ', "logger.method_name": ', _encode_value(record.funcName),
+            ', "logger.thread_name": ', _encode_value(record.threadName),
+        )
+        if formatter.trace_enabled:
+            try:
+                from opentelemetry import trace
+                current_span = trace.get_current_span()
+                if current_span is not None:
+                    trace_id = str(current_span.get_span_context().trace_id & 0xFFFFFFFFFFFFFFFF)
+                    span_id = str(current_span.get_span_context().span_id)
+                    parts += (', "dd.trace_id": ', encode_basestring_ascii(trace_id),
+                              ', "dd.span_id": ', encode_basestring_ascii(span_id))
+                else:
+                    parts.append(', "dd.trace_id": 0, "dd.span_id": 0')
+            except Exception:
+                return None
+        if None in parts:
+            return None
+
+        if ctx is not None:
+            # Only a spliced ctx goes last (see DatadogJSONFormatter.to_json).
+            if type(ctx) is not context.RecordContext or (formatter.max_ctx_items and len(ctx) > formatter.max_ctx_items):
+                return None
+            encoded_ctx = ctx.encoded(_encode)
+            if encoded_ctx is None:
+                return None
+            parts += (', "ctx": ', encoded_ctx)
+        parts.append("}")
+        encoded = "".join(parts)
+
+        # limit_json_record estimates each field at no more than its encoded size, plus 24 for
+        # each float, so a record this far within the budgets is never truncated.
+        fields = len(parts) // 2
+        field_budget = formatter.max_field_size or formatter.max_record_size
+        if field_budget and len(encoded) + 48 > field_budget:
+            return None
+        if formatter.max_record_size and len(encoded) + 64 + 24 * fields > formatter.max_record_size:
+            return None
+        return encoded
+
+    def _compile(self, keys: Tuple[str, ...]) -> Optional[Tuple[Tuple[Optional[str], ...], bool]]:
+        """Build the template for records with attributes `keys`.
+
+        :returns: `None` if such records must take the generic path. Otherwise, the text before
+                  each value (`None` for `ctx`), and whether `message` is among the attributes.
+        """
+        template: Optional[Tuple[Tuple[Optional[str], ...], bool]] = None
+        if all(key in _RECORD_FIELDS or key in _ACCESS_LOG_FIELDS or key.startswith(_ACCESS_LOG_PREFIXES) for key in keys):
+            prefixes: List[Optional[str]] = []
+            separator = "{"
+            for key in keys:
+                if key == "ctx":
+                    prefixes.append(None)
+                else:
+                    prefixes.append(separator + encode_basestring_ascii(key) + ": ")
+                    separator = ", "
+            template = (tuple(prefixes), "message" in keys)
+        if len(self._templates) < self.MAX_TEMPLATES:
+            self._templates[keys] = template
+        return template
+
+
+#: Batching handlers to start over in forked children. See :meth:`_BatchingHandler._after_fork_in_child`.
+_BATCHING_HANDLERS: "weakref.WeakSet[_BatchingHandler]" = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    for handler in list(_BATCHING_HANDLERS):
+        handler._after_fork_in_child()
+
+
+def _after_fork_in_parent() -> None:
+    for handler in list(_BATCHING_HANDLERS):
+        handler._after_fork_in_parent()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child, after_in_parent=_after_fork_in_parent)
+
+
+class _BatchingHandler(Handler):
+    """Base for handlers that send formatted records in batches, from a background thread.
+
+    Emitting only formats the record and appends it to a buffer of at most `max_buffer_size`
+    bytes; records that do not fit are dropped and counted in `dropped`. The writer thread
+    takes batches of up to `batch_size` records and `batch_bytes` bytes, waiting up to
+    `linger` seconds for a batch to fill, and hands them to :meth:`_send`. A batch that
+    could not be sent is put back, and sent again after a backoff set by :meth:`_schedule_retry`.
+
+    A forked child (e.g., a worker of a prefork server) starts over with an empty buffer,
+    its own connection, and its own writer thread; records buffered before the fork are
+    left to the parent.
+    """
+
+    def __init__(self,
+                 max_buffer_size: int,
+                 batch_size: Optional[int],
+                 batch_bytes: int,
+                 linger: float,
+                 backoff_base: float,
+                 backoff_max: float,
+                 timeout: float,
+                 thread_name: str):
+        super().__init__()
+        self.max_buffer_size = max_buffer_size
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.linger = linger
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        #: Records dropped because the buffer was full, or because they could not be sent.
+        self.dropped = 0
+        self.setFormatter(DatadogJSONFormatter())
+
+        self._pending: Deque[bytes] = deque()
+        self._pending_size = 0
+        self._in_flight = 0
+        self._flushes = 0
+        self._closing = False
+        self._close_deadline = 0.0
+        self._cond = threading.Condition(threading.Lock())
+        self._failures = 0
+        self._retry_at = 0.0
+        self._writer = threading.Thread(target=self._write, name=thread_name, daemon=True)
+        self._writer.start()
+        _BATCHING_HANDLERS.add(self)
+
+    def emit(self, record: LogRecord) -> None:
+        """Format `record` and add it to the send buffer, or drop it if the buffer is full."""
+        try:
+            data = self._encode(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._cond:
+            if self._closing or self._pending_size + len(data) > self.max_buffer_size:
+                self.dropped += 1
+                return
+            was_empty = not self._pending
+            self._pending.append(data)
+            self._pending_size += len(data)
+            # Wake the writer for a new batch, or once a batch is full; not for every record.
+            if was_empty or self._batch_full():
+                self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Wait, up to `timeout` seconds, until everything emitted so far has been sent."""
+        with self._cond:
+            # Waiting flushes cut the linger short.
+            self._flushes += 1
+            self._cond.notify_all()
+            try:
+                self._cond.wait_for(lambda: not self._pending and not self._in_flight, self.timeout)
+            finally:
+                self._flushes -= 1
+
+    def close(self) -> None:
+        """Send what remains in the buffer, within `timeout` seconds, and stop."""
+        with self._cond:
+            self._closing = True
+            self._close_deadline = time.monotonic() + self.timeout
+            self._cond.notify_all()
+        self._writer.join(self.timeout)
+        super().close()
+
+    def pressure(self) -> float:
+        """Return how full the buffer is, from 0 to 1. See :class:`muselog.shedding.LoadShedFilter`."""
+        return min(self._pending_size / self.max_buffer_size, 1.0)
+
+    def _encode(self, record: LogRecord) -> bytes:
+        return self.format(record).encode("utf-8")
+
+    def _send(self, batch: List[bytes]) -> bool:
+        """Send `batch`. Return whether it is done with, or, after scheduling a retry, `False`."""
+        raise NotImplementedError
+
+    def _disconnect(self) -> None:
+        pass
+
+    def _idle_timeout(self) -> Optional[float]:
+        """Return how long the writer may wait for records before calling :meth:`_idle`, or `None` for ever."""
+        return None
+
+    def _idle(self) -> None:
+        pass
+
+    def _after_fork_in_child(self) -> None:
+        """Drop what was inherited from the parent: its buffer, lock, connection and (dead) writer thread."""
+        self._cond = threading.Condition(threading.Lock())
+        self._pending.clear()
+        self._pending_size = 0
+        self._in_flight = 0
+        self._flushes = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        # Closes only the child's copy of the connection; the parent keeps using its own.
+        self._disconnect()
+        if not self._closing:
+            self._writer = threading.Thread(target=self._write, name=self._writer.name, daemon=True)
+            self._writer.start()
+
+    def _after_fork_in_parent(self) -> None:
+        pass
+
+    def _batch_full(self) -> bool:
+        return (self._pending_size >= self.batch_bytes
+                or (self.batch_size is not None and len(self._pending) >= self.batch_size))
+
+    def _write(self) -> None:
+        while True:
+            with self._cond:
+                ready = self._cond.wait_for(lambda: self._pending or self._closing, self._idle_timeout())
+            if not ready:
+                self._idle()
+                continue
+            with self._cond:
+                if not self._pending:
+                    break
+                while time.monotonic() < self._retry_at and self._pending:
+                    if self._closing and self._retry_at >= self._close_deadline:
+                        # No time left to retry at shutdown.
+                        self.dropped += len(self._pending)
+                        self._pending.clear()
+                        self._pending_size = 0
+                        break
+                    self._cond.wait(self._retry_at - time.monotonic())
+                if not self._pending:
+                    continue
+                self._cond.wait_for(lambda: self._batch_full() or self._closing or self._flushes, self.linger)
+                batch = self._take_batch()
+
+            sent = self._send(batch)
+
+            with self._cond:
+                self._in_flight = 0
+                if sent:
+                    self._failures = 0
+                else:
+                    self._pending.extendleft(reversed(batch))
+                    self._pending_size += sum(len(data) for data in batch)
+                self._cond.notify_all()
+        self._disconnect()
+
+    def _take_batch(self) -> List[bytes]:
+        """Remove a batch (of at least one record) from the buffer. Requires the lock."""
+        batch = [self._pending.popleft()]
+        size = len(batch[0])
+        while (self._pending and size + len(self._pending[0]) <= self.batch_bytes
+               and (self.batch_size is None or len(batch) < self.batch_size)):
+            data = self._pending.popleft()
+            batch.append(data)
+            size += len(data)
+        self._pending_size -= size
+        self._in_flight = len(batch)
+        return batch
+
+    def _schedule_retry(self, delay: Optional[float] = None) -> None:
+        """Hold off the next send by `delay` seconds, or by an exponential, jittered backoff."""
+        self._failures += 1
+        if delay is None:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+            # Jitter keeps many processes from retrying against a recovering service in lockstep.
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        self._retry_at = time.monotonic() + delay
+
+    def _drop(self, count: int) -> None:
+        with self._cond:
+            self.dropped += count
+
+
+class DataDogTcpHandler(_BatchingHandler):
+    """Handler that writes newline-delimited JSON to the Datadog agent over one long-lived TCP connection.
+
+    Emitting only formats the record and appends it to a buffer of at most `max_buffer_size`
+    bytes; records that do not fit are dropped and counted in `dropped`. A background thread
+    writes the buffer in batches of up to `batch_size` bytes through a non-blocking socket.
+    If the connection fails, it reconnects with exponential backoff and jitter, counting
+    successful reconnections in `reconnects`, and resends the batch that failed. Records
+    are thus delivered at least once while the buffer has room.
+
+    Records are formatted with :class:`DatadogJSONFormatter` unless another formatter is set.
+    With a :class:`muselog.wire.MsgpackFormatter`, length-prefixed MessagePack frames are
+    written instead of lines, for local agents and sidecars that read them.
+    """
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 max_buffer_size: int = 4 * 1024 * 1024,
+                 batch_size: int = 64 * 1024,
+                 linger: float = 0.05,
+                 backoff_base: float = 0.1,
+                 backoff_max: float = 30.0,
+                 timeout: float = 5.0):
+        """Create the handler and start its writer thread.
+
+        :param host:            Datadog agent TCP input host
+        :param port:            Datadog agent TCP input port
+        :param max_buffer_size: Bytes of formatted records to hold while they wait to be sent.
+        :param batch_size:      Bytes to send at once, at most.
+        :param linger:          Seconds to wait for a batch to fill before sending it anyway.
+        :param backoff_base:    Seconds to wait before the first reconnection attempt; doubles after each failure.
+        :param backoff_max:     Longest wait between reconnection attempts, in seconds.
+        :param timeout:         Seconds allowed to connect, to send a batch, and to flush at shutdown.
+        """
+        self.host = host
+        self.port = port
+        #: Connections re-established after a failure.
+        self.reconnects = 0
+        self._sock: Optional[socket.socket] = None
+        self._connected_once = False
+        super().__init__(max_buffer_size, None, batch_size, linger, backoff_base, backoff_max, timeout,
+                         "muselog-datadog-tcp")
+
+    def _encode(self, record: LogRecord) -> bytes:
+        encode_frame = getattr(self.formatter, "encode_frame", None)
+        if encode_frame is not None:
+            return encode_frame(record)
+        return (self.format(record) + "\n").encode("utf-8")
+
+    def _send(self, batch: List[bytes]) -> bool:
+        if self._sock is not None and self._peer_closed():
+            self._disconnect()
+        if self._sock is None and not self._connect():
+            return False
+
+        view = memoryview(b"".join(batch))
+        deadline = time.monotonic() + self.timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._sock, selectors.EVENT_WRITE)
+            while view:
+                try:
+                    view = view[self._sock.send(view):]
+                except BlockingIOError:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not selector.select(remaining):
+                        break
+                except OSError:
+                    break
+        if view:
+            self._disconnect()
+            self._schedule_retry()
+            return False
+        return True
+
+    def _peer_closed(self) -> bool:
+        """Return whether the agent closed the connection (the socket is readable, at end of stream)."""
+        try:
+            return self._sock.recv(4096) == b""
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+
+    def _connect(self) -> bool:
+        try:
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+        except OSError:
+            self._schedule_retry()
+            return False
+        sock.setblocking(False)
+        self._sock = sock
+        if self._connected_once:
+            self.reconnects += 1
+        self._connected_once = True
+        return True
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+class DataDogHttpHandler(_BatchingHandler):
+    """Handler that posts batches of records, as gzip-compressed JSON arrays, to an HTTP log intake.
+
+    Batches hold up to `batch_size` records and `batch_bytes` bytes of uncompressed JSON,
+    and are sent by a background thread over one keep-alive connection. Responses of 429
+    or 5xx, and connection errors, are retried up to `max_retries` times, with exponential
+    backoff and jitter (or after `Retry-After` seconds, if given), and counted in `retries`.
+    Batches rejected otherwise, or retried too often, are dropped and counted in `dropped`,
+    as are records that do not fit the buffer. At shutdown, sending stops after `timeout` seconds.
+
+    Records are formatted with :class:`DatadogJSONFormatter` unless another formatter is set.
+    """
+
+    def __init__(self,
+                 url: str,
+                 api_key: Optional[str] = None,
+                 batch_size: int = 1000,
+                 batch_bytes: int = 4 * 1024 * 1024,
+                 linger: float = 1.0,
+                 max_buffer_size: int = 16 * 1024 * 1024,
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 timeout: float = 5.0,
+                 compresslevel: int = 6):
+        """Create the handler and start its writer thread.
+
+        :param url:             Intake URL, e.g. `https://http-intake.logs.datadoghq.com/api/v2/logs`
+        :param api_key:         Sent in the `DD-API-KEY` header. (Default: `DD_API_KEY`, if set)
+        :param batch_size:      Records per request, at most.
+        :param batch_bytes:     Bytes of uncompressed JSON per request, at most.
+        :param linger:          Seconds to wait for a batch to fill before sending it anyway.
+        :param max_buffer_size: Bytes of formatted records to hold while they wait to be sent.
+        :param max_retries:     Attempts to resend a batch before dropping it.
+        :param backoff_base:    Seconds to wait before the first retry; doubles after each failure.
+        :param backoff_max:     Longest wait between retries, in seconds.
+        :param timeout:         Seconds allowed for each request, and to flush at shutdown.
+        :param compresslevel:   gzip compression level, from 1 (fastest) to 9 (smallest).
+        """
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.path = parts.path + (f"?{parts.query}" if parts.query else "")
+        self.max_retries = max_retries
+        self.compresslevel = compresslevel
+        #: Requests retried after a 429, a 5xx, or a connection error.
+        self.retries = 0
+        self.headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        api_key = api_key or os.environ.get("DD_API_KEY")
+        if api_key:
+            self.headers["DD-API-KEY"] = api_key
+        self._connection: Optional[http.client.HTTPConnection] = None
+        super().__init__(max_buffer_size, batch_size, batch_bytes, linger, backoff_base, backoff_max, timeout,
+                         "muselog-datadog-http")
+
+    def _send(self, batch: List[bytes]) -> bool:
+        body = gzip.compress(b"[" + b",".join(batch) + b"]", self.compresslevel)
+        retry_after = None
+        try:
+            if self._connection is None:
+                connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+                self._connection = connection_class(self.netloc, timeout=self.timeout)
+            self._connection.request("POST", self.path, body=body, headers=self.headers)
+            response = self._connection.getresponse()
+            # Read the whole response, so that the connection can be reused.
+            response.read()
+            status = response.status
+            retry_after = response.getheader("Retry-After")
+            if response.will_close:
+                self._disconnect()
+        except (OSError, http.client.HTTPException):
+            self._disconnect()
+            status = None
+
+        if status is not None and status < 300:
+            return True
+        if status is not None and status != 429 and status < 500:
+            # Retrying would not help.
+            self._drop(len(batch))
+            return True
+        if self._failures >= self.max_retries:
+            self._drop(len(batch))
+            self._failures = 0
+            return True
+        self.retries += 1
+        self._schedule_retry(min(float(retry_after), self.backoff_max)
+                             if retry_after and retry_after.isdigit() else None)
+        return False
+
+    def _disconnect(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
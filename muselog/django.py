@@ -1,7 +1,6 @@
 """Helpers to log requests processed within the Django web framework."""
 
-import time
-from typing import Any, Callable, Mapping, Optional, Union
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Mapping, Optional, Union
 
 from django.http import HttpRequest, HttpResponse
 
@@ -18,6 +17,72 @@ def _extract_header(meta: Mapping[str, Any]) -> Callable[[str], Any]:
     return _get
 
 
+class _ByteCounter:
+    """Counts the bytes of streaming content passing through it.
+
+    Calls `on_done` with the byte count once, when the content is exhausted or closed,
+    whichever comes first. Django closes it along with the response.
+    """
+
+    def __init__(self, timer: util.RequestTimer, on_done: Callable[[int], None]) -> None:
+        self._timer = timer
+        self._on_done: Optional[Callable[[int], None]] = on_done
+        self.bytes_written = 0
+
+    def _count(self, chunk: bytes) -> bytes:
+        if chunk:
+            self._timer.first_byte()
+            self.bytes_written += len(chunk)
+        return chunk
+
+    def close(self) -> None:
+        if self._on_done is not None:
+            on_done, self._on_done = self._on_done, None
+            on_done(self.bytes_written)
+
+
+class _CountingStreamingContent(_ByteCounter):
+    """Streaming content of a synchronous response, counted."""
+
+    def __init__(self, content: Iterable[bytes], timer: util.RequestTimer, on_done: Callable[[int], None]) -> None:
+        super().__init__(timer, on_done)
+        self._iterator = iter(content)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            chunk = next(self._iterator)
+        except StopIteration:
+            self.close()
+            raise
+        return self._count(chunk)
+
+
+class _AsyncCountingStreamingContent(_ByteCounter):
+    """Streaming content of an asynchronous response (Django 4.2 and later, under ASGI), counted.
+
+    It must not be iterable synchronously too, or Django would take the response for a synchronous one.
+    """
+
+    def __init__(self, content: AsyncIterable[bytes], timer: util.RequestTimer,
+                 on_done: Callable[[int], None]) -> None:
+        super().__init__(timer, on_done)
+        self._iterator = content.__aiter__()
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            chunk = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self.close()
+            raise
+        return self._count(chunk)
+
+
 class MuseDjangoRequestLoggingMiddleware:
     """Middleware to log django request information.
 
@@ -43,7 +108,8 @@ class MuseDjangoRequestLoggingMiddleware:
         """Execute middleware logic and return the response.
 
         This middleware modifies the request in order to calculate its duration.
-        It does not modify the response.
+        It does not modify the response, except to wrap the content of streaming
+        responses, which are logged once their content has been sent.
 
         """
         self.process_request(request)
@@ -53,20 +119,50 @@ class MuseDjangoRequestLoggingMiddleware:
 
     def process_request(self, request: HttpRequest) -> None:
         """Add timing information to the request to calculate its duration."""
-        request.started_at = time.time()
+        request.muselog_timer = util.RequestTimer()
         meta = request.META
         extract_header = _extract_header(meta)
         util.init_context(extract_header)
+        request.muselog_timer.hooks_done()
 
     def process_response(self, request: HttpRequest, response: HttpResponse) -> None:
-        """Extract and log timing, network, http, and user attributes."""
+        """Extract and log timing, network, http, and user attributes.
+
+        Streaming responses are logged when their content is exhausted or closed,
+        so that their size and duration cover the whole stream.
+        """
+        timer = request.muselog_timer
+        timer.handler_done()
+        level = util.access_log_level(request.path, response.status_code)
+        if level is None:
+            context.unbind("request_id")
+            return
+
+        if response.streaming:
+            request_id = context.get("request_id")
+
+            def log_streamed(bytes_written: int) -> None:
+                # The stream is consumed after this middleware returns, possibly elsewhere.
+                with context.Context(request_id=request_id):
+                    self._log_request(request, response, level, bytes_written)
+
+            if getattr(response, "is_async", False):
+                counter = _AsyncCountingStreamingContent(response.streaming_content, timer, log_streamed)
+            else:
+                counter = _CountingStreamingContent(response.streaming_content, timer, log_streamed)
+            response.streaming_content = counter
+        else:
+            self._log_request(request, response, level, self._get_bytes_written(response))
+        context.unbind("request_id")
+
+    def _log_request(self, request: HttpRequest, response: HttpResponse, level: int, bytes_written: int) -> None:
         meta = request.META
         extract_header = _extract_header(meta)
         network_attrs = attributes.NetworkAttributes(
             extract_header=extract_header,
             remote_addr=meta.get("REMOTE_ADDR"),
             bytes_read=meta.get("CONTENT_LENGTH"),
-            bytes_written=self._get_bytes_written(response)
+            bytes_written=bytes_written
         )
         http_attrs = attributes.HttpAttributes(
             extract_header=extract_header,
@@ -75,13 +171,14 @@ class MuseDjangoRequestLoggingMiddleware:
             status_code=response.status_code
         )
         util.log_request(
-            request.get_full_path(),
-            time.time() - request.started_at,
+            request.path,
+            None,
             network_attrs,
             http_attrs,
-            user_id=self._get_user_id(request)
+            user_id=self._get_user_id(request),
+            level=level,
+            phases=request.muselog_timer.phases()
         )
-        context.unbind("request_id")
 
     @staticmethod
     def _get_user_id(request: HttpRequest) -> Optional[Union[str, int]]:
@@ -0,0 +1,85 @@
+"""Carry muselog context into thread pools, process pools, and `loop.run_in_executor`.
+
+Only the muselog context is captured, not the whole :mod:`contextvars` context. It is
+snapshotted when work is submitted and restored around the work in the worker, which
+is left as it was afterward.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from . import context
+from .snapshot import decode_snapshot, encode_snapshot
+
+T = TypeVar("T")
+
+
+def with_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """Return a callable that runs `fn` with the muselog context current at the time of this call.
+
+    For threads, e.g. `executor.submit(with_context(fn), arg)`.
+    """
+    ctx = context.copy()
+
+    @functools.wraps(fn)
+    def run(*args: Any, **kwargs: Any) -> T:
+        with context.restored(ctx):
+            return fn(*args, **kwargs)
+    return run
+
+
+class _ProcessTask:
+    """Picklable callable that runs `fn` with a serialized muselog context."""
+
+    __slots__ = ("fn", "ctx")
+
+    def __init__(self, fn: Callable[..., Any], ctx: Optional[bytes]) -> None:
+        self.fn = fn
+        self.ctx = ctx
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if self.ctx is None:
+            return self.fn(*args, **kwargs)
+        with context.restored(decode_snapshot(self.ctx)):
+            return self.fn(*args, **kwargs)
+
+
+def with_context_for_process(fn: Callable[..., T]) -> Callable[..., T]:
+    """Like :func:`with_context`, for work sent to another process.
+
+    `fn` must be picklable. The context is sent in the compact form used for record
+    snapshots (see :func:`muselog.snapshot.encode_snapshot`), so values that are not
+    primitives arrive as they would be rendered in JSON logs.
+    Works with :mod:`multiprocessing` pools too, e.g. `pool.map(with_context_for_process(fn), items)`.
+    """
+    ctx = context.copy()
+    return _ProcessTask(fn, encode_snapshot(ctx) if ctx else None)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks run with the muselog context of the code that submitted them."""
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+        """See :meth:`concurrent.futures.Executor.submit`."""
+        return super().submit(with_context(fn), *args, **kwargs)
+
+
+class ContextProcessPoolExecutor(ProcessPoolExecutor):
+    """Process pool whose tasks run with the muselog context of the code that submitted them."""
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+        """See :meth:`concurrent.futures.Executor.submit`."""
+        return super().submit(with_context_for_process(fn), *args, **kwargs)
+
+
+def run_in_executor(executor: Optional[Any], fn: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+    """Like `loop.run_in_executor`, on the running loop, carrying the muselog context to `fn`.
+
+    :param executor: Executor to use. (Default: the loop's default executor)
+    """
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        return loop.run_in_executor(executor, with_context_for_process(fn), *args)
+    return loop.run_in_executor(executor, with_context(fn), *args)
@@ -0,0 +1,300 @@
+"""Log file sink for processes that can use neither stdout nor the network (e.g., batch workers)."""
+
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from logging import LogRecord
+from typing import List, Optional
+
+from .datadog import _BatchingHandler
+
+#: Suffix of rotated segments: the UTC time of rotation, a counter if several share it, and `.gz` once compressed.
+_SEGMENT = re.compile(r"\.(\d{8}T\d{6})(?:-(\d+))?(\.gz)?$")
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class RotatingFileHandler(_BatchingHandler):
+    """Handler that appends formatted records to a file, in large writes, rotating it by size or time.
+
+    Emitting only formats the record and appends it to a buffer of at most `max_buffer_size`
+    bytes; records that do not fit are dropped and counted in `dropped`. A background thread
+    writes the buffer in batches of up to `batch_size` bytes, one write each, and calls
+    `fsync` at most once every `fsync_interval` seconds, and at most that long after a write.
+    Failed writes are undone and retried with exponential backoff.
+
+    Once the file would exceed `max_bytes`, or at each multiple of `rotate_interval` seconds
+    (UTC), it is renamed `<filename>.<YYYYmmddTHHMMSS>` and a new one started. Another thread
+    compresses rotated segments to `.gz` and removes all but the newest `backup_count`, so
+    neither logging nor writing waits on either.
+
+    An existing file is appended to, counting toward `max_bytes`; if it ends with a partial
+    line (e.g., after a crash), the next record starts on a new one. Segments a previous
+    process left uncompressed are compressed. Only one process may write to a file, along with
+    the processes forked from it once the handler was created: each child starts over with its
+    own buffer and threads, and all of them follow rotations made by the others.
+
+    Records are formatted with :class:`muselog.datadog.DatadogJSONFormatter` unless another
+    formatter is set, one per line.
+    """
+
+    def __init__(self,
+                 filename: str,
+                 max_bytes: int = 100 * 1024 * 1024,
+                 rotate_interval: Optional[float] = None,
+                 backup_count: int = 10,
+                 compress: bool = True,
+                 fsync_interval: Optional[float] = 1.0,
+                 max_buffer_size: int = 4 * 1024 * 1024,
+                 batch_size: int = 1024 * 1024,
+                 linger: float = 0.2,
+                 backoff_base: float = 0.1,
+                 backoff_max: float = 30.0,
+                 timeout: float = 5.0):
+        """Create the handler, open (or resume) the file, and start the writer and compression threads.
+
+        :param filename:        Path of the file to write.
+        :param max_bytes:       Size at which the file is rotated. 0 disables rotation by size.
+        :param rotate_interval: Seconds between rotations by time, aligned to UTC (e.g., 3600 for each hour).
+                                `None` disables rotation by time.
+        :param backup_count:    Rotated segments to keep. 0 keeps them all.
+        :param compress:        Whether to gzip rotated segments.
+        :param fsync_interval:  Least seconds between calls to `fsync` (0 for every write); the file is
+                                also synced at rotation and close. `None` leaves syncing to the system.
+        :param max_buffer_size: Bytes of formatted records to hold while they wait to be written.
+        :param batch_size:      Bytes to write at once, at most.
+        :param linger:          Seconds to wait for a batch to fill before writing it anyway.
+        :param backoff_base:    Seconds to wait before retrying a failed write; doubles after each failure.
+        :param backoff_max:     Longest wait between retries, in seconds.
+        :param timeout:         Seconds allowed to flush, and to finish compressing, at shutdown.
+        """
+        self.filename = os.path.abspath(filename)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.fsync_interval = fsync_interval
+        #: Files rotated since the handler was created.
+        self.rotations = 0
+        self._fd: Optional[int] = None
+        self._size = 0
+        self._partial_line = False
+        self._rollover_at = float("inf")
+        self._fsync_at = 0.0
+        self._unsynced = False
+        #: Whether forked processes share the file, and may have rotated it or grown it.
+        self._shared = False
+        self._segments: "queue.Queue[Optional[str]]" = queue.Queue()
+        # If the file cannot be opened yet, the writer tries again before each batch.
+        self._open()
+        for segment in self._existing_segments():
+            if not segment.endswith(".gz"):
+                self._segments.put(segment)
+        self._compressor = threading.Thread(target=self._archive, name="muselog-file-archive", daemon=True)
+        self._compressor.start()
+        super().__init__(max_buffer_size, None, batch_size, linger, backoff_base, backoff_max, timeout,
+                         "muselog-file")
+
+    def close(self) -> None:
+        """Write what remains in the buffer, within `timeout` seconds, then finish compressing and stop.
+
+        Segments still uncompressed when `timeout` runs out are compressed by the next handler
+        for the same file.
+        """
+        super().close()
+        self._segments.put(None)
+        self._compressor.join(self.timeout)
+
+    def _encode(self, record: LogRecord) -> bytes:
+        return (self.format(record) + "\n").encode("utf-8")
+
+    def _send(self, batch: List[bytes]) -> bool:
+        data = b"".join(batch)
+        if self._shared and self._fd is not None:
+            self._follow()
+        now = time.time()
+        if self._fd is not None and self._size and (
+                (self.max_bytes and self._size + len(data) > self.max_bytes) or now >= self._rollover_at):
+            self._rotate()
+        elif now >= self._rollover_at:
+            # Nothing was written in the interval that ended; the file carries on into the next.
+            self._rollover_at = self._next_rollover(now)
+        if self._fd is None and not self._open():
+            self._schedule_retry()
+            return False
+        if self._partial_line:
+            data = b"\n" + data
+        view = memoryview(data)
+        try:
+            while view:
+                view = view[os.write(self._fd, view):]
+        except OSError:
+            # Undo the partial write, so that the batch is written whole when retried.
+            try:
+                os.ftruncate(self._fd, self._size)
+            except OSError:
+                self._disconnect()
+            self._schedule_retry()
+            return False
+        self._size += len(data)
+        self._partial_line = False
+        self._unsynced = True
+        if self.fsync_interval is not None and time.monotonic() >= self._fsync_at:
+            self._sync()
+        return True
+
+    def _disconnect(self) -> None:
+        if self._fd is not None:
+            self._sync()
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _after_fork_in_child(self) -> None:
+        # Writes the parent has yet to sync are its own, as are the segments it has yet to compress.
+        self._unsynced = False
+        self._fsync_at = 0.0
+        self._shared = True
+        self._segments = queue.Queue()
+        if not self._closing:
+            self._compressor = threading.Thread(target=self._archive, name=self._compressor.name, daemon=True)
+            self._compressor.start()
+        super()._after_fork_in_child()
+
+    def _after_fork_in_parent(self) -> None:
+        self._shared = True
+
+    def _follow(self) -> None:
+        """Reopen the file if another process rotated it, or else take its size, which includes their writes."""
+        try:
+            written = os.fstat(self._fd)
+            current = os.stat(self.filename)
+        except OSError:
+            # Rotated, and not yet started again.
+            current = None
+        if current is None or (written.st_dev, written.st_ino) != (current.st_dev, current.st_ino):
+            self._disconnect()
+            # So that the new file is checked for rotation too. If it cannot be opened, it is retried below.
+            self._open()
+        else:
+            self._size = written.st_size
+
+    def _idle_timeout(self) -> Optional[float]:
+        # Written data is synced within `fsync_interval`, even if nothing else is logged.
+        if self._unsynced and self.fsync_interval is not None:
+            return max(self._fsync_at - time.monotonic(), 0.0)
+        return None
+
+    def _idle(self) -> None:
+        if self._fd is not None:
+            self._sync()
+
+    def _open(self) -> bool:
+        """Open the file for appending, picking up where it ends. Return whether it could be opened."""
+        try:
+            fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except OSError:
+            return False
+        try:
+            stat = os.fstat(fd)
+            partial_line = False
+            if stat.st_size:
+                with open(self.filename, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    partial_line = f.read(1) != b"\n"
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        self._size = stat.st_size
+        self._partial_line = partial_line
+        # A file resumed from an earlier interval is rotated before the first write.
+        self._rollover_at = self._next_rollover(min(stat.st_mtime, time.time()) if stat.st_size else time.time())
+        return True
+
+    def _next_rollover(self, after: float) -> float:
+        if not self.rotate_interval:
+            return float("inf")
+        return (after // self.rotate_interval + 1) * self.rotate_interval
+
+    def _rotate(self) -> None:
+        self._disconnect()
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        segment = f"{self.filename}.{stamp}"
+        counter = 0
+        while os.path.exists(segment) or os.path.exists(segment + ".gz"):
+            counter += 1
+            segment = f"{self.filename}.{stamp}-{counter}"
+        try:
+            os.rename(self.filename, segment)
+        except OSError:
+            # Keep appending to the current file; rotation is tried again with the next batch.
+            return
+        self.rotations += 1
+        self._segments.put(segment)
+
+    def _sync(self) -> None:
+        if self._unsynced and self.fsync_interval is not None:
+            try:
+                os.fsync(self._fd)
+            except OSError:
+                # Tried again with the next write.
+                return
+            self._unsynced = False
+            self._fsync_at = time.monotonic() + self.fsync_interval
+
+    def _archive(self) -> None:
+        """Compress rotated segments, and remove old ones, as they come."""
+        while True:
+            segment = self._segments.get()
+            if segment is None:
+                break
+            if self.compress:
+                self._compress(segment)
+            self._prune()
+
+    def _compress(self, segment: str) -> None:
+        temporary = segment + ".gz.tmp"
+        try:
+            with open(segment, "rb") as source, gzip.open(temporary, "wb") as target:
+                shutil.copyfileobj(source, target, _CHUNK_SIZE)
+            os.replace(temporary, segment + ".gz")
+            os.unlink(segment)
+        except OSError:
+            # Left uncompressed; the next handler for this file tries again.
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+
+    def _prune(self) -> None:
+        if not self.backup_count:
+            return
+        segments = self._existing_segments()
+        for segment in segments[:-self.backup_count]:
+            try:
+                os.unlink(segment)
+            except OSError:
+                pass
+
+    def _existing_segments(self) -> List[str]:
+        """Return the paths of rotated segments, oldest first."""
+        directory, base = os.path.split(self.filename)
+        segments = []
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return segments
+        for name in names:
+            if name.startswith(base):
+                match = _SEGMENT.fullmatch(name[len(base):])
+                if match is not None:
+                    stamp, counter, _ = match.groups()
+                    segments.append(((stamp, int(counter or 0)), os.path.join(directory, name)))
+        return [path for _, path in sorted(segments)]
@@ -0,0 +1,105 @@
+"""Identify repeated exceptions without rendering their tracebacks."""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from types import TracebackType
+from typing import Callable, Optional, Type
+
+#: Maximum number of frames, per exception in a chain, that contribute to a fingerprint.
+MAX_FRAMES = 64
+
+#: Maximum number of chained exceptions (`__cause__` / `__context__`) that contribute to a fingerprint.
+MAX_CHAIN = 8
+
+
+def fingerprint(
+    exc_type: Type[BaseException],
+    exc_value: Optional[BaseException],
+    exc_traceback: Optional[TracebackType]
+) -> str:
+    """Return a short, stable identifier for an exception.
+
+    The identifier is derived from the exception type and the code location
+    (file, function, and line) of each traceback frame, including those of chained
+    exceptions. The traceback is never formatted to text, so this is much cheaper
+    than comparing rendered stacks.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    seen = set()
+    links = 0
+    while exc_type is not None and links < MAX_CHAIN:
+        digest.update(f"{exc_type.__module__}.{exc_type.__qualname__}|".encode())
+        tb = exc_traceback
+        frames = 0
+        while tb is not None and frames < MAX_FRAMES:
+            code = tb.tb_frame.f_code
+            digest.update(f"{code.co_filename}:{code.co_name}:{tb.tb_lineno}|".encode())
+            tb = tb.tb_next
+            frames += 1
+
+        if exc_value is None:
+            break
+        seen.add(id(exc_value))
+        if exc_value.__cause__ is not None:
+            exc_value = exc_value.__cause__
+        elif exc_value.__context__ is not None and not exc_value.__suppress_context__:
+            exc_value = exc_value.__context__
+        else:
+            break
+        if id(exc_value) in seen:
+            break
+        exc_type, exc_traceback = type(exc_value), exc_value.__traceback__
+        links += 1
+        digest.update(b"<-")
+    return digest.hexdigest()
+
+
+class RepeatSuppressor:
+    """Count occurrences of keys within a sliding time window.
+
+    The first occurrence of a key opens a window of `window` seconds; later
+    occurrences inside that window are repeats. Memory is bounded by evicting
+    the least recently seen key once `max_entries` keys are tracked.
+    """
+
+    def __init__(self,
+                 window: float,
+                 max_entries: int = 1024,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Create the suppressor.
+
+        :param window:      Length, in seconds, of the window opened by the first occurrence of a key.
+        :param max_entries: Maximum number of keys tracked at once.
+        :param clock:       Monotonic clock returning seconds.
+        """
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["RepeatSuppressor"]:
+        """Create a suppressor from `DATADOG_ERROR_REPEAT_WINDOW`, or return `None` if it is unset or 0."""
+        window = float(os.environ.get("DATADOG_ERROR_REPEAT_WINDOW", 0))
+        return cls(window) if window > 0 else None
+
+    def hit(self, key: str) -> int:
+        """Record an occurrence of `key` and return its running count within the current window.
+
+        A return value of 1 means this is the first occurrence in a new window.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                entry = [now, 0]
+                self._entries[key] = entry
+            entry[1] += 1
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry[1]
@@ -1,21 +1,33 @@
 """Middleware that flask applications use to enable datadog-compatible request logging."""
 
-import time
 from typing import Optional
 
-from flask import g, request, Flask
+from flask import current_app, g, request, Flask
 from flask.ctx import has_request_context
 from flask.wrappers import Response
 
-from . import attributes, util
+from . import attributes, routes, util
 
 
 def _start_request() -> None:
-    g.start = time.time()
+    g.muselog_timer = util.RequestTimer()
     util.init_context(request.headers.get)
+    g.muselog_timer.hooks_done()
 
 
 def _log_request(response: Optional[Response] = None) -> None:
+    timer = g.muselog_timer
+    if response is not None:
+        # After-request hooks run once the view has returned its response.
+        timer.handler_done()
+    level = util.access_log_level(
+        request.path,
+        response.status_code if response else 500,
+        current_app.extensions.get("muselog.route_policy")
+    )
+    if level is None:
+        return response
+
     network_attrs = attributes.NetworkAttributes(
         extract_header=request.headers.get,
         remote_addr=request.remote_addr,
@@ -28,7 +40,7 @@ def _log_request(response: Optional[Response] = None) -> None:
         method=request.method,
         status_code=response.status_code if response else 500
     )
-    util.log_request(request.full_path, time.time() - g.start, network_attrs, http_attrs)
+    util.log_request(request.path, None, network_attrs, http_attrs, level=level, phases=timer.phases())
 
     return response
 
@@ -57,7 +69,7 @@ def _handle_exception(_exception: Exception) -> None:
     _log_request()
 
 
-def register_muselog_request_hooks(app: Flask) -> None:
+def register_muselog_request_hooks(app: Flask, route_policy: Optional[routes.RoutePolicy] = None) -> None:
     """Hookup muselog to flask's request lifecycle.
 
     Call immediately after instantiating the Flask application object. For example,
@@ -66,7 +78,10 @@ def register_muselog_request_hooks(app: Flask) -> None:
     muselog.flask.register_muselog_request_hooks(app)
     ...
     ```
+
+    :param route_policy: Per-route access log policy. (Default: :func:`muselog.routes.get_policy`)
     """
+    app.extensions["muselog.route_policy"] = route_policy
     app.before_request(_start_request)
     app.after_request(_log_request)
     app.teardown_request(_handle_exception)
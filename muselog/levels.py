@@ -0,0 +1,154 @@
+"""Change log levels at runtime, from a watched file or on SIGHUP."""
+
+import logging
+import os
+import signal
+import threading
+from typing import Dict, Mapping, Optional, Set, Tuple, Union
+
+LOGGER = logging.getLogger(__name__)
+
+#: Name used for the root logger in level files (`logging.getLogger("root")` is the root logger).
+ROOT = "root"
+
+#: Loggers whose levels were set by the last call to :func:`apply_log_levels`.
+_APPLIED: Set[str] = set()
+
+
+def parse_log_levels(text: str) -> Dict[str, int]:
+    """Parse a level file into a mapping of logger names to levels.
+
+    Each non-blank line has the form `logger=LEVEL`, the same format as
+    `muselog-run --module-log-level`. Use `root` for the root logger. Lines starting
+    with `#` are ignored. Raises `ValueError` if any line is malformed.
+    """
+    levels = dict()
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, sep, level = line.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if not sep or not name or not level:
+            raise ValueError(f"line {lineno}: expected logger=LEVEL, got {line!r}")
+        numeric_level = logging.getLevelName(level)
+        if not isinstance(numeric_level, int):
+            raise ValueError(f"line {lineno}: unknown log level {level!r}")
+        levels[name] = numeric_level
+    return levels
+
+
+def apply_log_levels(levels: Mapping[str, Union[str, int]]) -> None:
+    """Set the levels of many loggers at once.
+
+    Levels are changed while holding logging's module lock, which is also needed to
+    populate each logger's level cache, and caches are cleared before releasing it.
+    Other threads thus see either all of the old levels or all of the new ones.
+    Loggers set by the previous call but absent from `levels` revert to `NOTSET`.
+
+    :param levels: Mapping of logger names to levels. Use `root` for the root logger.
+    """
+    resolved: Dict[str, Tuple[logging.Logger, int]] = dict()
+    for name, level in levels.items():
+        logger = logging.getLogger(None if name == ROOT else name)
+        resolved[name] = (logger, logging._checkLevel(level))
+
+    with logging._lock:
+        for name in _APPLIED - resolved.keys():
+            if name != ROOT:
+                logging.getLogger(name).level = logging.NOTSET
+        for logger, level in resolved.values():
+            logger.level = level
+        logging.Logger.manager._clear_cache()
+        _APPLIED.clear()
+        _APPLIED.update(resolved.keys())
+
+
+class LevelReloader:
+    """Reload log levels from a file whenever it changes, or on SIGHUP.
+
+    A background thread checks the file's modification time every `interval` seconds,
+    so logging calls themselves pay nothing. Levels from the file are layered on top of
+    `base_levels`, so removing a line from the file restores the level set at startup.
+    A file that fails to parse is reported and ignored.
+    """
+
+    def __init__(self,
+                 path: str,
+                 base_levels: Optional[Mapping[str, Union[str, int]]] = None,
+                 interval: float = 5.0) -> None:
+        """Create the reloader. Call :meth:`start` to begin watching.
+
+        :param path:        Path of the level file. See :func:`parse_log_levels` for its format.
+        :param base_levels: Levels to apply underneath those in the file.
+        :param interval:    Seconds between checks of the file.
+        """
+        self.path = path
+        self.base_levels = dict(base_levels or {})
+        self.interval = interval
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._previous_sighup = None
+
+    def start(self, handle_sighup: bool = True) -> "LevelReloader":
+        """Apply the file now, and start watching it.
+
+        :param handle_sighup: Also reload when the process receives SIGHUP. Only possible
+                              from the main thread, on platforms with SIGHUP.
+        """
+        self.check()
+        if (handle_sighup and hasattr(signal, "SIGHUP")
+                and threading.current_thread() is threading.main_thread()):
+            self._previous_sighup = signal.signal(signal.SIGHUP, self._on_sighup)
+        self._thread = threading.Thread(target=self._run, name="muselog-level-reloader", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop watching. Levels stay as they are."""
+        self._stopped.set()
+        self._wake.set()
+        if self._previous_sighup is not None:
+            signal.signal(signal.SIGHUP, self._previous_sighup)
+            self._previous_sighup = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check. Return whether levels were applied."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stat == self._stat:
+            return False
+        self._stat = stat
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Read the file and apply its levels. Return whether levels were applied."""
+        try:
+            with open(self.path) as f:
+                file_levels = parse_log_levels(f.read())
+        except (OSError, ValueError) as e:
+            LOGGER.error("Could not reload log levels from %s: %s", self.path, e)
+            return False
+        apply_log_levels({**self.base_levels, **file_levels})
+        LOGGER.warning("Reloaded log levels from %s.", self.path)
+        return True
+
+    def _on_sighup(self, signum, frame) -> None:
+        # Only wake the reloader thread; never take logging locks in a signal handler.
+        self._stat = None
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self.check()
@@ -20,32 +20,27 @@ class LoggerAdapter(logging.LoggerAdapter):
 
     def process(self, msg: str, kwargs: Mapping[str, Any]) -> Tuple[str, Dict[str, Any]]:
         """Process log message."""
-        ctx = context.copy()
-
         extra = self._copy_dict_none_to_empty(self.extra)
         passed_extra = self._copy_dict_none_to_empty(kwargs.get("extra"))
 
-        # Merge contexts, removing them from their respective extras so that we can merge extras.
-        extra_ctx = self._copy_dict_none_to_empty(extra.pop("ctx", None))
-        passed_extra_ctx = self._copy_dict_none_to_empty(passed_extra.pop("ctx", None))
-        extra_ctx.update(passed_extra_ctx)
-        ctx.update(extra_ctx)
+        # Bound context (the context-local context, then this logger's) is kept apart from
+        # the call's own, so that formatters can reuse its encoding. See context.RecordContext.
+        sources = [context.bound()]
+        extra_ctx = extra.pop("ctx", None)
+        if extra_ctx:
+            sources.append(extra_ctx if isinstance(extra_ctx, context.BoundContext) else context.BoundContext(extra_ctx))
+        call_ctx = self._copy_dict_none_to_empty(passed_extra.pop("ctx", None))
 
         # Merge extras
         extra.update(passed_extra)
 
-        # Place keyword args (other than the four reserved kwargs) into extra["ctx"]
-        for k, v in kwargs.items():
-            if k in RESERVED_KWARGS:
-                continue
-            ctx[k] = v
-
-        # Remove kwargs that we already have in the context (make sure not to remove reserved kwargs)
-        for k, _ in ctx.items():
-            if k in kwargs and k not in RESERVED_KWARGS:
-                del kwargs[k]
+        # Place keyword args (other than the four reserved kwargs) into extra["ctx"],
+        # removing them from kwargs.
+        for k in [k for k in kwargs if k not in RESERVED_KWARGS]:
+            call_ctx[k] = kwargs.pop(k)
 
         # Add context
+        ctx = context.record_context(tuple(sources), call_ctx)
         if ctx:
             extra["ctx"] = ctx
 
@@ -58,7 +53,7 @@ class LoggerAdapter(logging.LoggerAdapter):
     def bind(self, **new_ctx) -> "LoggerAdapter":
         """Create a copy of the logger with provided context merged into existing context."""
         extra = self._copy_dict_none_to_empty(self.extra)
-        ctx = self._copy_dict_none_to_empty(extra.get("ctx"))
+        ctx = context.BoundContext(self._copy_dict_none_to_empty(extra.get("ctx")))
         ctx.update(new_ctx)
         extra["ctx"] = ctx
         return LoggerAdapter(self.logger, extra)
@@ -67,7 +62,7 @@ class LoggerAdapter(logging.LoggerAdapter):
         """Create a copy of the logger with provided context keys removed from existing context."""
         extra = self._copy_dict_none_to_empty(self.extra)
         ctx = self._copy_dict_none_to_empty(extra.get("ctx"))
-        extra["ctx"] = {k: v for k, v in ctx.items() if k not in keys}
+        extra["ctx"] = context.BoundContext((k, v) for k, v in ctx.items() if k not in keys)
         return LoggerAdapter(self.logger, extra)
 
     def new(self, **ctx) -> "LoggerAdapter":
@@ -84,4 +79,4 @@ class LoggerAdapter(logging.LoggerAdapter):
 
 def get_logger_with_context(logger: logging.Logger, **ctx) -> LoggerAdapter:
     """Get a logger that always adds `ctx` to its log records."""
-    return LoggerAdapter(logger, dict(ctx=ctx))
+    return LoggerAdapter(logger, dict(ctx=context.BoundContext(ctx)))
@@ -0,0 +1,153 @@
+"""Log handler that formats records in a pool of worker processes."""
+
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, List, Optional, TextIO, Union
+
+from .snapshot import decode_snapshot, encode_snapshot, restore_record, snapshot_record
+
+#: Formatter used by the current worker process. Set by :func:`_init_worker`.
+_WORKER_FORMATTER: Optional[logging.Formatter] = None
+
+
+def _default_formatter() -> logging.Formatter:
+    from .datadog import DatadogJSONFormatter
+    # Trace ids are captured when records are snapshotted; workers have no spans.
+    return DatadogJSONFormatter(trace_enabled=False)
+
+
+def _init_worker(formatter_factory: Callable[[], logging.Formatter]) -> None:
+    global _WORKER_FORMATTER
+    _WORKER_FORMATTER = formatter_factory()
+
+
+def _format_batch(batch: List[bytes], terminator: str) -> str:
+    lines = []
+    for data in batch:
+        lines.append(_WORKER_FORMATTER.format(restore_record(decode_snapshot(data))))
+        lines.append(terminator)
+    return "".join(lines)
+
+
+class ProcessPoolHandler(logging.StreamHandler):
+    """Stream handler that formats records in worker processes, off of the emitting thread's GIL.
+
+    At emit time, a record is reduced to a compact snapshot (see :mod:`muselog.snapshot`),
+    which includes its rendered message, ctx, exception text, and, if `trace_enabled`,
+    trace ids. Snapshots are batched and formatted by a pool of `workers` processes,
+    each with its own formatter built by `formatter_factory`. Formatted batches are
+    written to the stream in the order they were submitted, so records from any
+    given thread keep their order.
+
+    A batch is submitted once it holds `batch_size` records, or after `linger` seconds.
+    """
+
+    def __init__(self,
+                 stream: Optional[TextIO] = None,
+                 workers: int = 2,
+                 formatter_factory: Callable[[], logging.Formatter] = _default_formatter,
+                 trace_enabled: bool = False,
+                 batch_size: int = 256,
+                 linger: float = 0.05) -> None:
+        """Create the handler and start its worker processes.
+
+        :param stream:            Stream to write to. (Default: `sys.stderr`, like :class:`logging.StreamHandler`)
+        :param workers:           Number of worker processes.
+        :param formatter_factory: Picklable callable (e.g., a module-level function or class) that
+                                  builds the formatter in each worker. (Default: Datadog JSON formatter)
+        :param trace_enabled:     Capture trace and span ids when records are emitted.
+        :param batch_size:        Records per batch sent to a worker.
+        :param linger:            Seconds to wait for a batch to fill before submitting it anyway.
+        """
+        super().__init__(stream)
+        self.trace_enabled = trace_enabled
+        self.batch_size = batch_size
+        self.linger = linger
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(formatter_factory,),
+        )
+        self._batch: List[bytes] = []
+        self._batch_lock = threading.Lock()
+        #: Pool futures of formatted batches, in submission order, and flush markers.
+        self._submitted: "queue.Queue[Union[Future, threading.Event, None]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_results, name="muselog-pool-writer", daemon=True)
+        self._writer.start()
+        self._closed = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Snapshot `record` and add it to the current batch. Records emitted once the handler is closed are dropped."""
+        try:
+            data = encode_snapshot(snapshot_record(record, self.trace_enabled))
+            with self._batch_lock:
+                if self._closed:
+                    # E.g., a thread still logging during logging.shutdown; the pool is gone.
+                    return
+                self._batch.append(data)
+                if len(self._batch) >= self.batch_size:
+                    self._submit_batch()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Submit the current batch and wait until everything emitted so far is written."""
+        if self._closed:
+            return
+        with self._batch_lock:
+            self._submit_batch()
+        written = threading.Event()
+        self._submitted.put(written)
+        written.wait()
+
+    def close(self) -> None:
+        """Write out everything emitted so far and stop the worker processes."""
+        if not self._closed:
+            self.flush()
+            with self._batch_lock:
+                self._closed = True
+                # Records emitted since the flush.
+                self._submit_batch()
+            self._submitted.put(None)
+            self._writer.join()
+            self._pool.shutdown()
+        super().close()
+
+    def _submit_batch(self) -> None:
+        """Submit the current batch to the pool. Requires the batch lock."""
+        if self._batch:
+            self._submitted.put(self._pool.submit(_format_batch, self._batch, self.terminator))
+            self._batch = []
+
+    def _write_results(self) -> None:
+        while True:
+            try:
+                item = self._submitted.get(timeout=self.linger)
+            except queue.Empty:
+                with self._batch_lock:
+                    self._submit_batch()
+                continue
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                # Flush marker: everything submitted before it has been written.
+                item.set()
+                continue
+            try:
+                text = item.result()
+            except Exception:
+                # A worker failed to format the batch; its records stay in the worker, so report the error alone.
+                if logging.raiseExceptions and sys.stderr:
+                    sys.stderr.write("--- Logging error ---\n")
+                    traceback.print_exc(file=sys.stderr)
+                continue
+            # No handler lock here: logging.shutdown holds it while waiting in flush().
+            # This thread is the only writer.
+            self.stream.write(text)
+            self.stream.flush()
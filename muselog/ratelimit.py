@@ -0,0 +1,129 @@
+"""Rate limit repetitive log messages before they are formatted."""
+
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+#: Key of a rate-limited message: logger name, level, and unformatted message template.
+Key = Tuple[str, int, str]
+
+
+class RateLimitFilter(logging.Filter):
+    """Filter that applies a token bucket to each distinct message template.
+
+    Records are keyed on their logger name, level, and unformatted `record.msg`,
+    so the check never calls `getMessage` or formats the record. Add the filter to
+    a handler (rather than a logger) so it sees propagated records as well.
+
+    Suppressed records are counted, and a summary line is logged through
+    `muselog.ratelimit` at most once per `summary_interval`. The summary is emitted
+    from the next record that passes through the filter after the interval elapses.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: Optional[int] = None,
+                 summary_interval: float = 60.0,
+                 max_keys: int = 10000,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Create the filter.
+
+        :param rate:             Records per second allowed for each key.
+        :param burst:            Records allowed in a burst before limiting begins. (Default: `max(rate, 1)`)
+        :param summary_interval: Minimum seconds between summary lines.
+        :param max_keys:         Maximum number of keys tracked. The least recently seen key is evicted first.
+        :param clock:            Monotonic clock returning seconds.
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+        self.clock = clock
+        #: Maps each key to `[tokens, last refill time, suppressed count]`.
+        self._buckets: "OrderedDict[Key, list]" = OrderedDict()
+        self._evicted_suppressed = 0
+        self._last_summary = clock()
+        self._lock = threading.Lock()
+        #: Per thread: whether a summary is being logged, and `last`, a weak reference to the last
+        #: record filtered (so that its traceback and frames are not kept alive) and the decision.
+        self._local = threading.local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return `False` if `record` exceeds its key's rate."""
+        # The same record may reach this filter through several handlers, all on the thread that logged it.
+        last = getattr(self._local, "last", None)
+        if last is not None and last[0]() is record:
+            return last[1]
+        if getattr(self._local, "summarizing", False) or not isinstance(record.msg, str):
+            return True
+
+        now = self.clock()
+        key = (record.name, record.levelno, record.msg)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.burst, now, 0]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    _, evicted = self._buckets.popitem(last=False)
+                    self._evicted_suppressed += evicted[2]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                decision = True
+            else:
+                bucket[2] += 1
+                decision = False
+
+            summary = None
+            if now - self._last_summary >= self.summary_interval:
+                summary = self._collect_summary()
+                self._last_summary = now
+
+        self._local.last = (weakref.ref(record), decision)
+        if summary:
+            self._log_summary(*summary)
+        return decision
+
+    def _collect_summary(self) -> Optional[Tuple[int, List[Tuple[Key, int]]]]:
+        """Reset suppressed counts and return the total along with the top offenders. Requires the lock."""
+        total = self._evicted_suppressed
+        offenders = []
+        for key, bucket in self._buckets.items():
+            if bucket[2]:
+                total += bucket[2]
+                offenders.append((key, bucket[2]))
+                bucket[2] = 0
+        self._evicted_suppressed = 0
+        if not total:
+            return None
+        offenders.sort(key=lambda offender: offender[1], reverse=True)
+        return total, offenders[:5]
+
+    def _log_summary(self, total: int, offenders: List[Tuple[Key, int]]) -> None:
+        self._local.summarizing = True
+        try:
+            LOGGER.warning(
+                "Rate limiting suppressed %d log records in the last %d seconds.",
+                total,
+                self.summary_interval,
+                extra={
+                    "ratelimit.suppressed": total,
+                    "ratelimit.top": [
+                        {"logger": name, "level": logging.getLevelName(level), "msg": msg, "suppressed": count}
+                        for (name, level, msg), count in offenders
+                    ],
+                }
+            )
+        finally:
+            self._local.summarizing = False
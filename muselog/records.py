@@ -0,0 +1,170 @@
+"""Compact log records, for processes that hold many records at once (e.g., in queues or buffers)."""
+
+import collections
+import itertools
+import logging
+import operator
+from typing import Any, Dict, Iterator, MutableMapping
+
+#: Attributes every record has, as set by :class:`logging.LogRecord` in this version of Python.
+_FIELDS = tuple(logging.LogRecord("", logging.NOTSET, "", 0, "", (), None).__dict__)
+
+#: Attributes set on records later, by formatters.
+_LATE_FIELDS = ("message", "asctime")
+
+_SLOTS = frozenset(_FIELDS + _LATE_FIELDS)
+
+_UNSET = object()
+
+
+class SlottedLogRecord:
+    """Log record that stores its standard attributes in slots, rather than in an instance dictionary.
+
+    Any other attribute (`extra` values, including `ctx`) is kept in the single `extra`
+    slot, a dictionary created only once the first such attribute is set. Records
+    otherwise behave like :class:`logging.LogRecord`: `record.__dict__` is a live,
+    mutable view of every attribute, so `Logger.makeRecord`, `logging.makeLogRecord`,
+    and formatters work unchanged, and records can be copied and pickled.
+
+    Install with `muselog.setup_logging(slotted_records=True)`.
+    """
+
+    # Weak references are taken by formatters that cache their last output (see DatadogJSONFormatter).
+    __slots__ = _FIELDS + _LATE_FIELDS + ("extra", "__weakref__")
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Create a record. Takes the same arguments as :class:`logging.LogRecord`."""
+        # Let logging compute the attributes on a scratch object, then move them into
+        # slots; setting each through __setattr__ would cost more than the record saves.
+        # LogRecord always sets the same attributes in the same order, that of _FIELDS.
+        scratch = _Scratch()
+        logging.LogRecord.__init__(scratch, *args, **kwargs)
+        collections.deque(map(operator.call, _FIELD_SETTERS, itertools.repeat(self), scratch.__dict__.values()), 0)
+        _set_extra(self, None)
+
+    getMessage = logging.LogRecord.getMessage
+    __repr__ = logging.LogRecord.__repr__
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _SLOTS:
+            object.__setattr__(self, name, value)
+        elif self.extra is None:
+            object.__setattr__(self, "extra", {name: value})
+        else:
+            self.extra[name] = value
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes that are not set slots.
+        extra = object.__getattribute__(self, "extra")
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        if name in _SLOTS:
+            object.__delattr__(self, name)
+        elif self.extra is not None and name in self.extra:
+            del self.extra[name]
+        else:
+            raise AttributeError(name)
+
+    @property
+    def __dict__(self) -> MutableMapping[str, Any]:
+        """Live view of all of the record's attributes."""
+        return _RecordDict(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a new dictionary of all of the record's attributes, like `dict(record.__dict__)`, but faster."""
+        record_dict = dict(zip(_FIELDS, _get_fields(self)))
+        try:
+            # Formatters set `message` before `asctime`, so if one is missing, both usually are.
+            for name, get in _LATE_GETTERS:
+                record_dict[name] = get(self)
+        except AttributeError:
+            pass
+        if self.extra:
+            record_dict.update(self.extra)
+        return record_dict
+
+    def __reduce__(self):
+        return _restore, (self.as_dict(),)
+
+
+class _Scratch:
+    pass
+
+
+_FIELD_SETTERS = tuple(getattr(SlottedLogRecord, name).__set__ for name in _FIELDS)
+_set_extra = SlottedLogRecord.extra.__set__
+_get_fields = operator.attrgetter(*_FIELDS)
+#: Slot getters that raise AttributeError if unset, without falling back to __getattr__.
+_LATE_GETTERS = tuple((name, getattr(SlottedLogRecord, name).__get__) for name in _LATE_FIELDS)
+
+
+def _restore(attributes: Dict[str, Any]) -> SlottedLogRecord:
+    record = SlottedLogRecord.__new__(SlottedLogRecord)
+    _set_extra(record, None)
+    for name, value in attributes.items():
+        setattr(record, name, value)
+    return record
+
+
+class _RecordDict(MutableMapping):
+    """Mapping view of a :class:`SlottedLogRecord`'s attributes."""
+
+    __slots__ = ("record",)
+
+    def __init__(self, record: SlottedLogRecord) -> None:
+        self.record = record
+
+    def __getitem__(self, name: str) -> Any:
+        if name in _SLOTS:
+            value = getattr(self.record, name, _UNSET)
+            if value is not _UNSET:
+                return value
+        elif self.record.extra is not None:
+            return self.record.extra[name]
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        # `Logger.makeRecord` sets each `extra` value this way.
+        record = self.record
+        if name in _SLOTS:
+            setattr(record, name, value)
+        elif record.extra is None:
+            _set_extra(record, {name: value})
+        else:
+            record.extra[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        try:
+            delattr(self.record, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __contains__(self, name: object) -> bool:
+        if name in _SLOTS:
+            return getattr(self.record, name, _UNSET) is not _UNSET
+        return self.record.extra is not None and name in self.record.extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.record.as_dict())
+
+    def __len__(self) -> int:
+        return len(self.record.as_dict())
+
+
+def attributes(record: Any) -> Dict[str, Any]:
+    """Return a new dictionary of all of `record`'s attributes, reading slots directly if it is slotted."""
+    if type(record) is SlottedLogRecord:
+        return record.as_dict()
+    return dict(record.__dict__)
+
+
+def install(enabled: bool = True) -> None:
+    """Make :class:`SlottedLogRecord` the record factory, or, if not `enabled`, undo that."""
+    if enabled:
+        logging.setLogRecordFactory(SlottedLogRecord)
+    elif logging.getLogRecordFactory() is SlottedLogRecord:
+        logging.setLogRecordFactory(logging.LogRecord)
+
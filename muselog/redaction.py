@@ -0,0 +1,181 @@
+"""Redaction of secrets and personal data from records, before they leave the process."""
+
+import re
+from typing import Any, Dict, Iterable, Mapping, MutableMapping, Set
+from urllib.parse import unquote_plus
+
+#: Key names whose values are always redacted. A key matches if, lowercased and without
+#: separators, it ends with one of them: `token` matches `token`, `csrf_token` and `accessToken`.
+DEFAULT_KEYS = ("password", "passwd", "secret", "token", "apikey", "authorization", "cookie", "sessionid")
+
+#: Values redacted wherever they appear in a string: email addresses, bearer tokens, and JWTs.
+DEFAULT_PATTERNS = (
+    r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+    r"(?i:bearer)\s+[A-Za-z0-9._~+/-]+=*",
+    r"eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*",
+)
+
+#: Fields holding URLs, as set by :class:`muselog.attributes.HttpAttributes`, whose query
+#: parameters are redacted by key name.
+URL_FIELDS = ("http.url", "http.referer")
+
+#: Replacement of redacted values.
+MASK = "[REDACTED]"
+
+#: Record fields that only ever hold logging's own details, and are not scanned.
+_SKIPPED_FIELDS = frozenset((
+    "name", "levelname", "levelno", "pathname", "filename", "module", "exc_info", "lineno", "funcName",
+    "created", "msecs", "relativeCreated", "thread", "threadName", "processName", "process", "taskName",
+    "tm.logger.library", "timestamp", "severity", "logger.name", "logger.method_name", "logger.thread_name",
+))
+
+#: Types of values that hold nothing to redact, unless their key is secret.
+_SCALARS = frozenset((int, float, bool, type(None)))
+
+#: A query parameter: the character before it, its name, and its value.
+_QUERY_PARAMETER = re.compile(r"([?&;])([^=&#;]+)=([^&#;]*)")
+
+
+def _normalize(key: str) -> str:
+    return "".join(c for c in key.lower() if c.isalnum())
+
+
+class Redactor:
+    """Redact values of secret keys, and secrets and personal data found in values.
+
+    Key rules are matched once per key name, then remembered; value patterns are combined
+    into a single regular expression, so each string is scanned once, however many
+    patterns there are. Values that need no redaction are kept as they are, so clean
+    records cost one scan and no copies. Short strings found clean (e.g., user agents,
+    referrers, messages without arguments) are remembered too, and not scanned again.
+    """
+
+    #: Most key names whose verdict is remembered. Others are checked each time.
+    MAX_KEYS = 4096
+
+    #: Most clean strings remembered, and longest remembered. Once full, they are forgotten all at once.
+    MAX_CLEAN_STRINGS = 4096
+    MAX_CLEAN_LENGTH = 512
+
+    def __init__(self,
+                 keys: Iterable[str] = DEFAULT_KEYS,
+                 patterns: Iterable[str] = DEFAULT_PATTERNS,
+                 url_fields: Iterable[str] = URL_FIELDS,
+                 mask: str = MASK) -> None:
+        """Create the redactor.
+
+        :param keys:       Key names whose values are redacted, at any depth, and in URL
+                           query parameters. (Default: :data:`DEFAULT_KEYS`)
+        :param patterns:   Regular expressions of values to redact in any string. (Default: :data:`DEFAULT_PATTERNS`)
+        :param url_fields: Top-level fields holding URLs. (Default: :data:`URL_FIELDS`)
+        :param mask:       Replacement of redacted values. (Default: :data:`MASK`)
+        """
+        self.keys = frozenset(_normalize(key) for key in keys)
+        patterns = tuple(patterns)
+        self.pattern = re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+        self.url_fields = frozenset(url_fields)
+        self.mask = mask
+        self._verdicts: Dict[str, bool] = dict()
+        self._clean: Set[str] = set()
+
+    def redact(self, record_dict: MutableMapping[str, Any]) -> None:
+        """Redact `record_dict` (e.g., a :class:`muselog.datadog.DatadogJSONFormatter` record), in place.
+
+        Nested dictionaries and lists that need redaction are replaced by redacted copies;
+        the originals (e.g., bound context) are left alone.
+        """
+        for key, value in record_dict.items():
+            if key not in _SKIPPED_FIELDS:
+                redacted = self._field(key, value)
+                if redacted is not value:
+                    record_dict[key] = redacted
+
+    def is_clean(self, attributes: Mapping[str, Any]) -> bool:
+        """Return whether :meth:`redact` would leave `attributes` unchanged."""
+        for key, value in attributes.items():
+            if key not in _SKIPPED_FIELDS and self._field(key, value) is not value:
+                return False
+        return True
+
+    def scrub_url(self, url: str) -> str:
+        """Return `url` with the values of secret query parameters, and any value patterns, redacted.
+
+        Query parameter values that match a value pattern once decoded are redacted whole.
+        """
+        if "?" in url:
+            scrubbed = _QUERY_PARAMETER.sub(self._parameter, url)
+            if scrubbed != url:
+                # Otherwise keep `url` itself, so that clean URLs come back unchanged.
+                url = scrubbed
+        return self.scrub(url)
+
+    def scrub(self, value: str) -> str:
+        """Return `value` with the value patterns redacted. Returns `value` itself if nothing matches."""
+        if self.pattern is None or value in self._clean:
+            return value
+        scrubbed = self.pattern.sub(self.mask, value)
+        if scrubbed is value and len(value) <= self.MAX_CLEAN_LENGTH:
+            if len(self._clean) >= self.MAX_CLEAN_STRINGS:
+                self._clean.clear()
+            self._clean.add(value)
+        return scrubbed
+
+    def secret_key(self, key: str) -> bool:
+        """Return whether values of `key` are redacted."""
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            normalized = _normalize(key)
+            verdict = any(normalized[i:] in self.keys for i in range(len(normalized)))
+            if len(self._verdicts) < self.MAX_KEYS:
+                self._verdicts[key] = verdict
+        return verdict
+
+    def _field(self, key: str, value: Any) -> Any:
+        if key in self.url_fields and type(value) is str:
+            return self.scrub_url(value)
+        return self._value(key, value)
+
+    def _value(self, key: Any, value: Any) -> Any:
+        cls = type(value)
+        if key is not None:
+            secret = self._verdicts.get(key)
+            if secret is None:
+                secret = type(key) is str and self.secret_key(key)
+            if secret:
+                return self.mask if value is not None else None
+        if cls in _SCALARS:
+            return value
+        if cls is str:
+            return value if value in self._clean else self.scrub(value)
+        if isinstance(value, dict):
+            redacted = None
+            for item_key, item in value.items():
+                redacted_item = self._value(item_key, item)
+                if redacted_item is not item:
+                    if redacted is None:
+                        redacted = dict(value)
+                    redacted[item_key] = redacted_item
+            return value if redacted is None else redacted
+        if isinstance(value, (list, tuple)):
+            redacted = None
+            for i, item in enumerate(value):
+                redacted_item = self._value(None, item)
+                if redacted_item is not item:
+                    if redacted is None:
+                        redacted = list(value)
+                    redacted[i] = redacted_item
+            return value if redacted is None else redacted
+        if isinstance(value, str):
+            return self.scrub(value)
+        return value
+
+    def _parameter(self, match: "re.Match[str]") -> str:
+        separator, name, value = match.groups()
+        if self.secret_key(unquote_plus(name) if "%" in name or "+" in name else name):
+            return f"{separator}{name}={self.mask}"
+        if "%" in value or "+" in value:
+            # Encoded values are not seen by the scan of the whole URL.
+            decoded = unquote_plus(value)
+            if self.scrub(decoded) is not decoded:
+                return f"{separator}{name}={self.mask}"
+        return match.group()
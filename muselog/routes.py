@@ -0,0 +1,90 @@
+"""Per-route access log policy: skip, sample, or change the level of request logs by path."""
+
+import logging
+import random
+import re
+from typing import Iterable, List, Optional, Pattern, Union
+
+#: Actions a rule can take.
+LOG, SKIP, SAMPLE = "log", "skip", "sample"
+
+
+class RouteRule:
+    """What to do with access logs of requests whose path matches `path`."""
+
+    def __init__(self,
+                 path: Union[str, Pattern],
+                 action: str = LOG,
+                 sample_rate: float = 1.0,
+                 level: Optional[Union[str, int]] = None) -> None:
+        """Create the rule.
+
+        :param path:        An exact path (`"/health"`), a path prefix ending with `*`
+                            (`"/static/*"`), or a compiled regular expression matched
+                            against the start of the path. Regular expressions must not
+                            use numbered backreferences.
+        :param action:      One of `"log"`, `"skip"`, or `"sample"`.
+        :param sample_rate: Fraction of matching requests to log, for `"sample"`.
+        :param level:       Level to log matching requests at, instead of the status-based level.
+        """
+        if action not in (LOG, SKIP, SAMPLE):
+            raise ValueError(f"unknown action {action!r}")
+        self.path = path
+        self.action = action
+        self.sample_rate = sample_rate
+        self.level = logging._checkLevel(level) if level is not None else logging.NOTSET
+
+    def to_regex(self) -> str:
+        """Return this rule's path as a regular expression anchored at the start of the path."""
+        if isinstance(self.path, re.Pattern):
+            return self.path.pattern
+        if self.path.endswith("*"):
+            return re.escape(self.path[:-1])
+        return re.escape(self.path) + r"\Z"
+
+
+class RoutePolicy:
+    """Rules compiled into a single regular expression; the first matching rule wins.
+
+    Matching a path is one regular expression match, whatever the number of rules.
+    """
+
+    def __init__(self, rules: Iterable[RouteRule]) -> None:
+        """Compile `rules`."""
+        self.rules: List[RouteRule] = list(rules)
+        self._regex = re.compile("|".join(
+            f"(?P<_muselog_rule{index}>{rule.to_regex()})" for index, rule in enumerate(self.rules)
+        )) if self.rules else None
+
+    def decide(self, path: str) -> Optional[int]:
+        """Decide whether, and at which level, to log a request for `path`.
+
+        :returns: `None` if the request should not be logged. Otherwise, the level to log
+                  it at, where `logging.NOTSET` means the usual, status-based level.
+        """
+        if self._regex is None:
+            return logging.NOTSET
+        match = self._regex.match(path)
+        if match is None:
+            return logging.NOTSET
+        # The rule's own group closes last, so it is the last matched group.
+        rule = self.rules[int(match.lastgroup[len("_muselog_rule"):])]
+        if rule.action == SKIP or (rule.action == SAMPLE and random.random() >= rule.sample_rate):
+            return None
+        return rule.level
+
+
+#: Policy used by the framework hooks unless they are given one.
+_POLICY = RoutePolicy(())
+
+
+def configure(rules: Iterable[RouteRule]) -> RoutePolicy:
+    """Compile `rules` and make them the default policy of every framework hook."""
+    global _POLICY
+    _POLICY = RoutePolicy(rules)
+    return _POLICY
+
+
+def get_policy() -> RoutePolicy:
+    """Return the default policy."""
+    return _POLICY
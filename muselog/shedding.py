@@ -0,0 +1,114 @@
+"""Drop low-severity records while a handler cannot keep up."""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+#: Shedding stages, as the level below which records are dropped: nothing, then DEBUG, then INFO.
+#: Access lines of successful requests are logged at INFO, so the last stage drops them too.
+STAGES = (logging.NOTSET, logging.INFO, logging.WARNING)
+
+
+class LoadShedFilter(logging.Filter):
+    """Filter that raises the effective level of a handler while it is under pressure.
+
+    `pressure` is a cheap signal from the handler, such as how full its buffer is, from 0
+    to 1 (see `pressure()` on :class:`muselog.aio.AsyncioStreamHandler` and the Datadog
+    network handlers). It is sampled at most every `check_interval` seconds. Each sample at
+    or above `high` sheds one more stage of :data:`STAGES`; once samples have stayed at or
+    below `low` for `cooldown` seconds, one stage is restored. WARNING and above always pass.
+
+    Every change of stage is logged once, through `muselog.shedding`.
+    """
+
+    def __init__(self,
+                 pressure: Callable[[], float],
+                 high: float = 0.5,
+                 low: float = 0.1,
+                 cooldown: float = 5.0,
+                 check_interval: float = 0.1,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Create the filter.
+
+        :param pressure:       Returns the handler's current pressure, from 0 to 1.
+        :param high:           Pressure at which to shed another stage.
+        :param low:            Pressure at or below which stages are restored, after `cooldown`.
+        :param cooldown:       Seconds pressure must stay low before each stage is restored.
+        :param check_interval: Minimum seconds between samples of `pressure`.
+        :param clock:          Monotonic clock returning seconds.
+        """
+        super().__init__()
+        self.pressure = pressure
+        self.high = high
+        self.low = low
+        self.cooldown = cooldown
+        self.check_interval = check_interval
+        self.clock = clock
+        #: Index into :data:`STAGES` of the current stage.
+        self.stage = 0
+        #: Records dropped since the last change of stage.
+        self.shed = 0
+        self._threshold = STAGES[0]
+        self._next_check = clock()
+        self._calm_since: Optional[float] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return `False` if `record` is below the level currently being shed."""
+        if record.levelno >= logging.WARNING:
+            return True
+        now = self.clock()
+        if now >= self._next_check and not getattr(self._local, "reporting", False):
+            self._check(now)
+        if record.levelno < self._threshold:
+            self.shed += 1
+            return False
+        return True
+
+    def _check(self, now: float) -> None:
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            pressure = self.pressure()
+            previous_stage = self.stage
+            if pressure >= self.high:
+                self._calm_since = None
+                if self.stage < len(STAGES) - 1:
+                    self.stage += 1
+            elif pressure <= self.low and self.stage > 0:
+                if self._calm_since is None:
+                    self._calm_since = now
+                elif now - self._calm_since >= self.cooldown:
+                    self.stage -= 1
+                    # Each further stage needs its own quiet period.
+                    self._calm_since = now
+            else:
+                self._calm_since = None
+            if self.stage == previous_stage:
+                return
+            stage = self.stage
+            self._threshold = STAGES[stage]
+            shed, self.shed = self.shed, 0
+        self._report(previous_stage, stage, pressure, shed)
+
+    def _report(self, previous_stage: int, stage: int, pressure: float, shed: int) -> None:
+        self._local.reporting = True
+        try:
+            level_name = logging.getLevelName(STAGES[stage])
+            extra = {"shedding.level": level_name, "shedding.pressure": pressure}
+            if stage > previous_stage:
+                LOGGER.warning("Log pressure at %d%%: dropping records below %s.",
+                               pressure * 100, level_name, extra=extra)
+            elif stage:
+                LOGGER.warning("Log pressure eased to %d%%: dropping records below %s (%d dropped since the last change).",
+                               pressure * 100, level_name, shed, extra=extra)
+            else:
+                LOGGER.warning("Log pressure eased to %d%%: no longer dropping records (%d dropped since the last change).",
+                               pressure * 100, shed, extra=extra)
+        finally:
+            self._local.reporting = False
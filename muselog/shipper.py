@@ -0,0 +1,264 @@
+"""Out-of-process log shipper.
+
+`muselog-run --shipper` starts this module as a sidecar process. Applications then send
+compact record snapshots to it over a Unix socket with :class:`ShipperHandler`, and the
+sidecar does the formatting, batching, and transport. Any number of processes may share
+one sidecar; it exits once the process it watches is gone.
+
+Run it directly with `python -m muselog.shipper --socket PATH [--watch-pid PID]`.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from .snapshot import decode_snapshot, encode_snapshot, restore_record, snapshot_record
+
+#: Each snapshot is sent as a 4-byte, big-endian length followed by the encoded snapshot.
+_HEADER = struct.Struct("!I")
+
+#: Maximum number of records the sidecar formats and writes at once.
+BATCH_SIZE = 512
+
+
+class ShipperHandler(logging.Handler):
+    """Handler that sends record snapshots to a shipper sidecar over a Unix socket.
+
+    If the sidecar cannot be reached, records are formatted locally and written to
+    `fallback` instead, so that they are not lost.
+    """
+
+    def __init__(self, socket_path: str, trace_enabled: bool = False, fallback: Optional[logging.Handler] = None) -> None:
+        """Create the handler.
+
+        :param socket_path:   Path of the sidecar's Unix socket.
+        :param trace_enabled: Capture trace and span ids with each record.
+        :param fallback:      Handler used when the sidecar is unreachable. (Default: stderr)
+        """
+        super().__init__()
+        self.socket_path = socket_path
+        self.trace_enabled = trace_enabled
+        self.fallback = fallback or logging.StreamHandler()
+        self.sock: Optional[socket.socket] = None
+        #: Process that connected `sock`. A forked child (e.g., a pre-fork server's worker) connects its own.
+        self._pid: Optional[int] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Send a snapshot of `record` to the sidecar."""
+        try:
+            data = encode_snapshot(snapshot_record(record, self.trace_enabled))
+        except Exception:
+            self.handleError(record)
+            return
+
+        try:
+            if self._pid != os.getpid():
+                # Sharing the parent's connection would interleave our snapshots with its own.
+                self._close_socket()
+            if self.sock is None:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.sock.connect(self.socket_path)
+                self._pid = os.getpid()
+            self.sock.sendall(_HEADER.pack(len(data)) + data)
+        except OSError:
+            self._close_socket()
+            self.fallback.handle(record)
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]) -> None:
+        """Set the formatter of the fallback handler. The sidecar has its own formatter."""
+        super().setFormatter(fmt)
+        self.fallback.setFormatter(fmt)
+
+    def close(self) -> None:
+        """Disconnect from the sidecar."""
+        with self.lock:
+            self._close_socket()
+        super().close()
+
+    def _close_socket(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+
+class Shipper:
+    """The sidecar: receives snapshots from any number of processes and writes them through `handler`.
+
+    Records are formatted and written on a single output thread, in batches of up
+    to :data:`BATCH_SIZE`. Records from a given connection keep their order.
+    """
+
+    def __init__(self, socket_path: str, handler: logging.Handler, watch_pid: Optional[int] = None) -> None:
+        """Create the shipper.
+
+        :param socket_path: Path at which to listen.
+        :param handler:     Handler, with formatter, that transports the records.
+        :param watch_pid:   Shut down once the process with this pid exits.
+        """
+        self.socket_path = socket_path
+        self.handler = handler
+        self.watch_pid = watch_pid
+        self.records: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue()
+        self.server = _Server(socket_path, _SnapshotRequestHandler)
+        self.server.shipper = self
+        self._output = threading.Thread(target=self._write_records, name="muselog-shipper-output", daemon=True)
+
+    def serve_forever(self) -> None:
+        """Serve until :meth:`shutdown` is called or the watched process exits."""
+        self._output.start()
+        if self.watch_pid is not None:
+            threading.Thread(target=self._watch, name="muselog-shipper-watch", daemon=True).start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self._accept_pending()
+            self.server.server_close()
+            self.records.put(None)
+            self._output.join()
+            self.handler.flush()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        """Stop accepting records. Records already received are still written."""
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def _accept_pending(self) -> None:
+        """Serve connections still waiting in the listen backlog, so their records are not lost."""
+        self.server.socket.setblocking(False)
+        while True:
+            try:
+                request, address = self.server.get_request()
+            except OSError:
+                return
+            request.setblocking(True)
+            self.server.process_request(request, address)
+
+    def _watch(self) -> None:
+        # If the watched process is our parent, being reparented means it exited, even
+        # if it has not been reaped yet (and so would still answer signals as a zombie).
+        parent = os.getppid() == self.watch_pid
+        while True:
+            time.sleep(1)
+            if parent:
+                if os.getppid() != self.watch_pid:
+                    break
+                continue
+            try:
+                os.kill(self.watch_pid, 0)
+            except ProcessLookupError:
+                break
+            except PermissionError:
+                pass
+        self.shutdown()
+
+    def _write_records(self) -> None:
+        done = False
+        while not done:
+            batch: List[logging.LogRecord] = []
+            record = self.records.get()
+            while record is not None:
+                batch.append(record)
+                if len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    record = self.records.get_nowait()
+                except queue.Empty:
+                    break
+            done = record is None
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, batch: List[logging.LogRecord]) -> None:
+        handler = self.handler
+        if isinstance(handler, logging.StreamHandler):
+            # One write for the whole batch, rather than one per record.
+            lines = []
+            for record in batch:
+                try:
+                    lines.append(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            with handler.lock:
+                handler.stream.write("".join(lines))
+                handler.flush()
+        else:
+            for record in batch:
+                handler.handle(record)
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    # Joining request threads on close lets connected clients finish sending.
+    shipper: Shipper
+
+
+class _SnapshotRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        records = self.server.shipper.records
+        while True:
+            header = self.rfile.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            (length,) = _HEADER.unpack(header)
+            data = self.rfile.read(length)
+            if len(data) < length:
+                return
+            records.put(restore_record(decode_snapshot(data)))
+
+
+def _make_handler() -> logging.Handler:
+    """Build the sidecar's transport from the environment.
+
+    Records are sent to `DATADOG_HOST` over UDP (on `DATADOG_UDP_PORT`, as documented for
+    :class:`muselog.datadog.DataDogUdpHandler`) if it is set, and written to stdout otherwise.
+    Like `setup_logging`'s console handler, they are formatted as Datadog JSON if
+    `ENABLE_DATADOG_JSON_FORMATTER` is set, and with `MUSELOG_LOG_FORMAT` (from `muselog-run
+    --log-format`) otherwise.
+    """
+    import muselog
+
+    if os.environ.get("DATADOG_HOST"):
+        from .datadog import DataDogUdpHandler
+        handler = DataDogUdpHandler(os.environ["DATADOG_HOST"], int(os.environ.get("DATADOG_UDP_PORT", 10518)))
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+
+    if muselog._datadog_json_enabled():
+        from .datadog import DatadogJSONFormatter
+        # Trace ids are captured by the application; there are no spans in this process.
+        handler.setFormatter(DatadogJSONFormatter(trace_enabled=False))
+    else:
+        handler.setFormatter(logging.Formatter(os.environ.get("MUSELOG_LOG_FORMAT") or muselog.DEFAULT_LOG_FORMAT))
+    return handler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the sidecar."""
+    parser = argparse.ArgumentParser(prog="python -m muselog.shipper", description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", required=True, help="Path of the Unix socket to listen on.")
+    parser.add_argument("--watch-pid", type=int, help="Exit once the process with this pid exits.")
+    args = parser.parse_args(argv)
+
+    shipper = Shipper(args.socket, _make_handler(), watch_pid=args.watch_pid)
+    signal.signal(signal.SIGTERM, lambda *_: shipper.shutdown())
+    # Interrupts are meant for the application; we exit once it does.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shipper.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
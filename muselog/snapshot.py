@@ -0,0 +1,88 @@
+"""Reduce log records to compact, primitive snapshots that can be formatted in another process."""
+
+import json
+import logging
+import marshal
+import os
+import traceback
+from typing import Any, Dict
+
+from . import records
+
+#: Record attributes that cannot, or need not, leave the process.
+_SKIPPED_ATTRS = frozenset(("args", "msg", "exc_info", "message"))
+
+
+def snapshot_record(record: logging.LogRecord, trace_enabled: bool = False) -> Dict[str, Any]:
+    """Return a dictionary of primitives holding everything needed to format `record` elsewhere.
+
+    The message is rendered, and exception details (kind, message, and traceback text)
+    are extracted, because neither arguments nor tracebacks survive serialization.
+    If `trace_enabled`, the current trace and span ids are captured as well, since the
+    span is only known in the emitting process.
+    """
+    attributes = record.as_dict() if isinstance(record, records.SlottedLogRecord) else record.__dict__
+    snapshot = {k: v for k, v in attributes.items() if k not in _SKIPPED_ATTRS}
+    snapshot["msg"] = record.getMessage()
+    if isinstance(snapshot.get("ctx"), dict):
+        # Plain dict, so that marshal takes it (see muselog.context.RecordContext).
+        snapshot["ctx"] = dict(snapshot["ctx"])
+
+    if record.exc_info:
+        exc_type, exc_value, _ = record.exc_info
+        if not record.exc_text:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip("\n")
+        snapshot.setdefault("error.kind", exc_type.__name__)
+        snapshot.setdefault("error.message", str(exc_value))
+    snapshot["exc_text"] = record.exc_text
+
+    if trace_enabled and "dd.trace_id" not in snapshot:
+        from opentelemetry import trace
+        span_context = trace.get_current_span().get_span_context()
+        snapshot["dd.trace_id"] = str(span_context.trace_id & 0xFFFFFFFFFFFFFFFF)
+        snapshot["dd.span_id"] = str(span_context.span_id)
+
+    return snapshot
+
+
+def restore_record(snapshot: Dict[str, Any]) -> logging.LogRecord:
+    """Rebuild a log record from a snapshot made by :func:`snapshot_record`.
+
+    The record has no `exc_info`; formatters find the traceback in `exc_text`
+    and, for :class:`muselog.datadog.DatadogJSONFormatter`, in `error.stack`.
+    """
+    record = logging.makeLogRecord(snapshot)
+    if record.exc_text and "error.stack" not in snapshot:
+        limit = int(os.environ.get("DATADOG_ERROR_STACK_LIMIT", 10000))
+        setattr(record, "error.stack", record.exc_text[0:limit])
+    return record
+
+
+def encode_snapshot(snapshot: Dict[str, Any]) -> bytes:
+    """Serialize a snapshot compactly.
+
+    Values that are not primitives are first converted the way
+    :class:`muselog.datadog.ObjectEncoder` would render them.
+    """
+    try:
+        return marshal.dumps(snapshot)
+    except ValueError:
+        pass
+
+    from .datadog import ObjectEncoder
+    primitive = dict()
+    for key, value in snapshot.items():
+        try:
+            marshal.dumps(value)
+        except ValueError:
+            value = json.loads(json.dumps(value, cls=ObjectEncoder))
+        primitive[key] = value
+    return marshal.dumps(primitive)
+
+
+def decode_snapshot(data: bytes) -> Dict[str, Any]:
+    """Deserialize a snapshot serialized by :func:`encode_snapshot`.
+
+    Only decode data from trusted, local sources.
+    """
+    return marshal.loads(data)
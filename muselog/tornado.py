@@ -2,11 +2,9 @@
 
 import logging
 import sys
-from typing import Optional, Type, Union
+from typing import Any, Optional, Type, Union
 from types import TracebackType
 
-from ddtrace import tracer
-
 from tornado.web import HTTPError, RequestHandler
 
 from . import attributes, context, logger, util
@@ -47,22 +45,53 @@ def _make_http_attributes(handler: RequestHandler) -> attributes.NetworkAttribut
 
 
 def log_request(handler: RequestHandler) -> None:
-    """Log the request information with extra context."""
+    """Log the request information with extra context.
+
+    The duration is measured by :class:`RequestTiming` if the handler uses it. Otherwise it is
+    Tornado's own `request_time()`, measured by the wall clock, as nothing else records when
+    the request started.
+    """
     request = handler.request
+    level = util.access_log_level(request.path, handler.get_status())
+    if level is None:
+        return
+
     util.init_context(request.headers.get)
     network_attrs = _make_network_attributes(handler)
     http_attrs = _make_http_attributes(handler)
+    timer = getattr(handler, "muselog_timer", None)
     util.log_request(
-        request.uri,
+        request.path,
         request.request_time(),
         network_attrs,
         http_attrs,
-        user_id=_get_user_id(handler)
+        user_id=_get_user_id(handler),
+        level=level,
+        phases=timer.phases() if timer is not None else None
     )
 
     context.unbind("request_id")
 
 
+class RequestTiming:
+    """Request handler mixin that times requests with a monotonic clock, for :func:`log_request`.
+
+    Expected to be used as a base class of a :class:`RequestHandler`, before it. Timing
+    starts when Tornado creates the handler (once the request has been routed), and the
+    handler phase ends when the handler finishes the response.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: D107
+        # Started here rather than in prepare(), which handlers often override.
+        self.muselog_timer = util.RequestTimer()
+        super().__init__(*args, **kwargs)
+
+    def finish(self, *args: Any, **kwargs: Any) -> Any:
+        """Mark the end of the handler phase, then finish the response (which logs it)."""
+        self.muselog_timer.handler_done()
+        return super().finish(*args, **kwargs)
+
+
 class ExceptionLogger:
     """Middleware (as best as tornado supports that...) to log request-scoped exception information.
 
@@ -75,6 +104,9 @@ class ExceptionLogger:
         This is necessary because ExceptionLogger does /not/ call super().log_exception,
         and thus will not invoke Datadog's log_exception wrapper.
         """
+        # Imported here so that importing this module does not load ddtrace.
+        from ddtrace import tracer
+
         # retrieve the current span
         current_span = tracer.current_span()
 
@@ -130,7 +162,7 @@ class ExceptionLogger:
         log_method(
             "%s %s (%s) encountered uncaught exception %s: " + str(value),
             http_attrs.method,
-            self.request.uri,
+            self.request.path,
             network_attrs.client_ip or "?",
             typ.__name__,
             extra=extra,
@@ -0,0 +1,109 @@
+"""Bound the size of log record values before they are serialized."""
+
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+#: Appended to strings, and to containers, that were cut short to fit a budget.
+TRUNCATION_MARKER = "...[truncated]"
+
+#: Containers nested deeper than this are replaced with the marker outright.
+MAX_DEPTH = 8
+
+#: Estimated encoded size of values whose size we do not try to measure
+#: (e.g., objects rendered by :class:`muselog.datadog.ObjectEncoder`).
+OPAQUE_COST = 64
+
+
+def clip(value: Any, budget: int, depth: int = 0) -> Tuple[Any, int, bool]:
+    """Return `value`, cut down so its JSON encoding is roughly at most `budget` characters.
+
+    Only as much of `value` as fits into `budget` is visited, so clipping a huge
+    string or container costs time proportional to the budget, not to the value.
+    Sizes are estimates: escaping of non-ASCII characters is not accounted for.
+
+    :param value:   Value to clip. It is never modified.
+    :param budget:  Approximate maximum number of characters the encoded value may take.
+    :param depth:   Current nesting depth. Used internally.
+    :returns: A tuple of the (possibly new) value, its estimated encoded size,
+              and whether anything was truncated. If nothing was truncated,
+              the original object is returned.
+    """
+    if value is None or isinstance(value, bool):
+        return value, 5, False
+    if isinstance(value, str):
+        cost = len(value) + 2
+        if cost <= budget:
+            return value, cost, False
+        keep = max(budget - len(TRUNCATION_MARKER) - 2, 0)
+        return value[:keep] + TRUNCATION_MARKER, keep + len(TRUNCATION_MARKER) + 2, True
+    if isinstance(value, int):
+        # Avoid str() on huge ints; roughly 0.3 decimal digits per bit.
+        return value, value.bit_length() * 3 // 10 + 2, False
+    if isinstance(value, float):
+        return value, 24, False
+    if isinstance(value, Mapping):
+        if depth >= MAX_DEPTH:
+            return TRUNCATION_MARKER, len(TRUNCATION_MARKER) + 2, True
+        return _clip_mapping(value, budget, depth)
+    if isinstance(value, (list, tuple)):
+        if depth >= MAX_DEPTH:
+            return TRUNCATION_MARKER, len(TRUNCATION_MARKER) + 2, True
+        return _clip_sequence(value, budget, depth)
+    return value, OPAQUE_COST, False
+
+
+def _clip_mapping(value: Mapping, budget: int, depth: int) -> Tuple[Any, int, bool]:
+    cost = 2
+    truncated = False
+    items: List[Tuple[Any, Any]] = []
+    for key, item in value.items():
+        key_cost = len(key) + 4 if isinstance(key, str) else OPAQUE_COST
+        if cost + key_cost >= budget:
+            truncated = True
+            break
+        item, item_cost, item_truncated = clip(item, budget - cost - key_cost, depth + 1)
+        items.append((key, item))
+        cost += key_cost + item_cost
+        truncated = truncated or item_truncated
+    if not truncated:
+        return value, cost, False
+    result: Dict[Any, Any] = dict(items)
+    if len(items) < len(value):
+        result[TRUNCATION_MARKER] = len(value) - len(items)
+        cost += len(TRUNCATION_MARKER) + 8
+    return result, cost, True
+
+
+def _clip_sequence(value: Iterable, budget: int, depth: int) -> Tuple[Any, int, bool]:
+    cost = 2
+    truncated = False
+    items: List[Any] = []
+    for item in value:
+        if cost + 1 >= budget:
+            truncated = True
+            break
+        item, item_cost, item_truncated = clip(item, budget - cost - 1, depth + 1)
+        items.append(item)
+        cost += item_cost + 1
+        truncated = truncated or item_truncated
+    if not truncated:
+        return value, cost, False
+    if len(items) < len(value):
+        items.append(TRUNCATION_MARKER)
+        cost += len(TRUNCATION_MARKER) + 3
+    return items, cost, True
+
+
+def fair_share(costs: Iterable[int], budget: int) -> int:
+    """Return the largest per-field cap such that the capped `costs` sum to at most `budget`.
+
+    Fields cheaper than the cap are left alone, so small fields survive while
+    the largest fields share whatever budget remains.
+    """
+    ordered = sorted(costs)
+    remaining = budget
+    for index, cost in enumerate(ordered):
+        share = remaining // (len(ordered) - index)
+        if cost > share:
+            return max(share, 0)
+        remaining -= cost
+    return budget
@@ -1,15 +1,73 @@
 """Helper functions useful to multiple middlewares."""
 
+import functools
 import logging
+import os
 import sys
-from typing import Any, Callable, Optional, Union
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Union
 import uuid
 
-from . import context, logger
+from . import context, logger, routes
 from .attributes import NetworkAttributes, HttpAttributes
 
 LOGGER: logging.Logger = logger.get_logger_with_context(logging.getLogger(__name__))
 
+#: Whether to add a `timing.<phase>` field, in nanoseconds, for each request phase a hook observed.
+REQUEST_PHASES = os.environ.get("MUSELOG_REQUEST_PHASES", "false").lower() == "true"
+
+#: Message of access logs. Records logged by :func:`log_request` have this very object as their
+#: `msg`, which tags them as access logs (see :class:`muselog.datadog.AccessLogEncoder`).
+ACCESS_LOG_MESSAGE = "%d %s %s (%s) %.2fms"
+
+
+class RequestTimer:
+    """Monotonic, nanosecond-resolution timing of the phases of one request.
+
+    Created when a framework hook first sees the request. Hooks then mark the phases
+    they can observe; phases that were never marked are left out of :meth:`phases`.
+    Unlike wall-clock time, the clock used never jumps when the system time is adjusted.
+    """
+
+    __slots__ = ("start_ns", "hooks_done_ns", "handler_done_ns", "first_byte_ns")
+
+    def __init__(self) -> None:
+        """Start timing now."""
+        self.start_ns = time.perf_counter_ns()
+        self.hooks_done_ns: Optional[int] = None
+        self.handler_done_ns: Optional[int] = None
+        self.first_byte_ns: Optional[int] = None
+
+    def hooks_done(self) -> None:
+        """Mark the end of muselog's own before-request work."""
+        self.hooks_done_ns = time.perf_counter_ns()
+
+    def handler_done(self) -> None:
+        """Mark the end of the handler or view."""
+        self.handler_done_ns = time.perf_counter_ns()
+
+    def first_byte(self) -> None:
+        """Mark the first byte of the response body being sent. Later calls are ignored."""
+        if self.first_byte_ns is None:
+            self.first_byte_ns = time.perf_counter_ns()
+
+    def phases(self) -> Dict[str, int]:
+        """Return the nanoseconds spent in each observed phase, and in total until now.
+
+        `before_hooks` and `ttfb` are measured from the start, `handler` from the
+        end of the before-hooks (or from the start, if those were not marked).
+        """
+        end_ns = time.perf_counter_ns()
+        phases = dict()
+        if self.hooks_done_ns is not None:
+            phases["before_hooks"] = self.hooks_done_ns - self.start_ns
+        if self.handler_done_ns is not None:
+            phases["handler"] = self.handler_done_ns - (self.hooks_done_ns or self.start_ns)
+        if self.first_byte_ns is not None:
+            phases["ttfb"] = self.first_byte_ns - self.start_ns
+        phases["total"] = end_ns - self.start_ns
+        return phases
+
 
 def init_context(extract_header: Callable[[str], Any]) -> None:
     """Set logging context that will survive the entire request."""
@@ -19,21 +77,44 @@ def init_context(extract_header: Callable[[str], Any]) -> None:
     context.bind(request_id=rid)
 
 
+def access_log_level(path: str, status_code: int, policy: Optional[routes.RoutePolicy] = None) -> Optional[int]:
+    """Apply the access log policy to a request, before any attributes are built for it.
+
+    Server errors (5xx) are always logged at their usual level.
+
+    :param path:        Request path, without the query string.
+    :param status_code: Response status code.
+    :param policy:      Policy to apply. (Default: :func:`muselog.routes.get_policy`)
+    :returns: `None` to skip logging the request, else the level to pass to :func:`log_request`.
+    """
+    if status_code >= 500:
+        return logging.NOTSET
+    return (policy or routes.get_policy()).decide(path)
+
+
 def log_request(path: str,
-                duration_secs: int,
+                duration_secs: Optional[float],
                 network_attrs: NetworkAttributes,
                 http_attrs: HttpAttributes,
-                user_id: Optional[Union[str, int]] = None):
+                user_id: Optional[Union[str, int]] = None,
+                level: int = logging.NOTSET,
+                phases: Optional[Mapping[str, int]] = None):
     """Log the provided request information in a standardized format.
 
-    :param path:            Request path.
-    :param duration_secs:   Seconds spent processing the request.
+    :param path:            Request path, without the query string, which is logged with the URL (see
+                            :class:`HttpAttributes`), and may hold secrets.
+    :param duration_secs:   Seconds spent processing the request. Ignored if `phases` has a `total`.
     :param network_attrs:   See :class:`NetworkAttributes`
     :param http_attrs:      See :class:`HttpAttributes`
     :param user_id:         GDPR-compliant (not a name, username, or email) user identifier, if available.
+    :param level:           Level to log at. If `NOTSET`, the level depends on the status code.
+    :param phases:          Nanoseconds spent in each request phase, e.g. from :meth:`RequestTimer.phases`.
+                            Logged as `timing.<phase>` fields if :data:`REQUEST_PHASES` is set.
     """
     status_code = http_attrs.status_code
-    if status_code < 400:
+    if level:
+        log_method = functools.partial(LOGGER.log, level)
+    elif status_code < 400:
         log_method = LOGGER.info
     elif status_code < 500:
         log_method = LOGGER.warning
@@ -42,17 +123,24 @@ def log_request(path: str,
     else:
         log_method = LOGGER.exception
 
-    duration_ms = duration_secs * 1000
+    if phases and "total" in phases:
+        duration_ns = phases["total"]
+    else:
+        duration_ns = duration_secs * 1000000000
+    duration_ms = duration_ns / 1000000
     extra = {
-        "duration": duration_ms * 1000000,
+        "duration": duration_ns,
         **network_attrs.standardize(),
         **http_attrs.standardize()
     }
     if user_id:
         extra["usr.id"] = user_id
+    if phases and REQUEST_PHASES:
+        for phase, phase_ns in phases.items():
+            extra[f"timing.{phase}"] = phase_ns
 
     log_method(
-        "%d %s %s (%s) %.2fms",
+        ACCESS_LOG_MESSAGE,
         status_code,
         http_attrs.method,
         path,
@@ -0,0 +1,125 @@
+"""Compact binary wire format for records, for transports to local agents and sidecars.
+
+Each record is the dictionary :class:`muselog.datadog.DatadogJSONFormatter` would encode
+as JSON, packed with MessagePack (https://msgpack.org), and sent as a frame: a 4-byte,
+big-endian length, then the packed map. Any process with a MessagePack library can read
+it; :func:`to_datadog_json` (or `python -m muselog.wire`) turns it back into the exact
+line the JSON formatter would have written. (The one difference: MessagePack packs any
+bytes-like value as bytes, so a `bytearray` or `memoryview` is named `bytes`.)
+
+Requires the `[msgpack]` extra.
+"""
+
+import json
+import struct
+import sys
+from typing import Any, Dict, Iterator, List
+
+import msgpack
+
+from . import context
+from .datadog import DatadogJSONFormatter, ObjectEncoder
+
+#: Each frame is a 4-byte, big-endian length followed by the packed record.
+HEADER = struct.Struct("!I")
+
+#: Extension type of integers too wide for MessagePack, packed as their decimal digits.
+BIG_INTEGER = 1
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, int):
+        return msgpack.ExtType(BIG_INTEGER, str(obj).encode("ascii"))
+    # Other values MessagePack cannot pack are sent as ObjectEncoder renders them.
+    return json.loads(json.dumps(obj, cls=ObjectEncoder))
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == BIG_INTEGER:
+        return int(data)
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackFormatter(DatadogJSONFormatter):
+    """Datadog formatter that can also encode records as MessagePack frames.
+
+    :meth:`format` still returns JSON text, so the formatter works with any handler;
+    handlers that send frames (e.g., :class:`muselog.datadog.DataDogTcpHandler`) call
+    :meth:`encode_frame` instead. Size budgets apply the same way to both.
+    """
+
+    def encode_frame(self, record) -> bytes:
+        """Return `record` as a frame."""
+        record_dict = self.record_dict(record)
+        ctx = record_dict.get("ctx")
+        if type(ctx) is context.RecordContext:
+            # The JSON formatter writes bound context last; keep the same order.
+            del record_dict["ctx"]
+            record_dict["ctx"] = ctx
+        packed = msgpack.packb(record_dict, default=_default)
+        return HEADER.pack(len(packed)) + packed
+
+
+class FrameDecoder:
+    """Split a stream of bytes into records, whatever the chunks it arrives in.
+
+    Only decode data from trusted sources: frames may be up to 4 GiB.
+    """
+
+    def __init__(self) -> None:
+        """Create the decoder, with an empty buffer."""
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Add `data` to the buffer, and return the records completed by it."""
+        self._buffer += data
+        records = []
+        position = 0
+        while len(self._buffer) - position >= HEADER.size:
+            (length,) = HEADER.unpack_from(self._buffer, position)
+            end = position + HEADER.size + length
+            if end > len(self._buffer):
+                break
+            records.append(msgpack.unpackb(self._buffer[position + HEADER.size:end],
+                                           ext_hook=_ext_hook, strict_map_key=False))
+            position = end
+        del self._buffer[:position]
+        return records
+
+    @property
+    def pending(self) -> int:
+        """Bytes received that do not yet make up a whole frame."""
+        return len(self._buffer)
+
+
+def decode_frames(data: bytes) -> Iterator[Dict[str, Any]]:
+    """Yield the records in `data`, which must hold whole frames only."""
+    decoder = FrameDecoder()
+    yield from decoder.feed(data)
+    if decoder.pending:
+        raise ValueError(f"{decoder.pending} bytes left after the last whole frame")
+
+
+def to_datadog_json(record_dict: Dict[str, Any]) -> str:
+    """Return a decoded record as the line :class:`muselog.datadog.DatadogJSONFormatter` writes for it."""
+    # MessagePack carries bytes as they are; render them as the formatter would have.
+    return json.dumps(record_dict, cls=ObjectEncoder)
+
+
+def main() -> None:
+    """Read frames from standard input and write them to standard output as Datadog JSON lines."""
+    decoder = FrameDecoder()
+    stdin, stdout = sys.stdin.buffer, sys.stdout
+    while True:
+        data = stdin.read1(65536)
+        if not data:
+            break
+        for record_dict in decoder.feed(data):
+            stdout.write(to_datadog_json(record_dict) + "\n")
+    stdout.flush()
+    if decoder.pending:
+        sys.exit(f"muselog.wire: {decoder.pending} bytes left after the last whole frame")
+
+
+if __name__ == "__main__":
+    main()
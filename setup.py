@@ -21,7 +21,8 @@ setup(
         "django": ["Django>=2.2.12"],
         "flask": ["Flask>=3.1.0"],
         "tornado": ["tornado>=4.5.1"],
-        "asgi": ["starlette>=0.46.1"]
+        "asgi": ["starlette>=0.46.1"],
+        "msgpack": ["msgpack>=1.0.0"]
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,124 @@
+import asyncio
+import gc
+import io
+import logging
+import threading
+import time
+import unittest
+import weakref
+
+from muselog.aio import AsyncioStreamHandler, drain_handlers
+
+from .support import ClearContext
+
+
+class SlowStream(io.StringIO):
+    """Stream whose writes block, like a full stdout pipe."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        super().__init__()
+        self.delay = delay
+        self.writer_threads = set()
+
+    def write(self, text: str) -> int:
+        self.writer_threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+class AsyncioStreamHandlerTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.stream = SlowStream()
+        self.handler = AsyncioStreamHandler(self.stream, capacity=100)
+        self.logger = logging.getLogger("test.aio")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+        super().tearDown()
+
+    def test_loop_does_not_block(self):
+        self.stream.delay = 0.2
+
+        async def main():
+            started = time.monotonic()
+            for i in range(5):
+                self.logger.info("message %d", i)
+            elapsed = time.monotonic() - started
+            await self.handler.drain()
+            return elapsed
+
+        elapsed = asyncio.run(main())
+        self.assertLess(elapsed, 0.1)
+        self.assertEqual(self.stream.getvalue().splitlines(), [f"message {i}" for i in range(5)])
+        self.assertNotIn(threading.current_thread().name, self.stream.writer_threads)
+
+    def test_writes_remaining_on_loop_shutdown(self):
+        self.stream.delay = 0.05
+
+        async def main():
+            for i in range(20):
+                self.logger.info("message %d", i)
+
+        asyncio.run(main())
+        self.assertEqual(len(self.stream.getvalue().splitlines()), 20)
+
+    def test_releases_loop_after_run(self):
+        loops = []
+
+        async def main():
+            loops.append(weakref.ref(asyncio.get_running_loop()))
+            self.logger.info("message")
+
+        asyncio.run(main())
+        gc.collect()
+        self.assertEqual(self.handler._writers, {})
+        self.assertIsNone(loops[0]())
+
+    def test_forgets_closed_loops(self):
+        async def log(msg):
+            self.logger.info(msg)
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(log("first"))
+        # Shut down like asyncio.run does: cancel what is left, the writer task included, then close.
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+        self.assertEqual(self.handler._writers, {})
+        asyncio.run(log("second"))
+        self.assertEqual(self.handler._writers, {})
+        self.assertEqual(self.stream.getvalue().splitlines(), ["first", "second"])
+
+    def test_thread_fallback(self):
+        self.logger.info("no loop")
+        self.handler.flush()
+        self.assertEqual(self.stream.getvalue(), "no loop\n")
+        self.assertNotIn(threading.current_thread().name, self.stream.writer_threads)
+
+    def test_bounded_buffer_drops(self):
+        self.stream.delay = 0.05
+        self.handler.capacity = 3
+
+        async def main():
+            for i in range(10):
+                self.logger.info("message %d", i)
+            await drain_handlers(self.logger)
+
+        asyncio.run(main())
+        self.assertEqual(self.handler.dropped, 7)
+        self.assertEqual(len(self.stream.getvalue().splitlines()), 3)
+
+    def test_close_writes_thread_backlog(self):
+        self.stream.delay = 0.01
+        for i in range(10):
+            self.logger.info("message %d", i)
+        self.handler.close()
+        self.assertEqual(len(self.stream.getvalue().splitlines()), 10)
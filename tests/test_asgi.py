@@ -1,11 +1,16 @@
+import io
+import logging
 import unittest
+from unittest.mock import patch
 
 from starlette.applications import Starlette
-from starlette.responses import PlainTextResponse
+from starlette.responses import PlainTextResponse, StreamingResponse
 from starlette.testclient import TestClient
 
 
-from muselog import asgi
+from muselog import asgi, util
+from muselog.aio import AsyncioStreamHandler
+from muselog.routes import RoutePolicy, RouteRule
 
 from .support import ClearContext
 
@@ -64,3 +69,84 @@ class ASGIRequestLoggingMiddlewareTestCase(ClearContext, unittest.TestCase):
             self.assertEqual(record["http.url"], "http://testserver/")
             self.assertEqual(record["http.method"], "GET")
             self.assertEqual(record["http.status_code"], 500)
+
+    def test_streaming_response(self) -> None:
+        """Test that streamed bytes are counted, and the request logged after the last chunk."""
+        chunks_sent = []
+
+        async def chunks():
+            for i in range(3):
+                chunks_sent.append(i)
+                yield b"x" * 1000
+
+        @self.app.route("/export")
+        def export(request):
+            return StreamingResponse(chunks())
+
+        def log_request(*args, **kwargs):
+            self.assertEqual(len(chunks_sent), 3)
+            return original_log_request(*args, **kwargs)
+
+        original_log_request = util.log_request
+        with patch.object(util, "log_request", log_request), \
+                patch.object(util, "REQUEST_PHASES", True), \
+                self.assertLogs("muselog.util") as cm:
+            response = self.client.get("/export")
+
+        self.assertEqual(len(response.content), 3000)
+        self.assertNotIn("Content-Length", response.headers)
+        record = cm.records[0].__dict__
+        self.assertEqual(record["network.bytes_written"], 3000)
+        self.assertEqual(record["http.status_code"], 200)
+        self.assertLessEqual(record["timing.handler"], record["timing.ttfb"])
+        self.assertLessEqual(record["timing.ttfb"], record["timing.total"])
+        self.assertEqual(record["duration"], record["timing.total"])
+
+
+class ASGIRoutePolicyTestCase(ClearContext, unittest.TestCase):
+
+    def test_skipped_route(self) -> None:
+        app = Starlette()
+        app.add_middleware(asgi.RequestLoggingMiddleware,
+                           route_policy=RoutePolicy([RouteRule("/health", action="skip")]))
+        client = TestClient(app)
+
+        @app.route("/health")
+        def health(request):
+            return PlainTextResponse("ok")
+
+        @app.route("/")
+        def homepage(request):
+            return PlainTextResponse("ok")
+
+        with patch.object(asgi, "_make_network_attributes") as make_network_attributes:
+            with self.assertNoLogs("muselog.util"):
+                client.get("/health")
+            make_network_attributes.assert_not_called()
+
+        with self.assertLogs("muselog.util") as cm:
+            client.get("/")
+        self.assertEqual(len(cm.records), 1)
+
+
+class DrainLogsOnShutdownTestCase(ClearContext, unittest.TestCase):
+
+    def test_lifespan_drains_handlers(self) -> None:
+        stream = io.StringIO()
+        handler = AsyncioStreamHandler(stream)
+        logger = logging.getLogger()
+        logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        self.addCleanup(logger.removeHandler, handler)
+
+        app = Starlette(lifespan=asgi.drain_logs_on_shutdown)
+
+        @app.route("/")
+        def homepage(request):
+            logging.getLogger("test.asgi").warning("handled")
+            return PlainTextResponse("ok")
+
+        with TestClient(app) as client:
+            client.get("/")
+
+        self.assertIn("handled", stream.getvalue())
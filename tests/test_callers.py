@@ -0,0 +1,94 @@
+import logging
+import unittest
+
+import muselog
+from muselog import callers
+from muselog.logger import get_logger_with_context
+
+from .support import ClearContext
+
+
+def _log_through_helper(logger: logging.Logger) -> None:
+    logger.info("Test", stacklevel=2)
+
+
+class CallerLookupTestCase(ClearContext, unittest.TestCase):
+
+    def tearDown(self):
+        callers.install(None)
+        super().tearDown()
+
+    def log(self, name: str = __name__):
+        with self.assertLogs(name) as cm:
+            logging.getLogger(name).info("Test")
+            get_logger_with_context(logging.getLogger(name), a=1).warning("Test")
+            _log_through_helper(logging.getLogger(name))
+            logging.getLogger(name).info("Test", stack_info=True)
+        return [(r.pathname, r.lineno, r.funcName) for r in cm.records]
+
+    def test_fast_matches_full(self):
+        expected = self.log()
+        callers.install("fast")
+        self.assertIs(logging.Logger.findCaller, callers._find_caller)
+        self.assertEqual(self.log(), expected)
+        self.assertEqual(expected[0][2], "log")
+        self.assertEqual(expected[2][2], "log")
+        self.assertNotEqual(expected[0][1], expected[2][1])
+
+    def test_off_by_prefix(self):
+        expected = self.log("app.views")
+        callers.install({"root": "fast", "app": "off", "app.views": "full"})
+
+        self.assertEqual(self.log("app.views"), expected)
+        self.assertEqual(set(self.log("app.models")), {("(unknown file)", 0, "(unknown function)")})
+        self.assertEqual(self.log("apple")[0][2], "log")
+
+    def test_all_off(self):
+        srcfile = logging._srcfile
+        callers.install("off")
+        self.assertIsNone(logging._srcfile)
+        self.assertEqual(set(self.log()), {("(unknown file)", 0, "(unknown function)")})
+
+        callers.install(None)
+        self.assertEqual(logging._srcfile, srcfile)
+        self.assertEqual(self.log()[0][2], "log")
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            callers.CallerPolicy({"app": "sometimes"})
+
+    def test_setup_logging(self):
+        try:
+            muselog.setup_logging(caller_lookup={"app": "off"}, log_threads=False, log_multiprocessing=False)
+            self.assertIs(logging.Logger.findCaller, callers._find_caller)
+            with self.assertLogs("app") as cm:
+                logging.getLogger("app").warning("Test")
+            record = cm.records[0]
+            self.assertEqual(record.funcName, "(unknown function)")
+            self.assertIsNone(record.threadName)
+            self.assertIsNone(record.processName)
+            self.assertIsNotNone(record.process)
+        finally:
+            muselog.setup_logging(caller_lookup="full", log_threads=True, log_multiprocessing=True)
+        self.assertIs(logging.Logger.findCaller, callers._FIND_CALLER)
+        self.assertTrue(logging.logThreads and logging.logProcesses and logging.logMultiprocessing)
+
+    def test_setup_logging_defaults_keep_settings(self):
+        def find_caller(*args, **kwargs):
+            return "app.py", 1, "custom", None
+
+        def make_record(*args, **kwargs):
+            return logging.LogRecord(*args, **kwargs)
+
+        self.addCleanup(setattr, logging.Logger, "findCaller", logging.Logger.findCaller)
+        self.addCleanup(logging.setLogRecordFactory, logging.getLogRecordFactory())
+        self.addCleanup(setattr, logging, "logThreads", logging.logThreads)
+        logging.Logger.findCaller = find_caller
+        logging.setLogRecordFactory(make_record)
+        logging.logThreads = False
+
+        muselog.setup_logging()
+
+        self.assertIs(logging.Logger.findCaller, find_caller)
+        self.assertIs(logging.getLogRecordFactory(), make_record)
+        self.assertFalse(logging.logThreads)
@@ -1,13 +1,25 @@
+import gzip
+import http.server
 import io
 import json
 import logging
+import os
+import socket
+import socketserver
+import threading
 import time
 import unittest
+import unittest.mock
+from http import HTTPStatus
+from datetime import timedelta
 from unittest.mock import MagicMock
 
 from freezegun import freeze_time
 
-from muselog.datadog import DataDogUdpHandler, DatadogJSONFormatter
+from muselog import attributes, context, records, util
+from muselog.datadog import DataDogHttpHandler, DataDogTcpHandler, DataDogUdpHandler, DatadogJSONFormatter
+from muselog.logger import get_logger_with_context
+from muselog.truncation import TRUNCATION_MARKER
 
 from .support import ClearContext
 
@@ -36,6 +48,81 @@ class DataDogTestLoggingTestCase(ClearContext, unittest.TestCase):
             self.assertEqual(True, self.handler.send.called)
             self.assertEqual(cm.output, ['WARNING:datadog:Datadog msg'])
 
+    def test_sends_attributes_with_traceback_text(self):
+        self.handler.send = MagicMock(name='send')
+        self.logger.addHandler(self.handler)
+        try:
+            raise ValueError("failure")
+        except ValueError:
+            self.logger.error("Failed", exc_info=True)
+
+        sent = json.loads(self.handler.send.call_args.args[0])
+        self.assertEqual(sent["msg"], "Failed")
+        self.assertIn("ValueError: failure", sent["exc_text"])
+
+    def test_sends_datadog_json_formatter_output(self):
+        formatter = DatadogJSONFormatter()
+        self.handler.setFormatter(formatter)
+        self.handler.send = MagicMock(name='send')
+        self.logger.addHandler(self.handler)
+        self.logger.warning("Datadog msg", extra={"ctx": {"n": 1}})
+
+        sent = json.loads(self.handler.send.call_args.args[0])
+        self.assertEqual(sent["message"], "Datadog msg")
+        self.assertEqual(sent["severity"], "WARNING")
+        self.assertEqual(sent["ctx"], {"n": 1})
+
+
+class SharedFormatterTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.logger = logging.getLogger("test.datadog.shared")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.addCleanup(setattr, self.logger, "handlers", [])
+
+    def test_formats_once_for_handlers_sharing_formatter(self):
+        formatter = DatadogJSONFormatter()
+        outputs = [io.StringIO(), io.StringIO()]
+        for output in outputs:
+            handler = logging.StreamHandler(output)
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+
+        with unittest.mock.patch.object(formatter, "json_record", wraps=formatter.json_record) as json_record:
+            self.logger.info("first")
+            self.logger.info("second")
+
+        self.assertEqual(json_record.call_count, 2)
+        self.assertEqual(outputs[0].getvalue(), outputs[1].getvalue())
+        self.assertEqual([json.loads(line)["message"] for line in outputs[1].getvalue().splitlines()],
+                         ["first", "second"])
+
+    def test_formats_each_record(self):
+        formatter = DatadogJSONFormatter()
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "same", (), None)
+        same = logging.LogRecord("test", logging.INFO, __file__, 1, "same", (), None)
+        same.custom = 1
+        self.assertEqual(formatter.format(record), formatter.format(record))
+        self.assertEqual(json.loads(formatter.format(same))["custom"], 1)
+
+    def test_forget_last(self):
+        formatter = DatadogJSONFormatter()
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "same", (), None)
+        formatter.format(record)
+        record.custom = 1
+        self.assertNotIn("custom", json.loads(formatter.format(record)))
+        formatter.forget_last()
+        self.assertEqual(json.loads(formatter.format(record))["custom"], 1)
+
+    def test_formats_slotted_records_once(self):
+        formatter = DatadogJSONFormatter()
+        record = records.SlottedLogRecord("test", logging.INFO, __file__, 1, "slotted", (), None)
+        with unittest.mock.patch.object(formatter, "json_record", wraps=formatter.json_record) as json_record:
+            self.assertEqual(formatter.format(record), formatter.format(record))
+        self.assertEqual(json_record.call_count, 1)
+
 
 class InjectTraceValuesTestCase(ClearContext, unittest.TestCase):
     """Tests code related to injecting logs with a trace and span id."""
@@ -148,3 +235,612 @@ class InjectTraceValuesTestCase(ClearContext, unittest.TestCase):
 
         self.assertNotIn("dd.trace_id", output)
         self.assertNotIn("dd.span_id", output)
+
+
+class RecordBudgetTestCase(ClearContext, unittest.TestCase):
+    """Tests the size budgets of the Datadog formatter."""
+
+    def setUp(self):
+        self.output = io.StringIO()
+        self.logger = logging.getLogger("test.budget")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+        self.handler = logging.StreamHandler(self.output)
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.output.close()
+
+    def log(self, formatter, *args, **kwargs):
+        self.handler.setFormatter(formatter)
+        self.logger.info(*args, **kwargs)
+        return json.loads(self.output.getvalue())
+
+    def test_small_record_untouched(self):
+        output = self.log(DatadogJSONFormatter(), "small", extra={"ctx": {"a": 1}})
+        self.assertEqual(output["message"], "small")
+        self.assertEqual(output["ctx"], {"a": 1})
+        self.assertNotIn("tm.logger.truncated", output)
+
+    def test_field_budget(self):
+        formatter = DatadogJSONFormatter(max_field_size=1000, max_record_size=0)
+        output = self.log(formatter, "%s", "m" * 5000, extra={"payload": ["p" * 100] * 1000})
+
+        self.assertTrue(output["message"].endswith(TRUNCATION_MARKER))
+        self.assertLessEqual(len(output["message"]), 1000)
+        self.assertEqual(output["payload"][-1], TRUNCATION_MARKER)
+        self.assertIn("message", output["tm.logger.truncated"])
+        self.assertIn("payload", output["tm.logger.truncated"])
+        self.assertEqual(output["logger.name"], "test.budget")
+
+    def test_record_budget(self):
+        formatter = DatadogJSONFormatter(max_field_size=0, max_record_size=20000)
+        self.handler.setFormatter(formatter)
+        self.logger.info("big", extra={"one": "a" * 50000, "two": "b" * 50000})
+
+        line = self.output.getvalue()
+        self.assertLess(len(line), 20000)
+        output = json.loads(line)
+        self.assertTrue(output["one"].endswith(TRUNCATION_MARKER))
+        self.assertTrue(output["two"].endswith(TRUNCATION_MARKER))
+        self.assertEqual(output["message"], "big")
+        self.assertEqual(output["severity"], "INFO")
+
+    def test_ctx_items(self):
+        formatter = DatadogJSONFormatter(max_ctx_items=3)
+        output = self.log(formatter, "ctx", extra={"ctx": {f"k{i}": i for i in range(10)}})
+
+        self.assertEqual(output["ctx"], {"k0": 0, "k1": 1, "k2": 2, TRUNCATION_MARKER: 7})
+        self.assertEqual(output["tm.logger.truncated"], ["ctx"])
+
+    def test_budgets_from_environment(self):
+        with unittest.mock.patch.dict("os.environ", {"DATADOG_MAX_FIELD_SIZE": "50"}):
+            formatter = DatadogJSONFormatter()
+        self.assertEqual(formatter.max_field_size, 50)
+
+
+class _CountingValue:
+    """Bound value that counts how often it is encoded."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def to_json(self):
+        self.encoded += 1
+        return timedelta(seconds=1)
+
+
+class _RebindingValue:
+    """Bound value that, the first time it is encoded, changes the bound context, as another thread sharing it could."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def to_json(self):
+        self.encoded += 1
+        if self.encoded == 1:
+            context.bind(request_id="def")
+        return "value"
+
+
+class BoundContextEncodingTestCase(ClearContext, unittest.TestCase):
+    """Tests reuse of the encoding of bound context."""
+
+    def setUp(self):
+        self.output = io.StringIO()
+        self.logger = logging.getLogger("test.bound")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = logging.StreamHandler(self.output)
+        self.handler.setFormatter(DatadogJSONFormatter())
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.output.close()
+        super().tearDown()
+
+    def lines(self):
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_bound_context_encoded_once(self):
+        value = _CountingValue()
+        context.bind(request_id="abc", value=value)
+        logger = get_logger_with_context(self.logger, user=5)
+        for i in range(3):
+            logger.info("Test", attempt=i)
+
+        self.assertEqual(value.encoded, 1)
+        self.assertEqual([line["ctx"] for line in self.lines()], [
+            dict(request_id="abc", value="0:00:01", user=5, attempt=i) for i in range(3)
+        ])
+
+        context.bind(other=1)
+        logger.info("Test")
+        self.assertEqual(value.encoded, 2)
+        self.assertEqual(self.lines()[-1]["ctx"], dict(request_id="abc", value="0:00:01", other=1, user=5))
+
+    def test_same_as_generic_encoding(self):
+        context.bind(request_id="abc")
+        logger = get_logger_with_context(self.logger, user=5)
+        record = self.logger.makeRecord(self.logger.name, logging.INFO, "", 0, "Test", (), None,
+                                        extra=logger.process("Test", dict(attempt=1))[1]["extra"])
+        formatter = DatadogJSONFormatter()
+        spliced = formatter.format(record)
+        record.ctx = dict(record.ctx)
+        generic = formatter.format(record)
+
+        self.assertEqual(json.loads(spliced), json.loads(generic))
+        self.assertTrue(spliced.endswith('"ctx": {"request_id": "abc", "user": 5, "attempt": 1}}'))
+
+    def test_overridden_keys(self):
+        context.bind(user="global")
+        logger = get_logger_with_context(self.logger, user="logger", request_id="abc")
+        logger.info("Test")
+        logger.info("Test", request_id="call")
+
+        self.assertEqual([line["ctx"] for line in self.lines()], [
+            dict(user="logger", request_id="abc"),
+            dict(user="logger", request_id="call"),
+        ])
+
+    def test_changes_after_record_made(self):
+        context.bind(request_id="abc")
+        logger = get_logger_with_context(self.logger)
+        self.handler.addFilter(lambda record: record.ctx.update(added=True) or True)
+        records = []
+        self.logger.addFilter(lambda record: records.append(record) or True)
+        self.logger.removeHandler(self.handler)
+        logger.info("Test")
+        context.bind(request_id="def")
+        self.handler.handle(records[0])
+
+        self.assertEqual(self.lines()[0]["ctx"], dict(request_id="abc", added=True))
+
+    def test_changed_bound_context(self):
+        context.bind(request_id="abc")
+        logger = get_logger_with_context(self.logger)
+        records = []
+        self.logger.addFilter(lambda record: records.append(record) or True)
+        self.logger.removeHandler(self.handler)
+        logger.info("Test")
+        context.unbind("request_id")
+        self.handler.handle(records[0])
+
+        self.assertEqual(self.lines()[0]["ctx"], dict(request_id="abc"))
+
+    def test_bound_context_changed_while_encoded(self):
+        context.bind(request_id="abc", value=_RebindingValue())
+        logger = get_logger_with_context(self.logger)
+        logger.info("Test")
+        logger.info("Test")
+
+        self.assertEqual([line["ctx"]["request_id"] for line in self.lines()], ["abc", "def"])
+
+    def test_budget(self):
+        context.bind(payload="p" * 5000)
+        self.handler.setFormatter(DatadogJSONFormatter(max_field_size=1000, max_record_size=0))
+        get_logger_with_context(self.logger).info("Test")
+
+        output = self.lines()[0]
+        self.assertTrue(output["ctx"]["payload"].endswith(TRUNCATION_MARKER))
+        self.assertEqual(output["tm.logger.truncated"], ["ctx"])
+
+
+class AccessLogEncoderTestCase(ClearContext, unittest.TestCase):
+    """Tests the fast path for access logs against the generic one."""
+
+    def access_log(self, status_code=200, user_id=None, phases=None, headers=None):
+        network_attrs = attributes.NetworkAttributes(lambda _: None, remote_addr="10.0.0.1:5000", bytes_written=12)
+        http_attrs = attributes.HttpAttributes((headers or {}).get, "https://example.com/ok?q=1", "GET", status_code)
+        with self.assertLogs("muselog.util") as cm:
+            util.log_request("/ok", 0.25, network_attrs, http_attrs, user_id=user_id, phases=phases)
+        return cm.records[0]
+
+    def assertSameAsGeneric(self, record, formatter=None):
+        formatter = formatter or DatadogJSONFormatter()
+        encoded = formatter._access_logs.encode(record)
+        self.assertIsNotNone(encoded)
+        generic = DatadogJSONFormatter(trace_enabled=formatter.trace_enabled)
+        generic._access_logs = None
+        self.assertEqual(encoded, generic.format(record))
+        self.assertEqual(encoded, formatter.format(record))
+
+    def test_minimal(self):
+        record = self.access_log()
+        self.assertSameAsGeneric(record)
+        # As when only the Datadog formatter sees the record.
+        del record.message
+        self.assertSameAsGeneric(record)
+
+    def test_all_fields(self):
+        context.bind(request_id="abc", tenant="t\u00e9st")
+        headers = {"User-Agent": "Agent \"quoted\" \u2603", "Referer": "https://example.com/\n"}
+        with unittest.mock.patch.object(util, "REQUEST_PHASES", True):
+            record = self.access_log(HTTPStatus.NOT_FOUND, user_id=7, phases=dict(handler=5, total=9), headers=headers)
+        record.asctime = "2026-10-19 12:00:00,000"
+        self.assertSameAsGeneric(record)
+
+    def test_slotted_records(self):
+        context.bind(request_id="abc")
+        records.install()
+        try:
+            record = self.access_log(user_id="u1")
+        finally:
+            records.install(False)
+        self.assertIsInstance(record, records.SlottedLogRecord)
+        self.assertSameAsGeneric(record)
+
+    def test_trace_ids(self):
+        self.assertSameAsGeneric(self.access_log(), DatadogJSONFormatter(trace_enabled=True))
+
+    def test_generic_fallbacks(self):
+        formatter = DatadogJSONFormatter()
+        record = self.access_log()
+        record.custom = "unexpected"
+        self.assertIsNone(formatter._access_logs.encode(record))
+
+        record = self.access_log()
+        setattr(record, "http.extra", object())
+        self.assertIsNone(formatter._access_logs.encode(record))
+
+        record = self.access_log(headers={"User-Agent": "a" * 1000})
+        self.assertIsNone(DatadogJSONFormatter(max_field_size=500)._access_logs.encode(record))
+
+        context.bind(**{f"k{i}": i for i in range(5)})
+        record = self.access_log()
+        self.assertIsNone(DatadogJSONFormatter(max_ctx_items=3)._access_logs.encode(record))
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = self.access_log(500)
+        self.assertIsNone(formatter._access_logs.encode(record))
+        self.assertEqual(json.loads(formatter.format(record))["error.kind"], "ValueError")
+
+    def test_overridden_formatter(self):
+        class CustomFormatter(DatadogJSONFormatter):
+            def json_record(self, message, record):
+                record_dict = super().json_record(message, record)
+                record_dict["custom"] = True
+                return record_dict
+
+        self.assertIsNone(CustomFormatter()._access_logs)
+        self.assertTrue(json.loads(CustomFormatter().format(self.access_log()))["custom"])
+
+
+class RepeatedExceptionTestCase(ClearContext, unittest.TestCase):
+    """Tests suppression of repeated exception stacks."""
+
+    def setUp(self):
+        self.output = io.StringIO()
+        self.logger = logging.getLogger("test.repeats")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+        self.handler = logging.StreamHandler(self.output)
+        self.handler.setFormatter(DatadogJSONFormatter(exc_repeat_window=60))
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.output.close()
+
+    def test_repeats_omit_stack(self):
+        for i in range(3):
+            try:
+                raise ValueError(f"failure {i}")
+            except ValueError:
+                self.logger.exception("Dependency failed")
+
+        outputs = [json.loads(line) for line in self.output.getvalue().splitlines()]
+        self.assertEqual(len(outputs), 3)
+        self.assertIn("error.stack", outputs[0])
+        self.assertNotIn("error.repeat_count", outputs[0])
+        fingerprint = outputs[0]["error.fingerprint"]
+        for count, output in enumerate(outputs[1:], start=2):
+            self.assertNotIn("error.stack", output)
+            self.assertEqual(output["error.fingerprint"], fingerprint)
+            self.assertEqual(output["error.repeat_count"], count)
+            self.assertEqual(output["error.kind"], "ValueError")
+            self.assertEqual(output["error.message"], f"failure {count - 1}")
+
+    def test_disabled_by_default(self):
+        self.handler.setFormatter(DatadogJSONFormatter())
+        for _ in range(2):
+            try:
+                raise ValueError("failure")
+            except ValueError:
+                self.logger.exception("Dependency failed")
+
+        outputs = [json.loads(line) for line in self.output.getvalue().splitlines()]
+        self.assertIn("error.stack", outputs[1])
+        self.assertNotIn("error.fingerprint", outputs[1])
+
+
+class _AgentStandIn(socketserver.ThreadingTCPServer):
+    """Local TCP server that collects the lines it receives, like the agent's TCP input."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0):
+        self.lines = []
+        self.connections = []
+        self.received = threading.Condition()
+        super().__init__(("127.0.0.1", port), _AgentRequestHandler)
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    def wait_for_lines(self, count, timeout=5):
+        with self.received:
+            return self.received.wait_for(lambda: len(self.lines) >= count, timeout)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        for connection in self.connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _AgentRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        self.server.connections.append(self.connection)
+        for line in self.rfile:
+            with self.server.received:
+                self.server.lines.append(json.loads(line))
+                self.server.received.notify_all()
+
+
+class DataDogTcpHandlerTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agent = _AgentStandIn()
+        self.port = self.agent.server_address[1]
+        self.logger = logging.getLogger("test.datadog.tcp")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.agent.stop()
+        super().tearDown()
+
+    def make_handler(self, **kwargs):
+        handler = DataDogTcpHandler("127.0.0.1", self.port, linger=0.01, **kwargs)
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_sends_json_lines(self):
+        handler = self.make_handler()
+        for i in range(100):
+            self.logger.info("record %d", i, extra={"ctx": {"i": i}})
+        handler.flush()
+
+        self.assertTrue(self.agent.wait_for_lines(100))
+        self.assertEqual([line["message"] for line in self.agent.lines], [f"record {i}" for i in range(100)])
+        self.assertEqual(self.agent.lines[5]["ctx"], {"i": 5})
+        self.assertEqual(handler.dropped, 0)
+        self.assertEqual(handler.reconnects, 0)
+
+    def test_reconnects_after_agent_restart(self):
+        handler = self.make_handler(backoff_base=0.01)
+        self.logger.info("before")
+        self.assertTrue(self.agent.wait_for_lines(1))
+
+        self.agent.stop()
+        self.agent = _AgentStandIn(self.port)
+        # The first write after the restart may land on the dead connection; keep logging until one arrives.
+        deadline = time.monotonic() + 5
+        while not self.agent.wait_for_lines(1, timeout=0.05) and time.monotonic() < deadline:
+            self.logger.info("after")
+        self.assertEqual(self.agent.lines[0]["message"], "after")
+        self.assertEqual(handler.reconnects, 1)
+
+    def test_forked_child_sends_its_own_records(self):
+        handler = self.make_handler()
+        self.logger.info("parent")
+        self.assertTrue(self.agent.wait_for_lines(1))
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.logger.info("child")
+                handler.flush()
+                os._exit(0 if not handler._pending and not handler._in_flight else 1)
+            finally:
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        self.logger.info("parent again")
+        handler.flush()
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertTrue(self.agent.wait_for_lines(3))
+        self.assertEqual(sorted(line["message"] for line in self.agent.lines), ["child", "parent", "parent again"])
+        # The child connected on its own, and the parent kept its connection.
+        self.assertEqual(len(self.agent.connections), 2)
+        self.assertEqual(handler.reconnects, 0)
+
+    def test_drops_when_buffer_full(self):
+        # Nothing listens on this port.
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        handler = self.make_handler(max_buffer_size=2000, timeout=0.2)
+
+        started = time.monotonic()
+        for i in range(100):
+            self.logger.info("record %d", i)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertGreater(handler.dropped, 0)
+
+        started = time.monotonic()
+        handler.close()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(handler.dropped, 100)
+
+
+class _IntakeStandIn(http.server.ThreadingHTTPServer):
+    """Local HTTP server that collects posted batches, like a log intake endpoint."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        self.batches = []
+        self.headers = []
+        self.clients = set()
+        #: Statuses to answer with, in order, before answering 202.
+        self.statuses = []
+        self.received = threading.Condition()
+        super().__init__(("127.0.0.1", 0), _IntakeRequestHandler)
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v2/logs"
+
+    def wait_for_records(self, count, timeout=5):
+        with self.received:
+            return self.received.wait_for(lambda: sum(len(b) for b in self.batches) >= count, timeout)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _IntakeRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.received:
+            status = self.server.statuses.pop(0) if self.server.statuses else 202
+            if status == 202:
+                self.server.batches.append(json.loads(gzip.decompress(body)))
+                self.server.headers.append(dict(self.headers))
+                self.server.clients.add(self.client_address)
+                self.server.received.notify_all()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class DataDogHttpHandlerTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.intake = _IntakeStandIn()
+        self.logger = logging.getLogger("test.datadog.http")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.intake.stop()
+        super().tearDown()
+
+    def make_handler(self, **kwargs):
+        kwargs.setdefault("linger", 0.01)
+        handler = DataDogHttpHandler(self.intake.url, api_key="key", backoff_base=0.01, **kwargs)
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_batches(self):
+        handler = self.make_handler(batch_size=10, linger=1)
+        for i in range(25):
+            self.logger.info("record %d", i)
+        handler.flush()
+
+        self.assertTrue(self.intake.wait_for_records(25))
+        self.assertEqual([len(batch) for batch in self.intake.batches], [10, 10, 5])
+        self.assertEqual([r["message"] for b in self.intake.batches for r in b], [f"record {i}" for i in range(25)])
+        headers = self.intake.headers[0]
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Content-Type"], "application/json")
+        self.assertEqual(headers["DD-API-KEY"], "key")
+        # One keep-alive connection for all requests.
+        self.assertEqual(len(self.intake.clients), 1)
+
+    def test_batch_bytes(self):
+        handler = self.make_handler(batch_bytes=1000, linger=1)
+        for i in range(10):
+            self.logger.info("x" * 300)
+        handler.flush()
+        self.assertTrue(self.intake.wait_for_records(10))
+        self.assertTrue(all(len(batch) <= 2 for batch in self.intake.batches))
+
+    def test_retries(self):
+        self.intake.statuses = [503, 429, 500]
+        handler = self.make_handler()
+        self.logger.info("eventually")
+        handler.flush()
+
+        self.assertTrue(self.intake.wait_for_records(1))
+        self.assertEqual(self.intake.batches, [[unittest.mock.ANY]])
+        self.assertEqual(handler.retries, 3)
+        self.assertEqual(handler.dropped, 0)
+
+    def test_drops_rejected_and_exhausted_batches(self):
+        self.intake.statuses = [400, 503, 503, 503]
+        handler = self.make_handler(max_retries=2)
+        self.logger.info("rejected")
+        handler.flush()
+        self.logger.info("exhausted")
+        handler.flush()
+        self.logger.info("delivered")
+        handler.flush()
+
+        self.assertTrue(self.intake.wait_for_records(1))
+        self.assertEqual(self.intake.batches[0][0]["message"], "delivered")
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual(handler.retries, 2)
+
+    def test_forked_child_posts_its_own_records(self):
+        handler = self.make_handler()
+        self.logger.info("parent")
+        handler.flush()
+        self.assertTrue(self.intake.wait_for_records(1))
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.logger.info("child")
+                handler.flush()
+                os._exit(0 if not handler._pending and not handler._in_flight else 1)
+            finally:
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        self.logger.info("parent again")
+        handler.flush()
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertTrue(self.intake.wait_for_records(3))
+        self.assertEqual(sorted(r["message"] for b in self.intake.batches for r in b), ["child", "parent", "parent again"])
+        # The child opened its own connection; the parent kept its keep-alive connection.
+        self.assertEqual(len(self.intake.clients), 2)
+        self.assertEqual(handler.retries, 0)
+
+    def test_bounded_close(self):
+        self.intake.stop()
+        handler = self.make_handler(timeout=0.5)
+        handler.backoff_base = 10
+        self.logger.info("lost")
+        time.sleep(0.1)
+
+        started = time.monotonic()
+        handler.close()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(handler.dropped, 1)
@@ -1,13 +1,24 @@
-import time
+import asyncio
+import json
 import unittest
 from unittest.mock import Mock
 
+import django
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from freezegun import freeze_time
 
+from muselog import context, routes, util
+from muselog.datadog import DatadogJSONFormatter
 from muselog.django import MuseDjangoRequestLoggingMiddleware
+from muselog.redaction import Redactor
+from muselog.routes import RouteRule
 
 from .support import ClearContext
 
+if not settings.configured:
+    settings.configure()
+
 
 class MuseDjangoRequestLoggingMiddlewareTestCase(ClearContext, unittest.TestCase):
 
@@ -15,6 +26,7 @@ class MuseDjangoRequestLoggingMiddlewareTestCase(ClearContext, unittest.TestCase
         super().setUp()
         self.response = Mock()
         self.response.tell.return_value = 4
+        self.response.streaming = False
         self.request = self.get_mock_request()
 
         def get_response():
@@ -24,7 +36,6 @@ class MuseDjangoRequestLoggingMiddlewareTestCase(ClearContext, unittest.TestCase
 
     def get_mock_request(self):
         request = Mock()
-        request.started_at = 0
         request.META = {
             "HTTP_X_FORWARDED_FOR": "ip1, ip2",
             "REMOTE_ADDR": "ip3"
@@ -36,11 +47,12 @@ class MuseDjangoRequestLoggingMiddlewareTestCase(ClearContext, unittest.TestCase
     def test_process_request(self):
         with freeze_time("2019-04-05 20:00:02"):
             self.middleware.process_request(self.request)
-            self.assertEqual(self.request.started_at, time.time())
+            self.assertIsInstance(self.request.muselog_timer, util.RequestTimer)
+            self.assertEqual(self.request.muselog_timer.phases(), {"before_hooks": 0, "total": 0})
 
     def test_process_response(self):
         with freeze_time("2019-04-05 20:00:02"):
-            self.request.started_at = time.time()
+            self.request.muselog_timer = util.RequestTimer()
 
         self.response.status_code = 200
 
@@ -59,3 +71,87 @@ class MuseDjangoRequestLoggingMiddlewareTestCase(ClearContext, unittest.TestCase
                 self.assertEqual(record["http.url"], "http://localhost/?someparam=5")
                 self.assertEqual(record["http.method"], "GET")
                 self.assertEqual(record["http.status_code"], 200)
+
+    def test_process_response_skipped_route(self):
+        routes.configure([RouteRule("/health", action="skip")])
+        self.addCleanup(routes.configure, [])
+        context.bind(request_id="abc")
+
+        self.request.path = "/health"
+        self.request.muselog_timer = util.RequestTimer()
+        self.response.status_code = 200
+
+        with self.assertNoLogs("muselog.util"):
+            self.middleware.process_response(self.request, self.response)
+        self.request.get_raw_uri.assert_not_called()
+        self.assertIsNone(context.get("request_id"))
+
+    def test_streaming_response(self):
+        chunks = iter([b"x" * 1000, b"y" * 500])
+        response = StreamingHttpResponse(chunks)
+        self.middleware.process_request(self.request)
+        request_id = context.get("request_id")
+
+        with self.assertNoLogs("muselog.util"):
+            self.middleware.process_response(self.request, response)
+        self.assertIsNone(context.get("request_id"))
+
+        with self.assertLogs("muselog.util") as cm:
+            self.assertEqual(b"".join(response), b"x" * 1000 + b"y" * 500)
+            response.close()
+
+        # Logged once, when the stream was exhausted, with the request's context.
+        self.assertEqual(len(cm.records), 1)
+        record = cm.records[0].__dict__
+        self.assertEqual(record["network.bytes_written"], 1500)
+        self.assertEqual(record["http.status_code"], 200)
+        self.assertEqual(record["http.request_id"], request_id)
+        self.assertIsNone(context.get("request_id"))
+
+    @unittest.skipUnless(django.VERSION >= (4, 2), "requires asynchronous streaming responses")
+    def test_async_streaming_response(self):
+        async def chunks():
+            yield b"x" * 1000
+            yield b"y" * 500
+
+        async def consume(response):
+            return b"".join([chunk async for chunk in response])
+
+        response = StreamingHttpResponse(chunks())
+        self.middleware.process_request(self.request)
+        self.middleware.process_response(self.request, response)
+        self.assertTrue(response.is_async)
+
+        with self.assertLogs("muselog.util") as cm:
+            # As Django's ASGI handler serves it.
+            self.assertEqual(asyncio.run(consume(response)), b"x" * 1000 + b"y" * 500)
+            response.close()
+
+        self.assertEqual(len(cm.records), 1)
+        self.assertEqual(cm.records[0].__dict__["network.bytes_written"], 1500)
+
+    def test_streaming_response_closed_early(self):
+        response = StreamingHttpResponse(iter([b"x" * 1000, b"y" * 500]))
+        self.middleware.process_request(self.request)
+        self.middleware.process_response(self.request, response)
+
+        with self.assertLogs("muselog.util") as cm:
+            next(iter(response))
+            response.close()
+        self.assertEqual(len(cm.records), 1)
+        self.assertEqual(cm.records[0].__dict__["network.bytes_written"], 1000)
+
+    def test_redacts_secret_query_parameters(self):
+        self.request.path = "/reset"
+        self.request.get_full_path.return_value = "/reset?token=abc"
+        self.request.get_raw_uri.return_value = "http://localhost/reset?token=abc"
+        del self.request.user
+        self.request.muselog_timer = util.RequestTimer()
+        self.response.status_code = 200
+
+        with self.assertLogs("muselog.util") as cm:
+            self.middleware.process_response(self.request, self.response)
+
+        formatted = DatadogJSONFormatter(redactor=Redactor()).format(cm.records[0])
+        self.assertNotIn("abc", formatted)
+        self.assertEqual(json.loads(formatted)["http.url"], "http://localhost/reset?token=[REDACTED]")
@@ -0,0 +1,75 @@
+import asyncio
+import multiprocessing
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from muselog import context
+from muselog.executors import (ContextProcessPoolExecutor, ContextThreadPoolExecutor, run_in_executor,
+                               with_context, with_context_for_process)
+
+from .support import ClearContext
+
+
+def get_context(key="request_id"):
+    return context.get(key)
+
+
+class WithContextTestCase(ClearContext, unittest.TestCase):
+
+    def test_snapshot_at_wrap_time(self):
+        context.bind(request_id="abc")
+        task = with_context(get_context)
+        context.bind(request_id="def")
+
+        with ThreadPoolExecutor(1) as executor:
+            before = executor.submit(context.copy).result()
+            self.assertEqual(executor.submit(task).result(), "abc")
+            # The worker is left as it was.
+            self.assertEqual(executor.submit(context.copy).result(), before)
+
+    def test_worker_binds_do_not_leak(self):
+        context.bind(request_id="abc")
+
+        def bind_more():
+            context.bind(user="x")
+            return context.copy()
+
+        with ThreadPoolExecutor(1) as executor:
+            self.assertEqual(executor.submit(with_context(bind_more)).result(), {"request_id": "abc", "user": "x"})
+            self.assertIsNone(executor.submit(get_context, "user").result())
+        self.assertEqual(context.copy(), {"request_id": "abc"})
+
+    def test_process_task_is_compact_and_picklable(self):
+        context.bind(request_id="abc", obj=object())
+        task = pickle.loads(pickle.dumps(with_context_for_process(get_context)))
+        context.clear()
+        self.assertIsInstance(task.ctx, bytes)
+        self.assertEqual(task(), "abc")
+        self.assertEqual(task("obj")["__name__"], "object")
+        self.assertEqual(context.copy(), {})
+
+    def test_empty_context(self):
+        self.assertIsNone(with_context_for_process(get_context).ctx)
+
+
+class ContextExecutorTestCase(ClearContext, unittest.TestCase):
+
+    def test_thread_pool(self):
+        context.bind(request_id="abc")
+        with ContextThreadPoolExecutor(2) as executor:
+            self.assertEqual(executor.submit(get_context).result(), "abc")
+            self.assertEqual(list(executor.map(get_context, ["request_id"] * 3)), ["abc"] * 3)
+
+    def test_process_pool(self):
+        context.bind(request_id="abc")
+        with ContextProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            self.assertEqual(executor.submit(get_context).result(), "abc")
+            self.assertEqual(list(executor.map(get_context, ["request_id"] * 3)), ["abc"] * 3)
+
+    def test_run_in_executor(self):
+        async def main():
+            context.bind(request_id="abc")
+            return await run_in_executor(None, get_context)
+
+        self.assertEqual(asyncio.run(main()), "abc")
@@ -0,0 +1,212 @@
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+from muselog.files import RotatingFileHandler
+
+from .support import ClearContext
+
+
+class RotatingFileHandlerTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.filename = os.path.join(self.directory, "app.log")
+        self.logger = logging.getLogger("test.files")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.addCleanup(setattr, self.logger, "handlers", [])
+
+    def make_handler(self, **kwargs):
+        handler = RotatingFileHandler(self.filename, linger=0.01, **kwargs)
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def segments(self):
+        # Oldest first: by time of rotation, then by number, for rotations within the same second.
+        names = [name for name in os.listdir(self.directory) if name != "app.log"]
+        return sorted(names, key=lambda name: [int(part) for part in re.findall(r"\d+", name)])
+
+    def read_lines(self, name):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            return f.read().splitlines()
+
+    def messages(self):
+        lines = []
+        for name in self.segments() + ["app.log"]:
+            lines += self.read_lines(name)
+        return [json.loads(line)["message"] for line in lines]
+
+    def test_appends_json_lines(self):
+        handler = self.make_handler()
+        for i in range(100):
+            self.logger.info("record %d", i)
+        handler.flush()
+
+        self.assertEqual(self.messages(), [f"record {i}" for i in range(100)])
+        self.assertEqual(handler.dropped, 0)
+        self.assertEqual(self.segments(), [])
+
+    def test_rotates_by_size_and_compresses(self):
+        handler = self.make_handler(max_bytes=2000, batch_size=500, backup_count=0)
+        for i in range(50):
+            self.logger.info("record %d", i)
+            handler.flush()
+        handler.close()
+
+        self.assertGreater(handler.rotations, 1)
+        self.assertEqual(len(self.segments()), handler.rotations)
+        self.assertTrue(all(name.endswith(".gz") for name in self.segments()))
+        self.assertEqual(self.messages(), [f"record {i}" for i in range(50)])
+        self.assertLessEqual(os.path.getsize(self.filename), 2000)
+
+    def test_keeps_newest_segments(self):
+        handler = self.make_handler(max_bytes=500, batch_size=100, backup_count=2, compress=False)
+        for i in range(30):
+            self.logger.info("record %d", i)
+            handler.flush()
+        handler.close()
+
+        self.assertGreater(handler.rotations, 2)
+        self.assertEqual(len(self.segments()), 2)
+        self.assertEqual(self.messages()[-1], "record 29")
+
+    def test_resumes_existing_file(self):
+        with open(self.filename, "w") as f:
+            f.write('{"message": "before"}\n{"message": "cut sho')
+        handler = self.make_handler()
+        self.logger.info("after")
+        handler.flush()
+
+        with open(self.filename) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[:2], ['{"message": "before"}', '{"message": "cut sho'])
+        self.assertEqual(json.loads(lines[2])["message"], "after")
+
+    def test_rotates_file_from_earlier_interval(self):
+        with open(self.filename, "w") as f:
+            f.write('{"message": "yesterday"}\n')
+        day_ago = time.time() - 86400
+        os.utime(self.filename, (day_ago, day_ago))
+        handler = self.make_handler(rotate_interval=3600)
+        self.logger.info("today")
+        handler.close()
+
+        self.assertEqual(handler.rotations, 1)
+        (segment,) = self.segments()
+        self.assertEqual(self.read_lines(segment), ['{"message": "yesterday"}'])
+        self.assertEqual(self.messages(), ["yesterday", "today"])
+
+    def test_compresses_segments_left_by_previous_process(self):
+        with open(self.filename + ".20240101T000000", "w") as f:
+            f.write('{"message": "old"}\n')
+        handler = self.make_handler()
+        handler.close()
+
+        self.assertEqual(self.segments(), ["app.log.20240101T000000.gz"])
+        self.assertEqual(self.read_lines("app.log.20240101T000000.gz"), ['{"message": "old"}'])
+
+    def test_retries_failed_write_whole(self):
+        handler = self.make_handler(backoff_base=0.01)
+        real_write = os.write
+        calls = []
+
+        def failing_write(fd, data):
+            calls.append(len(data))
+            if len(calls) == 1:
+                # Part of the batch lands before the failure.
+                real_write(fd, bytes(data[:10]))
+                raise OSError(28, "No space left on device")
+            return real_write(fd, data)
+
+        with unittest.mock.patch("muselog.files.os.write", failing_write):
+            self.logger.info("first")
+            self.logger.info("second")
+            handler.flush()
+
+        self.assertGreater(len(calls), 1)
+        self.assertEqual(self.messages(), ["first", "second"])
+
+    def fork(self, child):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child()
+                os._exit(0)
+            finally:
+                os._exit(1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+    def test_forked_child_writes_its_own_records(self):
+        handler = self.make_handler(fsync_interval=10)
+        self.logger.info("parent")
+        handler.flush()
+
+        def child():
+            # Nothing of the parent's is left to sync, and the child has a writer of its own.
+            assert not handler._unsynced and handler._writer.is_alive() and handler._compressor.is_alive()
+            self.logger.info("child")
+            handler.flush()
+            assert not handler._pending and not handler._in_flight
+
+        self.fork(child)
+        self.logger.info("parent again")
+        handler.close()
+
+        self.assertEqual(self.messages(), ["parent", "child", "parent again"])
+
+    def test_follows_rotation_by_forked_child(self):
+        handler = self.make_handler(max_bytes=3000, batch_size=100, backup_count=0, compress=False)
+        self.logger.info("parent")
+        handler.flush()
+
+        def child():
+            for i in range(20):
+                self.logger.info("child %d", i)
+                handler.flush()
+            handler.close()
+
+        self.fork(child)
+        self.logger.info("parent again")
+        handler.close()
+
+        self.assertGreater(len(self.segments()), 0)
+        self.assertEqual(self.messages(), ["parent"] + [f"child {i}" for i in range(20)] + ["parent again"])
+        self.assertLessEqual(os.path.getsize(self.filename), 3000)
+        # Not into the segment the child rotated the parent's file to.
+        self.assertEqual(json.loads(self.read_lines("app.log")[-1])["message"], "parent again")
+
+    def test_syncs_once_idle(self):
+        handler = self.make_handler(fsync_interval=0.3)
+        real_fsync = os.fsync
+        synced = []
+
+        def counting_fsync(fd):
+            synced.append(time.monotonic())
+            real_fsync(fd)
+
+        with unittest.mock.patch("muselog.files.os.fsync", counting_fsync):
+            # The first write is synced right away; the next one, within the interval, is not.
+            self.logger.info("first")
+            handler.flush()
+            self.logger.info("second")
+            handler.flush()
+            written = time.monotonic()
+            self.assertEqual(len(synced), 1)
+            time.sleep(0.6)
+
+        self.assertEqual(len(synced), 2)
+        self.assertLess(synced[1] - written, 0.5)
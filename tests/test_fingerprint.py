@@ -0,0 +1,74 @@
+import unittest
+
+from muselog.fingerprint import RepeatSuppressor, fingerprint
+
+
+def _raise(exc: BaseException):
+    raise exc
+
+
+def _capture(fn, *args):
+    try:
+        fn(*args)
+    except BaseException as e:
+        return type(e), e, e.__traceback__
+
+
+class FingerprintTestCase(unittest.TestCase):
+
+    def test_same_site_same_fingerprint(self):
+        first = _capture(_raise, ValueError("one"))
+        second = _capture(_raise, ValueError("two"))
+        self.assertEqual(fingerprint(*first), fingerprint(*second))
+
+    def test_different_type(self):
+        first = _capture(_raise, ValueError("one"))
+        second = _capture(_raise, KeyError("one"))
+        self.assertNotEqual(fingerprint(*first), fingerprint(*second))
+
+    def test_different_site(self):
+        first = _capture(_raise, ValueError("one"))
+        second = _capture(lambda: _raise(ValueError("one")))
+        self.assertNotEqual(fingerprint(*first), fingerprint(*second))
+
+    def test_chained_cause(self):
+        def _wrap(cause):
+            try:
+                _raise(cause)
+            except Exception as e:
+                raise RuntimeError("wrapped") from e
+
+        first = _capture(_wrap, ValueError("one"))
+        second = _capture(_wrap, KeyError("one"))
+        self.assertNotEqual(fingerprint(*first), fingerprint(*second))
+
+    def test_without_traceback(self):
+        self.assertEqual(fingerprint(ValueError, None, None), fingerprint(ValueError, None, None))
+
+
+class RepeatSuppressorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.suppressor = RepeatSuppressor(window=10, max_entries=2, clock=lambda: self.now)
+
+    def test_counts_within_window(self):
+        self.assertEqual(self.suppressor.hit("a"), 1)
+        self.assertEqual(self.suppressor.hit("a"), 2)
+        self.assertEqual(self.suppressor.hit("b"), 1)
+        self.assertEqual(self.suppressor.hit("a"), 3)
+
+    def test_window_expires(self):
+        self.suppressor.hit("a")
+        self.now = 5
+        self.assertEqual(self.suppressor.hit("a"), 2)
+        self.now = 10
+        self.assertEqual(self.suppressor.hit("a"), 1)
+
+    def test_bounded_entries(self):
+        self.suppressor.hit("a")
+        self.suppressor.hit("b")
+        self.suppressor.hit("c")
+        # "a" was evicted, so it starts over.
+        self.assertEqual(self.suppressor.hit("a"), 1)
+        self.assertEqual(len(self.suppressor._entries), 2)
@@ -1,7 +1,8 @@
 import io
+import json
 import logging
-import time
 import unittest
+from unittest.mock import patch
 
 from freezegun import freeze_time
 
@@ -9,7 +10,11 @@ import flask
 from flask import g
 from flask.wrappers import Response
 
+from muselog import util
+from muselog.datadog import DatadogJSONFormatter
 from muselog.flask import register_muselog_request_hooks
+from muselog.redaction import Redactor
+from muselog.routes import RoutePolicy, RouteRule
 
 from .support import ClearContext
 
@@ -35,7 +40,7 @@ class FlaskMiddlewareTestCase(ClearContext, unittest.TestCase):
     def test_happy(self):
         with self.app.test_request_context("/?someparam=5"):
             with freeze_time("2019-04-03 20:00:00"):
-                g.start = time.time()
+                g.muselog_timer = util.RequestTimer()
 
             resp = Response("Okay", status=200, headers=[("Content-Length", "4")])
 
@@ -58,7 +63,7 @@ class FlaskMiddlewareTestCase(ClearContext, unittest.TestCase):
     def test_exception(self):
         with self.app.test_request_context("/?someparam=5"):
             with freeze_time("2019-04-03 20:00:00"):
-                g.start = time.time()
+                g.muselog_timer = util.RequestTimer()
 
             with freeze_time("2019-04-03 20:00:02"):
                 with self.assertLogs("muselog.util") as cm:
@@ -80,3 +85,54 @@ class FlaskMiddlewareTestCase(ClearContext, unittest.TestCase):
                     self.assertEqual(record["http.url"], "http://localhost/?someparam=5")
                     self.assertEqual(record["http.method"], "GET")
                     self.assertEqual(record["http.status_code"], 500)
+
+    def test_skipped_route(self):
+        self.app = flask.Flask(__name__)
+        register_muselog_request_hooks(self.app, route_policy=RoutePolicy([RouteRule("/health", action="skip")]))
+
+        with self.app.test_request_context("/health"):
+            g.muselog_timer = util.RequestTimer()
+            resp = Response("Okay", status=200)
+            with self.assertNoLogs("muselog.util"):
+                self.app.process_response(resp)
+
+    def test_route_level(self):
+        self.app = flask.Flask(__name__)
+        register_muselog_request_hooks(self.app, route_policy=RoutePolicy([RouteRule("/metrics", level="DEBUG")]))
+        self.logger.setLevel(logging.DEBUG)
+
+        with self.app.test_request_context("/metrics"):
+            g.muselog_timer = util.RequestTimer()
+            resp = Response("Okay", status=200)
+            with self.assertLogs("muselog.util", "DEBUG") as cm:
+                self.app.process_response(resp)
+        self.assertEqual(len(cm.records), 1)
+        self.assertEqual(cm.records[0].levelno, logging.DEBUG)
+
+    def test_phases(self):
+        with self.app.test_request_context("/"):
+            with freeze_time("2019-04-03 20:00:00") as frozen:
+                self.app.preprocess_request()
+                frozen.tick(0.5)
+                resp = Response("Okay", status=200)
+                frozen.tick(0.25)
+                with patch.object(util, "REQUEST_PHASES", True), self.assertLogs("muselog.util") as cm:
+                    self.app.process_response(resp)
+
+        record = cm.records[0].__dict__
+        self.assertEqual(record["duration"], 750000000)
+        self.assertEqual(record["timing.before_hooks"], 0)
+        self.assertEqual(record["timing.handler"], 750000000)
+        self.assertEqual(record["timing.total"], 750000000)
+        self.assertNotIn("timing.ttfb", record)
+
+    def test_redacts_secret_query_parameters(self):
+        with self.app.test_request_context("/reset?token=abc"):
+            g.muselog_timer = util.RequestTimer()
+            resp = Response("Okay", status=200)
+            with self.assertLogs("muselog.util") as cm:
+                self.app.process_response(resp)
+
+        formatted = DatadogJSONFormatter(redactor=Redactor()).format(cm.records[0])
+        self.assertNotIn("abc", formatted)
+        self.assertEqual(json.loads(formatted)["http.url"], "http://localhost/reset?token=[REDACTED]")
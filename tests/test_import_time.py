@@ -0,0 +1,59 @@
+"""Guard the cost of importing muselog, which every process started with `muselog-run` pays."""
+
+import os
+import subprocess
+import sys
+import unittest
+from typing import Dict
+
+import muselog
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(muselog.__file__)))
+BOOTSTRAP_DIR = os.path.join(ROOT_DIR, "muselog", "bootstrap")
+
+#: Budget for the cumulative import time of `muselog`, as reported by `-X importtime`.
+IMPORT_BUDGET_US = int(os.environ.get("MUSELOG_IMPORT_BUDGET_US", 50000))
+
+HEAVY_MODULES = ("opentelemetry", "json_log_formatter", "ddtrace", "muselog.datadog")
+
+
+def _import_times(code: str, **env) -> Dict[str, int]:
+    """Return the cumulative import time, in microseconds, of each module imported while running `code`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class ImportTimeTestCase(unittest.TestCase):
+
+    def test_import_skips_heavy_dependencies(self):
+        times = _import_times("import muselog")
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_import_within_budget(self):
+        # Take the best of a few runs to smooth out noise from a busy machine.
+        best = min(_import_times("import muselog")["muselog"] for _ in range(3))
+        self.assertLess(best, IMPORT_BUDGET_US)
+
+    def test_bootstrap_skips_heavy_dependencies(self):
+        times = _import_times(
+            "import muselog",
+            PYTHONPATH=os.pathsep.join([BOOTSTRAP_DIR, ROOT_DIR]),
+            ENABLE_DATADOG_JSON_FORMATTER="false",
+        )
+        self.assertIn("sitecustomize", times)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, times)
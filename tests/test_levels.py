@@ -0,0 +1,110 @@
+import logging
+import os
+import signal
+import tempfile
+import time
+import unittest
+
+import muselog
+from muselog.levels import LevelReloader, apply_log_levels, parse_log_levels
+
+
+class ParseLogLevelsTestCase(unittest.TestCase):
+
+    def test_parse(self):
+        levels = parse_log_levels("""
+            # comment
+            root=error
+            muselog = DEBUG
+
+            app.db=WARNING
+        """)
+        self.assertEqual(levels, {"root": logging.ERROR, "muselog": logging.DEBUG, "app.db": logging.WARNING})
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            parse_log_levels("muselog")
+        with self.assertRaises(ValueError):
+            parse_log_levels("muselog=LOUD")
+
+
+class LevelsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root_level = logging.getLogger().level
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "levels")
+
+    def tearDown(self):
+        apply_log_levels({})
+        logging.getLogger().setLevel(self.root_level)
+        self.tmpdir.cleanup()
+
+    def write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+        # Make sure the modification is visible even on coarse file system clocks.
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_apply_invalidates_cache(self):
+        logger = logging.getLogger("test.levels.cache")
+        apply_log_levels({"test.levels": "ERROR"})
+        self.assertFalse(logger.isEnabledFor(logging.INFO))
+
+        apply_log_levels({"test.levels": "DEBUG"})
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+
+    def test_apply_reverts_missing(self):
+        apply_log_levels({"test.levels.a": "DEBUG", "test.levels.b": "ERROR"})
+        apply_log_levels({"test.levels.b": "INFO"})
+        self.assertEqual(logging.getLogger("test.levels.a").level, logging.NOTSET)
+        self.assertEqual(logging.getLogger("test.levels.b").level, logging.INFO)
+
+    def test_reload_on_change(self):
+        self.write("test.levels.file=ERROR\n")
+        reloader = LevelReloader(self.path, base_levels={"root": "WARNING", "test.levels.base": "INFO"})
+        self.assertTrue(reloader.check())
+        self.assertEqual(logging.getLogger("test.levels.file").level, logging.ERROR)
+        self.assertEqual(logging.getLogger("test.levels.base").level, logging.INFO)
+
+        # Unchanged file: nothing to do.
+        self.assertFalse(reloader.check())
+
+        self.write("test.levels.base=CRITICAL\n")
+        self.assertTrue(reloader.check())
+        self.assertEqual(logging.getLogger("test.levels.file").level, logging.NOTSET)
+        self.assertEqual(logging.getLogger("test.levels.base").level, logging.CRITICAL)
+
+    def test_bad_file_keeps_levels(self):
+        self.write("test.levels.file=ERROR\n")
+        reloader = LevelReloader(self.path)
+        reloader.check()
+
+        self.write("test.levels.file=NOISY\n")
+        with self.assertLogs("muselog.levels", "ERROR"):
+            self.assertFalse(reloader.check())
+        self.assertEqual(logging.getLogger("test.levels.file").level, logging.ERROR)
+
+    @unittest.skipUnless(hasattr(signal, "SIGHUP"), "requires SIGHUP")
+    def test_sighup(self):
+        self.write("test.levels.signal=ERROR\n")
+        reloader = LevelReloader(self.path, interval=60).start()
+        self.addCleanup(reloader.stop)
+        self.assertEqual(logging.getLogger("test.levels.signal").level, logging.ERROR)
+
+        with open(self.path, "w") as f:
+            f.write("test.levels.signal=DEBUG\n")
+        os.kill(os.getpid(), signal.SIGHUP)
+        deadline = time.monotonic() + 5
+        while logging.getLogger("test.levels.signal").level != logging.DEBUG and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(logging.getLogger("test.levels.signal").level, logging.DEBUG)
+
+    def test_setup_logging(self):
+        self.write("test.levels.setup=DEBUG\n")
+        muselog.setup_logging(root_log_level="ERROR", log_level_file=self.path)
+        self.addCleanup(muselog.setup_logging)
+        self.assertEqual(logging.getLogger("test.levels.setup").level, logging.DEBUG)
+        self.assertEqual(logging.getLogger().level, logging.ERROR)
+        self.assertIsNotNone(muselog._LEVEL_RELOADER)
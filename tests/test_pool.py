@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import threading
+import unittest
+
+from muselog.pool import ProcessPoolHandler
+
+from .support import ClearContext
+
+
+def plain_formatter() -> logging.Formatter:
+    return logging.Formatter("%(threadName)s %(levelname)s %(message)s")
+
+
+class ProcessPoolHandlerTestCase(ClearContext, unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Worker processes are slow to start; share them across tests.
+        cls.output = io.StringIO()
+        cls.handler = ProcessPoolHandler(cls.output, workers=2, batch_size=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.handler.close()
+
+    def setUp(self):
+        super().setUp()
+        self.output.seek(0)
+        self.output.truncate()
+        self.logger = logging.getLogger("test.pool")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        super().tearDown()
+
+    def outputs(self):
+        self.handler.flush()
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_formats_in_order(self):
+        for i in range(95):
+            self.logger.info("record %d", i, extra={"ctx": {"i": i}})
+
+        outputs = self.outputs()
+        self.assertEqual([o["message"] for o in outputs], [f"record {i}" for i in range(95)])
+        self.assertEqual(outputs[7]["ctx"], {"i": 7})
+        self.assertEqual(outputs[7]["logger.name"], "test.pool")
+        self.assertEqual(outputs[7]["logger.method_name"], "test_formats_in_order")
+
+    def test_exception(self):
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            self.logger.exception("failed")
+
+        output = self.outputs()[0]
+        self.assertEqual(output["severity"], "ERROR")
+        self.assertEqual(output["error.kind"], "ValueError")
+        self.assertIn("ValueError: bad", output["error.stack"])
+
+    def test_order_per_thread(self):
+        def log_many(n):
+            for i in range(50):
+                self.logger.info("%d", i)
+
+        threads = [threading.Thread(target=log_many, args=(n,), name=f"logger-{n}") for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        by_thread = dict()
+        for output in self.outputs():
+            by_thread.setdefault(output["logger.thread_name"], []).append(int(output["message"]))
+        self.assertEqual(len(by_thread), 4)
+        for messages in by_thread.values():
+            self.assertEqual(messages, list(range(50)))
+
+
+class ProcessPoolHandlerFormatterTestCase(ClearContext, unittest.TestCase):
+
+    def test_custom_formatter_and_close(self):
+        output = io.StringIO()
+        handler = ProcessPoolHandler(output, workers=1, formatter_factory=plain_formatter)
+        logger = logging.getLogger("test.pool.plain")
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.warning("hello %s", "world")
+        handler.close()
+
+        self.assertEqual(output.getvalue(), "MainThread WARNING hello world\n")
+
+    def test_emit_after_close(self):
+        output = io.StringIO()
+        handler = ProcessPoolHandler(output, workers=1, formatter_factory=plain_formatter, batch_size=1)
+        logger = logging.getLogger("test.pool.closed")
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.warning("before")
+        handler.close()
+        logger.warning("after")
+        handler.flush()
+
+        self.assertEqual(output.getvalue(), "MainThread WARNING before\n")
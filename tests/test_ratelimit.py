@@ -0,0 +1,86 @@
+import logging
+import threading
+import unittest
+import unittest.mock
+import weakref
+
+from muselog.ratelimit import RateLimitFilter
+
+
+class RateLimitFilterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.filter = RateLimitFilter(rate=1, burst=2, summary_interval=60, max_keys=2, clock=lambda: self.now)
+
+    def record(self, msg="Hello %s", name="test", level=logging.INFO, args=("world",)):
+        return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+    def test_burst_then_limit(self):
+        decisions = [self.filter.filter(self.record()) for _ in range(4)]
+        self.assertEqual(decisions, [True, True, False, False])
+
+    def test_refill(self):
+        for _ in range(3):
+            self.filter.filter(self.record())
+        self.now = 1.0
+        self.assertTrue(self.filter.filter(self.record()))
+        self.assertFalse(self.filter.filter(self.record()))
+
+    def test_keys_are_independent(self):
+        for _ in range(3):
+            self.filter.filter(self.record())
+        self.assertTrue(self.filter.filter(self.record(level=logging.WARNING)))
+        self.assertTrue(self.filter.filter(self.record(name="other")))
+        self.assertTrue(self.filter.filter(self.record(msg="Different %s")))
+
+    def test_does_not_format_message(self):
+        record = self.record()
+        record.getMessage = unittest.mock.Mock()
+        self.filter.filter(record)
+        record.getMessage.assert_not_called()
+
+    def test_same_record_decided_once(self):
+        record = self.record()
+        for _ in range(5):
+            self.assertTrue(self.filter.filter(record))
+
+    def test_same_record_decided_once_while_other_threads_log(self):
+        record = self.record()
+        self.assertTrue(self.filter.filter(record))
+        # Between two handlers seeing `record`, another thread logs the same message.
+        other = threading.Thread(target=self.filter.filter, args=(self.record(),))
+        other.start()
+        other.join()
+        self.assertTrue(self.filter.filter(record))
+        self.assertFalse(self.filter.filter(self.record()))
+
+    def test_does_not_keep_last_record_alive(self):
+        record = self.record()
+        self.filter.filter(record)
+        collected = []
+        weakref.finalize(record, collected.append, True)
+        del record
+        self.assertEqual(collected, [True])
+
+    def test_bounded_keys(self):
+        for i in range(10):
+            self.filter.filter(self.record(msg=f"Message {i}"))
+        self.assertEqual(len(self.filter._buckets), 2)
+
+    def test_summary(self):
+        for _ in range(5):
+            self.filter.filter(self.record())
+        self.now = 61
+        with self.assertLogs("muselog.ratelimit", "WARNING") as cm:
+            self.filter.filter(self.record(msg="Another"))
+
+        self.assertEqual(len(cm.records), 1)
+        summary = cm.records[0]
+        self.assertEqual(summary.__dict__["ratelimit.suppressed"], 3)
+        self.assertEqual(summary.__dict__["ratelimit.top"][0]["msg"], "Hello %s")
+
+        # Counts reset after each summary, so nothing new to report.
+        self.now = 122
+        with self.assertNoLogs("muselog.ratelimit"):
+            self.filter.filter(self.record(msg="Another"))
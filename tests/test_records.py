@@ -0,0 +1,104 @@
+import copy
+import io
+import json
+import logging
+import pickle
+import unittest
+
+import muselog
+from muselog.datadog import DatadogJSONFormatter
+from muselog.records import SlottedLogRecord, install
+
+from .support import ClearContext
+
+
+def make_record(factory, **extra):
+    logging.setLogRecordFactory(factory)
+    try:
+        return logging.getLogger("test.records").makeRecord(
+            "test.records", logging.INFO, __file__, 10, "hello %s", ("world",), None, extra=extra or None
+        )
+    finally:
+        logging.setLogRecordFactory(logging.LogRecord)
+
+
+class SlottedLogRecordTestCase(unittest.TestCase):
+
+    def test_no_instance_dict(self):
+        record = make_record(SlottedLogRecord)
+        self.assertEqual(SlottedLogRecord.__dictoffset__, 0)
+        self.assertIsNone(record.extra)
+
+    def test_extras_in_single_slot(self):
+        record = make_record(SlottedLogRecord, ctx={"request_id": "abc"}, **{"http.url": "/x"})
+        self.assertEqual(record.extra, {"ctx": {"request_id": "abc"}, "http.url": "/x"})
+        self.assertEqual(record.ctx, {"request_id": "abc"})
+        self.assertEqual(getattr(record, "http.url"), "/x")
+        self.assertEqual(record.__dict__["http.url"], "/x")
+        self.assertEqual(record.getMessage(), "hello world")
+
+        record.custom = 1
+        self.assertEqual(record.extra["custom"], 1)
+        del record.custom
+        self.assertFalse(hasattr(record, "custom"))
+
+    def test_extra_cannot_overwrite_attributes(self):
+        with self.assertRaises(KeyError):
+            make_record(SlottedLogRecord, name="other")
+
+    def test_dict_view_matches_log_record(self):
+        plain = make_record(logging.LogRecord, ctx={"a": 1})
+        slotted = make_record(SlottedLogRecord, ctx={"a": 1})
+        self.assertEqual(set(slotted.__dict__), set(plain.__dict__))
+        self.assertEqual(slotted.as_dict().keys(), plain.__dict__.keys())
+        self.assertNotIn("message", slotted.__dict__)
+        self.assertNotIn("getMessage", slotted.__dict__)
+
+    def test_make_log_record(self):
+        install()
+        self.addCleanup(install, False)
+        record = logging.makeLogRecord({"msg": "m", "error.stack": "trace"})
+        self.assertIsInstance(record, SlottedLogRecord)
+        self.assertEqual(getattr(record, "error.stack"), "trace")
+
+    def test_pickle_and_copy(self):
+        record = make_record(SlottedLogRecord, ctx={"a": 1})
+        for clone in (pickle.loads(pickle.dumps(record)), copy.copy(record)):
+            self.assertIsInstance(clone, SlottedLogRecord)
+            self.assertEqual(clone.as_dict(), record.as_dict())
+
+    def test_formatters(self):
+        plain = make_record(logging.LogRecord, ctx={"a": 1}, **{"http.url": "/x"})
+        slotted = make_record(SlottedLogRecord, ctx={"a": 1}, **{"http.url": "/x"})
+        for name in ("created", "msecs", "relativeCreated"):
+            setattr(slotted, name, getattr(plain, name))
+
+        text = logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s %(ctx)s")
+        self.assertEqual(text.format(slotted), text.format(plain))
+        self.assertEqual(slotted.message, "hello world")
+
+        formatter = DatadogJSONFormatter()
+        self.assertEqual(json.loads(formatter.format(slotted)), json.loads(formatter.format(plain)))
+
+
+class SetupLoggingTestCase(ClearContext, unittest.TestCase):
+
+    def test_opt_in(self):
+        self.addCleanup(logging.setLogRecordFactory, logging.LogRecord)
+        output = io.StringIO()
+        logger = logging.getLogger("test.records.setup")
+        logger.propagate = False
+        handler = logging.StreamHandler(output)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        muselog.setup_logging(add_console_handler=False, exception_handler=None, slotted_records=True)
+        self.assertIs(logging.getLogRecordFactory(), SlottedLogRecord)
+        logger.warning("slotted %d", 1, extra={"ctx": {"a": 1}})
+        self.assertEqual(output.getvalue(), "slotted 1\n")
+
+        muselog.setup_logging(add_console_handler=False, exception_handler=None)
+        self.assertIs(logging.getLogRecordFactory(), SlottedLogRecord)
+
+        muselog.setup_logging(add_console_handler=False, exception_handler=None, slotted_records=False)
+        self.assertIs(logging.getLogRecordFactory(), logging.LogRecord)
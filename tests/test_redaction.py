@@ -0,0 +1,128 @@
+import io
+import json
+import logging
+import unittest
+
+from muselog import attributes, context, util
+from muselog.datadog import DatadogJSONFormatter
+from muselog.logger import get_logger_with_context
+from muselog.redaction import MASK, Redactor
+
+from .support import ClearContext
+
+
+class RedactorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.redactor = Redactor()
+
+    def test_redacts_secret_keys_at_any_depth(self):
+        record = {"password": "hunter2", "ctx": {"user": {"accessToken": "abc", "id": 7}, "csrf_token": None},
+                  "args": ("ok",)}
+        self.redactor.redact(record)
+        self.assertEqual(record, {"password": MASK, "ctx": {"user": {"accessToken": MASK, "id": 7}, "csrf_token": None},
+                                  "args": ("ok",)})
+
+    def test_matches_key_names_by_suffix(self):
+        self.assertTrue(self.redactor.secret_key("API-Key"))
+        self.assertTrue(self.redactor.secret_key("db.password"))
+        self.assertFalse(self.redactor.secret_key("tokens_used"))
+        self.assertFalse(self.redactor.secret_key("usr.id"))
+
+    def test_redacts_patterns_in_values(self):
+        record = {"message": "Sent to bob@example.com", "args": ["Bearer abc.def", 1],
+                  "header": "eyJhbGciOiJIUzI1NiJ9.eyJzdWIiOiIxIn0.sig"}
+        self.redactor.redact(record)
+        self.assertEqual(record, {"message": f"Sent to {MASK}", "args": [MASK, 1], "header": MASK})
+
+    def test_keeps_clean_values(self):
+        ctx = {"user": {"id": 7}, "tags": ["a", "b"]}
+        record = {"message": "Nothing to hide", "ctx": ctx, "http.url": "https://example.com/jobs?page=2"}
+        url = record["http.url"]
+        self.assertTrue(self.redactor.is_clean(record))
+        self.redactor.redact(record)
+        self.assertIs(record["ctx"], ctx)
+        self.assertIs(record["http.url"], url)
+
+    def test_copies_nested_values_it_redacts(self):
+        ctx = {"user": {"email": "bob@example.com"}}
+        record = {"ctx": ctx}
+        self.assertFalse(self.redactor.is_clean(record))
+        self.redactor.redact(record)
+        self.assertEqual(record["ctx"], {"user": {"email": MASK}})
+        self.assertEqual(ctx, {"user": {"email": "bob@example.com"}})
+
+    def test_scrubs_url_query_parameters(self):
+        url = "https://example.com/reset?page=2&reset_token=abc&to=bob%40example.com&q=a+b&Api%5FKey=k#top"
+        self.assertEqual(self.redactor.scrub_url(url),
+                         f"https://example.com/reset?page=2&reset_token={MASK}&to={MASK}&q=a+b&Api%5FKey={MASK}#top")
+
+    def test_custom_rules(self):
+        redactor = Redactor(keys=("ssn",), patterns=(r"\d{3}-\d{2}-\d{4}",), mask="***")
+        record = {"ssn": "1", "message": "SSN 123-45-6789", "password": "kept", "note": "bob@example.com"}
+        redactor.redact(record)
+        self.assertEqual(record, {"ssn": "***", "message": "SSN ***", "password": "kept", "note": "bob@example.com"})
+
+
+class RedactingFormatterTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.output = io.StringIO()
+        self.formatter = DatadogJSONFormatter(redactor=Redactor())
+        handler = logging.StreamHandler(self.output)
+        handler.setFormatter(self.formatter)
+        self.logger = logging.getLogger("test.redaction")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        util.LOGGER.logger.addHandler(handler)
+        self.addCleanup(util.LOGGER.logger.setLevel, util.LOGGER.logger.level)
+        util.LOGGER.logger.setLevel(logging.INFO)
+        self.addCleanup(util.LOGGER.logger.removeHandler, handler)
+
+    def lines(self):
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_redacts_context_and_extra(self):
+        context.bind(session_id="s3cr3t", request_id="r1")
+        get_logger_with_context(self.logger).info("Signed in %s", "bob@example.com", password="hunter2", attempt=1)
+        (line,) = self.lines()
+        self.assertEqual(line["message"], f"Signed in {MASK}")
+        self.assertEqual(line["ctx"], {"session_id": MASK, "request_id": "r1", "password": MASK, "attempt": 1})
+        self.assertNotIn("hunter2", self.output.getvalue())
+        self.assertNotIn("bob@example.com", self.output.getvalue())
+
+    def test_clean_records_unchanged(self):
+        context.bind(request_id="r1")
+        get_logger_with_context(self.logger).info("Signed in %s", 7, attempt=1)
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "Signed in %s", (7,), None)
+        self.assertEqual(self.lines()[0]["ctx"], {"request_id": "r1", "attempt": 1})
+        self.assertEqual(self.formatter.format(record), DatadogJSONFormatter().format(record))
+
+    def _log_request(self, url):
+        headers = {"User-Agent": "test"}
+        util.log_request(
+            "/jobs", 0.01,
+            attributes.NetworkAttributes(headers.get, remote_addr="127.0.0.1"),
+            attributes.HttpAttributes(headers.get, url, "GET", 200),
+        )
+
+    def test_scrubs_access_log_urls(self):
+        self._log_request("https://example.com/jobs?page=2&token=abc")
+        self._log_request("https://example.com/jobs?page=2")
+        dirty, clean = self.lines()
+        self.assertEqual(dirty["http.url"], f"https://example.com/jobs?page=2&token={MASK}")
+        self.assertEqual(clean["http.url"], "https://example.com/jobs?page=2")
+
+    def test_clean_access_logs_take_fast_path(self):
+        capture = []
+        handler = logging.Handler()
+        handler.emit = capture.append
+        util.LOGGER.logger.addHandler(handler)
+        self.addCleanup(util.LOGGER.logger.removeHandler, handler)
+        self._log_request("https://example.com/jobs?page=3")
+        self._log_request("https://example.com/jobs?token=abc")
+        self.assertIsNotNone(self.formatter._access_logs.encode(capture[0]))
+        self.assertIsNone(self.formatter._access_logs.encode(capture[1]))
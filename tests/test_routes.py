@@ -0,0 +1,66 @@
+import logging
+import re
+import unittest
+from unittest.mock import patch
+
+from muselog import routes, util
+from muselog.routes import RoutePolicy, RouteRule
+
+
+class RoutePolicyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RoutePolicy([
+            RouteRule("/health", action="skip"),
+            RouteRule("/static/*", action="skip"),
+            RouteRule("/metrics", level="DEBUG"),
+            RouteRule(re.compile(r"/users/(?P<id>\d+)/avatar"), action="sample", sample_rate=0.25),
+            RouteRule("/*", action="log"),
+        ])
+
+    def test_exact(self):
+        self.assertIsNone(self.policy.decide("/health"))
+        self.assertEqual(self.policy.decide("/healthz"), logging.NOTSET)
+
+    def test_prefix(self):
+        self.assertIsNone(self.policy.decide("/static/app.js"))
+        self.assertIsNone(self.policy.decide("/static/"))
+
+    def test_level(self):
+        self.assertEqual(self.policy.decide("/metrics"), logging.DEBUG)
+
+    def test_sample(self):
+        with patch("muselog.routes.random.random", return_value=0.1):
+            self.assertEqual(self.policy.decide("/users/5/avatar"), logging.NOTSET)
+        with patch("muselog.routes.random.random", return_value=0.3):
+            self.assertIsNone(self.policy.decide("/users/5/avatar"))
+
+    def test_first_rule_wins(self):
+        self.assertEqual(self.policy.decide("/anything"), logging.NOTSET)
+
+    def test_no_rules(self):
+        self.assertEqual(RoutePolicy([]).decide("/health"), logging.NOTSET)
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            RouteRule("/", action="drop")
+
+
+class AccessLogLevelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        routes.configure([RouteRule("/health", action="skip"), RouteRule("/metrics", level="DEBUG")])
+        self.addCleanup(routes.configure, [])
+
+    def test_default_policy(self):
+        self.assertIsNone(util.access_log_level("/health", 200))
+        self.assertEqual(util.access_log_level("/metrics", 200), logging.DEBUG)
+        self.assertEqual(util.access_log_level("/other", 200), logging.NOTSET)
+
+    def test_server_errors_always_logged(self):
+        self.assertEqual(util.access_log_level("/health", 503), logging.NOTSET)
+        self.assertEqual(util.access_log_level("/metrics", 500), logging.NOTSET)
+
+    def test_explicit_policy(self):
+        policy = RoutePolicy([RouteRule("/other", action="skip")])
+        self.assertIsNone(util.access_log_level("/other", 200, policy))
@@ -1,7 +1,10 @@
 import logging
 import unittest
+import unittest.mock
 
 import muselog
+from muselog.fingerprint import RepeatSuppressor
+from muselog.ratelimit import RateLimitFilter
 
 from .support import ClearContext
 
@@ -30,3 +33,44 @@ class SetupLoggingTestCase(ClearContext, unittest.TestCase):
         self.assertEqual(logging.getLogger("testing").getEffectiveLevel(), logging.ERROR)
         self.assertEqual(logging.getLogger("testing.child").getEffectiveLevel(), logging.CRITICAL)
         self.assertEqual(logging.getLogger("string").getEffectiveLevel(), logging.INFO)
+
+
+class DefaultExcHandlerTestCase(ClearContext, unittest.TestCase):
+
+    def test_repeats_omit_traceback(self):
+        def fail():
+            raise ValueError("boom")
+
+        with unittest.mock.patch.object(muselog, "_UNCAUGHT_REPEATS", RepeatSuppressor(60)):
+            with self.assertLogs("muselog", "CRITICAL") as cm:
+                for _ in range(2):
+                    try:
+                        fail()
+                    except ValueError as e:
+                        muselog.default_exc_handler(type(e), e, e.__traceback__)
+
+        first, second = cm.records
+        self.assertIsNotNone(first.exc_info)
+        self.assertIsNone(second.exc_info)
+        self.assertEqual(second.__dict__["error.fingerprint"], first.__dict__["error.fingerprint"])
+        self.assertEqual(second.__dict__["error.repeat_count"], 2)
+
+
+class RateLimitSetupTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.handler = logging.NullHandler()
+        logging.getLogger().addHandler(self.handler)
+
+    def tearDown(self):
+        logging.getLogger().removeHandler(self.handler)
+        super().tearDown()
+
+    def test_installs_filter_once(self):
+        muselog.setup_logging(rate_limit=RateLimitFilter(rate=1))
+        replacement = RateLimitFilter(rate=2)
+        muselog.setup_logging(rate_limit=replacement)
+
+        installed = [f for f in self.handler.filters if isinstance(f, RateLimitFilter)]
+        self.assertEqual(installed, [replacement])
@@ -0,0 +1,129 @@
+import io
+import logging
+import unittest
+
+import muselog
+from muselog.aio import AsyncioStreamHandler
+from muselog.shedding import LoadShedFilter
+
+
+class LoadShedFilterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.load = 0.0
+        self.filter = LoadShedFilter(lambda: self.load, high=0.5, low=0.1, cooldown=5,
+                                     check_interval=0.1, clock=lambda: self.now)
+
+    def record(self, level):
+        return logging.LogRecord("test", level, __file__, 1, "msg", (), None)
+
+    def passes(self, level):
+        return self.filter.filter(self.record(level))
+
+    def tick(self, seconds=0.25):
+        self.now += seconds
+        return self.passes(logging.DEBUG)
+
+    def test_no_pressure(self):
+        for level in (logging.DEBUG, logging.INFO, logging.WARNING):
+            self.assertTrue(self.passes(level))
+
+    def test_sheds_debug_then_info(self):
+        self.load = 0.9
+        with self.assertLogs("muselog.shedding", "WARNING") as cm:
+            self.tick()
+            self.assertEqual(self.filter.stage, 1)
+            self.assertFalse(self.passes(logging.DEBUG))
+            self.assertTrue(self.passes(logging.INFO))
+
+            self.tick()
+            self.assertEqual(self.filter.stage, 2)
+            self.assertFalse(self.passes(logging.INFO))
+            self.assertTrue(self.passes(logging.WARNING))
+
+            # Never beyond INFO.
+            self.tick()
+            self.assertEqual(self.filter.stage, 2)
+            self.assertTrue(self.passes(logging.WARNING))
+            self.assertTrue(self.passes(logging.CRITICAL))
+
+        # Each change is logged once.
+        self.assertEqual(len(cm.records), 2)
+        self.assertEqual(cm.records[1].__dict__["shedding.level"], "WARNING")
+
+    def test_hysteresis(self):
+        self.load = 0.9
+        self.tick()
+        self.tick()
+        self.assertEqual(self.filter.stage, 2)
+
+        # Between the thresholds: hold.
+        self.load = 0.3
+        self.tick(10)
+        self.assertEqual(self.filter.stage, 2)
+
+        # Low, but not for long enough.
+        self.load = 0.05
+        self.tick()
+        self.tick(4)
+        self.assertEqual(self.filter.stage, 2)
+
+        with self.assertLogs("muselog.shedding", "WARNING") as cm:
+            self.tick(1)
+            self.assertEqual(self.filter.stage, 1)
+            self.tick(4)
+            self.assertEqual(self.filter.stage, 1)
+            self.tick(1)
+            self.assertEqual(self.filter.stage, 0)
+        self.assertEqual(len(cm.records), 2)
+        self.assertIn("no longer dropping", cm.output[1])
+
+        # A spike during the quiet period starts it over.
+        self.load = 0.9
+        self.tick()
+        self.load = 0.05
+        self.tick()
+        self.tick(4)
+        self.load = 0.9
+        self.tick()
+        self.load = 0.05
+        self.tick()
+        self.tick(4)
+        self.assertEqual(self.filter.stage, 2)
+
+    def test_samples_pressure_at_most_every_check_interval(self):
+        calls = []
+        self.filter.pressure = lambda: calls.append(1) or 0.0
+        self.now = 1
+        for _ in range(100):
+            self.passes(logging.INFO)
+        self.assertEqual(len(calls), 1)
+
+
+class LoadSheddingSetupTestCase(unittest.TestCase):
+
+    def test_installs_on_handlers_with_pressure(self):
+        root = logging.getLogger()
+        plain = logging.StreamHandler(io.StringIO())
+        buffered = AsyncioStreamHandler(io.StringIO())
+        self.addCleanup(buffered.close)
+        original_handlers = root.handlers
+        root.handlers = [buffered, plain]
+        self.addCleanup(setattr, root, "handlers", original_handlers)
+
+        muselog.setup_logging(add_console_handler=False, exception_handler=None, load_shedding=True)
+        muselog.setup_logging(add_console_handler=False, exception_handler=None, load_shedding=True)
+
+        self.assertEqual(len([f for f in buffered.filters if isinstance(f, LoadShedFilter)]), 1)
+        self.assertEqual(plain.filters, [])
+        self.assertEqual(buffered.pressure(), 0.0)
+
+    def test_warns_without_handlers_with_pressure(self):
+        root = logging.getLogger()
+        original_handlers = root.handlers
+        root.handlers = [logging.StreamHandler(io.StringIO())]
+        self.addCleanup(setattr, root, "handlers", original_handlers)
+
+        with self.assertWarnsRegex(RuntimeWarning, "load_shedding has no effect"):
+            muselog.setup_logging(add_console_handler=False, exception_handler=None, load_shedding=True)
@@ -0,0 +1,141 @@
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+from muselog.datadog import DatadogJSONFormatter
+from muselog.shipper import Shipper, ShipperHandler
+
+from .support import ClearContext
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ShipperTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "shipper.sock")
+        self.output = io.StringIO()
+        output_handler = logging.StreamHandler(self.output)
+        output_handler.setFormatter(DatadogJSONFormatter())
+        self.shipper = Shipper(self.socket_path, output_handler)
+        self.thread = threading.Thread(target=self.shipper.serve_forever)
+        self.thread.start()
+
+        self.logger = logging.getLogger("test.shipper")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        # Open connections would keep the shipper waiting.
+        for handler in self.logger.handlers:
+            handler.close()
+        self.logger.handlers = []
+        self.shipper.shutdown()
+        self.thread.join()
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def stop(self):
+        for handler in self.logger.handlers:
+            handler.close()
+        self.shipper.shutdown()
+        self.thread.join()
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_records_are_formatted_by_shipper(self):
+        handler = ShipperHandler(self.socket_path)
+        self.logger.addHandler(handler)
+
+        for i in range(100):
+            self.logger.info("record %d", i, extra={"ctx": {"i": i}})
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            self.logger.exception("failed")
+
+        outputs = self.stop()
+        self.assertEqual(len(outputs), 101)
+        self.assertEqual([o["message"] for o in outputs[:100]], [f"record {i}" for i in range(100)])
+        self.assertEqual(outputs[5]["ctx"], {"i": 5})
+        self.assertEqual(outputs[5]["logger.name"], "test.shipper")
+        self.assertEqual(outputs[100]["error.kind"], "ValueError")
+        self.assertIn("ValueError: bad", outputs[100]["error.stack"])
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_several_clients(self):
+        handlers = [ShipperHandler(self.socket_path) for _ in range(3)]
+        for handler in handlers:
+            self.logger.handlers = [handler]
+            self.logger.info("hello")
+        self.logger.handlers = handlers
+
+        self.assertEqual(len(self.stop()), 3)
+
+    def test_forked_child_connects_its_own_socket(self):
+        handler = ShipperHandler(self.socket_path)
+        self.logger.addHandler(handler)
+        self.logger.info("parent")
+        parent_sock = handler.sock
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.logger.info("child")
+                os._exit(0 if handler.sock is not parent_sock else 1)
+            finally:
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        self.logger.info("parent again")
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(handler.sock, parent_sock)
+        self.assertEqual(sorted(o["message"] for o in self.stop()), ["child", "parent", "parent again"])
+
+    def test_fallback_when_unreachable(self):
+        fallback_output = io.StringIO()
+        handler = ShipperHandler(os.path.join(self.tmpdir.name, "missing.sock"),
+                                 fallback=logging.StreamHandler(fallback_output))
+        self.logger.addHandler(handler)
+        self.logger.info("still logged")
+
+        self.assertEqual(fallback_output.getvalue(), "still logged\n")
+
+
+class MuselogRunShipperTestCase(unittest.TestCase):
+
+    def test_program_logs_through_shipper(self):
+        program = "import logging; logging.getLogger('app').warning('from app'); print('MUSELOG_SHIPPER_SOCKET' in __import__('os').environ)"
+        result = subprocess.run(
+            [sys.executable, "-c", "from muselog.commands.muselog_run import app; app()",
+             "--module-log-level", "app=INFO", "--shipper", sys.executable, "-c", program],
+            # muselog is not necessarily installed; the bootstrap sitecustomize needs to find it.
+            env={**os.environ, "ENABLE_DATADOG_JSON_FORMATTER": "true", "PYTHONPATH": ROOT_DIR},
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        lines = result.stdout.splitlines()
+        self.assertIn("True", lines)
+        logs = [json.loads(line) for line in lines if line.startswith("{")]
+        self.assertEqual(len(logs), 1)
+        self.assertEqual(logs[0]["message"], "from app")
+        self.assertEqual(logs[0]["logger.name"], "app")
+
+    def test_shipper_did_not_start(self):
+        from muselog.commands import muselog_run
+
+        with unittest.mock.patch.object(muselog_run.subprocess, "Popen"), \
+                unittest.mock.patch.object(muselog_run.typer, "echo") as echo:
+            with self.assertRaises(muselog_run.typer.Exit) as cm:
+                muselog_run._start_shipper(None, timeout=0)
+        self.assertEqual(cm.exception.exit_code, 1)
+        echo.assert_called_once_with("muselog shipper did not start", err=True)
@@ -0,0 +1,56 @@
+import logging
+import unittest
+
+from muselog.snapshot import decode_snapshot, encode_snapshot, restore_record, snapshot_record
+
+
+class Opaque:
+
+    def __init__(self):
+        self.value = 1
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def make_record(self, msg="Hello %s", args=("world",), exc_info=None, **extra):
+        record = logging.LogRecord("test.snapshot", logging.INFO, __file__, 10, msg, args, exc_info, func="fn")
+        record.__dict__.update(extra)
+        return record
+
+    def test_round_trip(self):
+        record = self.make_record(ctx={"request_id": "abc"}, other=5)
+        restored = restore_record(decode_snapshot(encode_snapshot(snapshot_record(record))))
+
+        self.assertEqual(restored.getMessage(), "Hello world")
+        self.assertEqual(restored.name, "test.snapshot")
+        self.assertEqual(restored.levelno, logging.INFO)
+        self.assertEqual(restored.lineno, 10)
+        self.assertEqual(restored.funcName, "fn")
+        self.assertEqual(restored.created, record.created)
+        self.assertEqual(restored.ctx, {"request_id": "abc"})
+        self.assertEqual(restored.other, 5)
+
+    def test_exception(self):
+        try:
+            raise ValueError("bad")
+        except ValueError as e:
+            record = self.make_record(exc_info=(type(e), e, e.__traceback__))
+        restored = restore_record(decode_snapshot(encode_snapshot(snapshot_record(record))))
+
+        self.assertIsNone(restored.exc_info)
+        self.assertIn("ValueError: bad", restored.exc_text)
+        self.assertEqual(restored.__dict__["error.kind"], "ValueError")
+        self.assertEqual(restored.__dict__["error.message"], "bad")
+        self.assertIn("ValueError: bad", restored.__dict__["error.stack"])
+
+    def test_unmarshallable_values(self):
+        record = self.make_record(obj=Opaque(), ctx={"nested": Opaque()})
+        snapshot = decode_snapshot(encode_snapshot(snapshot_record(record)))
+
+        self.assertEqual(snapshot["obj"], "Opaque")
+        self.assertEqual(snapshot["ctx"], {"nested": "Opaque"})
+
+    def test_trace_ids(self):
+        snapshot = snapshot_record(self.make_record(), trace_enabled=True)
+        self.assertEqual(snapshot["dd.trace_id"], "0")
+        self.assertEqual(snapshot["dd.span_id"], "0")
@@ -0,0 +1,97 @@
+import logging
+import sys
+import unittest
+
+import muselog
+from muselog.redaction import MASK, Redactor
+from muselog.text import TextFormatter, compile_format
+
+
+def _record(created: float, msg: str = "Hello %s", args=("world",), **attributes) -> logging.LogRecord:
+    record = logging.LogRecord("app.views", logging.INFO, __file__, 42, msg, args, None)
+    record.created = created
+    record.msecs = int((created - int(created)) * 1000) + 0.0
+    record.__dict__.update(attributes)
+    return record
+
+
+class TextFormatterTestCase(unittest.TestCase):
+
+    def assertSameAsLogging(self, record, *args, **kwargs):
+        self.assertIsNotNone(TextFormatter(*args, **kwargs)._render)
+        self.assertEqual(TextFormatter(*args, **kwargs).format(record), logging.Formatter(*args, **kwargs).format(record))
+
+    def test_default_format(self):
+        formatter = TextFormatter(muselog.DEFAULT_LOG_FORMAT)
+        expected = logging.Formatter(muselog.DEFAULT_LOG_FORMAT)
+        # Records within one second reuse the rendered time; the next second renders it again.
+        for created in (1700000000.001, 1700000000.5, 1700000000.999, 1700000001.25, 1700000000.75):
+            record = _record(created)
+            self.assertEqual(formatter.format(record), expected.format(record))
+
+    def test_fields(self):
+        record = _record(1700000000.125, custom={"a": 1})
+        self.assertSameAsLogging(record, "%(levelname)-8s|%(lineno)04d|%(msecs).1f|%(name)r|%(custom)s|100%% {braces}")
+        self.assertSameAsLogging(record, "%(message)s")
+        self.assertSameAsLogging(record, None)
+
+    def test_datefmt(self):
+        record = _record(1700000000.125)
+        self.assertSameAsLogging(record, "%(asctime)s %(message)s", datefmt="%H:%M:%S")
+        formatter = TextFormatter("%(asctime)s %(message)s", datefmt="%H:%M:%S")
+        self.assertEqual(formatter.formatTime(record), logging.Formatter().formatTime(record))
+
+    def test_defaults(self):
+        record = _record(1700000000.125)
+        self.assertSameAsLogging(record, "%(message)s %(tenant)s", defaults={"tenant": "none"})
+        record.tenant = "muse"
+        self.assertSameAsLogging(record, "%(message)s %(tenant)s", defaults={"tenant": "none"})
+
+    def test_exception(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = _record(1700000000.125, exc_info=sys.exc_info())
+        self.assertSameAsLogging(record, muselog.DEFAULT_LOG_FORMAT)
+
+    def test_missing_field(self):
+        with self.assertRaisesRegex(ValueError, "Formatting field not found in record: 'missing'"):
+            TextFormatter("%(message)s %(missing)s").format(_record(1700000000.125))
+
+    def test_uncompiled_formats(self):
+        self.assertIsNone(compile_format("%(message)s %s"))
+        self.assertIsNone(compile_format("%(message)s 100%"))
+        self.assertIsNone(compile_format("%(1)s"))
+        self.assertIsNotNone(compile_format("%(message)s 100%%"))
+
+    def test_redactor(self):
+        formatter = TextFormatter("%(message)s %(ctx)s", redactor=Redactor())
+        ctx = {"password": "hunter2", "user": 7}
+        record = _record(1700000000.125, "Signed in %s", ("bob@example.com",), ctx=ctx)
+        self.assertEqual(formatter.format(record), f"Signed in {MASK} {{'password': '{MASK}', 'user': 7}}")
+        self.assertEqual(ctx, {"password": "hunter2", "user": 7})
+        self.assertEqual(TextFormatter("%(message)s").format(record), "Signed in bob@example.com")
+
+    def test_redactor_scrubs_tracebacks(self):
+        try:
+            raise ValueError("No account for bob@example.com")
+        except ValueError:
+            record = _record(1700000000.125, exc_info=sys.exc_info())
+        # The traceback is cached on the record by the first formatter.
+        self.assertIn("bob@example.com", logging.Formatter().format(record))
+        text = TextFormatter(redactor=Redactor()).format(record)
+        self.assertIn(f"ValueError: No account for {MASK}", text)
+        self.assertNotIn("bob@example.com", text)
+
+    def test_setup_logging(self):
+        root = logging.getLogger()
+        handlers = root.handlers
+        root.handlers = [logging.StreamHandler()]
+        try:
+            muselog.setup_logging()
+            self.assertIsInstance(root.handlers[0].formatter, TextFormatter)
+            redactor = Redactor()
+            muselog.setup_logging(redactor=redactor)
+            self.assertIs(root.handlers[0].formatter.redactor, redactor)
+        finally:
+            root.handlers = handlers
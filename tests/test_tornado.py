@@ -0,0 +1,66 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from muselog import util
+from muselog.datadog import DatadogJSONFormatter
+from muselog.redaction import Redactor
+
+from .support import ClearContext
+
+try:
+    from tornado.httputil import HTTPServerRequest
+    from tornado.web import Application, RequestHandler
+
+    from muselog.tornado import RequestTiming, log_request
+
+    class TimedHandler(RequestTiming, RequestHandler):
+        pass
+except (ImportError, AttributeError):
+    # tornado < 5 does not import on Python 3.10 and later.
+    HTTPServerRequest = None
+
+
+@unittest.skipIf(HTTPServerRequest is None, "requires an importable tornado")
+class TornadoLogRequestTestCase(ClearContext, unittest.TestCase):
+
+    def make_handler(self, uri, handler_class=None):
+        connection = Mock()
+        connection.context.remote_ip = "10.0.0.1"
+        connection.context.protocol = "http"
+        request = HTTPServerRequest(method="GET", uri=uri, connection=connection)
+        handler = (handler_class or RequestHandler)(Application(log_function=log_request), request)
+        # Set by Tornado when it executes the handler.
+        handler._transforms = []
+        return handler
+
+    def test_log_request(self):
+        handler = self.make_handler("/jobs?page=2")
+        with self.assertLogs("muselog.util") as cm:
+            log_request(handler)
+
+        record = cm.records[0].__dict__
+        self.assertEqual(record["args"][2], "/jobs")
+        self.assertEqual(record["http.url"], "http://127.0.0.1/jobs?page=2")
+        self.assertEqual(record["http.status_code"], 200)
+
+    def test_redacts_secret_query_parameters(self):
+        handler = self.make_handler("/reset?token=abc")
+        with self.assertLogs("muselog.util") as cm:
+            log_request(handler)
+
+        formatted = DatadogJSONFormatter(redactor=Redactor()).format(cm.records[0])
+        self.assertNotIn("abc", formatted)
+        self.assertEqual(json.loads(formatted)["http.url"], "http://127.0.0.1/reset?token=[REDACTED]")
+
+    def test_monotonic_timing(self):
+        handler = self.make_handler("/jobs", TimedHandler)
+        # Tornado's wall-clock duration, which a clock adjustment would have thrown off.
+        handler.request.request_time = lambda: 3600.0
+        with patch.object(util, "REQUEST_PHASES", True), self.assertLogs("muselog.util") as cm:
+            handler.finish()
+
+        record = cm.records[0].__dict__
+        self.assertLess(record["duration"], 1000000000)
+        self.assertEqual(record["duration"], record["timing.total"])
+        self.assertLessEqual(record["timing.handler"], record["timing.total"])
@@ -0,0 +1,60 @@
+import unittest
+
+from muselog.truncation import TRUNCATION_MARKER, clip, fair_share
+
+
+class ClipTestCase(unittest.TestCase):
+
+    def test_small_values_untouched(self):
+        value = {"a": [1, 2.5, None, True], "b": "short"}
+        clipped, cost, truncated = clip(value, 1000)
+        self.assertIs(clipped, value)
+        self.assertFalse(truncated)
+        self.assertGreater(cost, 0)
+
+    def test_long_string(self):
+        clipped, cost, truncated = clip("x" * 10000, 100)
+        self.assertTrue(truncated)
+        self.assertTrue(clipped.endswith(TRUNCATION_MARKER))
+        self.assertLessEqual(len(clipped) + 2, 100)
+        self.assertLessEqual(cost, 100)
+
+    def test_long_list(self):
+        value = list(range(1000000))
+        clipped, _, truncated = clip(value, 100)
+        self.assertTrue(truncated)
+        self.assertEqual(clipped[-1], TRUNCATION_MARKER)
+        self.assertLess(len(clipped), 100)
+        self.assertEqual(len(value), 1000000)
+
+    def test_large_mapping(self):
+        value = {f"key{i}": "v" * 100 for i in range(1000)}
+        clipped, _, truncated = clip(value, 500)
+        self.assertTrue(truncated)
+        self.assertLess(len(clipped), 10)
+        self.assertEqual(clipped[TRUNCATION_MARKER], 1000 - (len(clipped) - 1))
+
+    def test_nested_value_truncated(self):
+        value = {"a": {"b": "x" * 1000}}
+        clipped, _, truncated = clip(value, 100)
+        self.assertTrue(truncated)
+        self.assertTrue(clipped["a"]["b"].endswith(TRUNCATION_MARKER))
+        self.assertEqual(len(value["a"]["b"]), 1000)
+
+    def test_deep_nesting(self):
+        value = []
+        for _ in range(20):
+            value = [value]
+        _, _, truncated = clip(value, 1000)
+        self.assertTrue(truncated)
+
+
+class FairShareTestCase(unittest.TestCase):
+
+    def test_everything_fits(self):
+        self.assertEqual(fair_share([10, 20, 30], 100), 100)
+
+    def test_large_fields_share_remainder(self):
+        cap = fair_share([10, 20, 1000, 5000], 430)
+        self.assertEqual(cap, 200)
+        self.assertLessEqual(sum(min(cost, cap) for cost in [10, 20, 1000, 5000]), 430)
@@ -1,4 +1,8 @@
+import logging
 import unittest
+from unittest.mock import patch
+
+from freezegun import freeze_time
 
 from muselog import attributes, util
 
@@ -51,3 +55,66 @@ class UtilTestCase(ClearContext, unittest.TestCase):
             self.assertIn("/ok", output)
             self.assertIn("99.58.39.5", output)
             self.assertIn("GET", output)
+
+    def test_log_request_forced_level(self):
+        network_attrs = attributes.NetworkAttributes(extract_header=lambda _: None)
+        http_attrs = attributes.HttpAttributes(
+            extract_header=lambda _: None,
+            url="https://www.example.com/metrics",
+            method="GET",
+            status_code=404
+        )
+
+        with self.assertLogs("muselog.util", "DEBUG") as cm:
+            util.log_request("/metrics", 0.01, network_attrs, http_attrs, level=logging.DEBUG)
+
+        self.assertEqual(cm.records[0].levelno, logging.DEBUG)
+
+    def test_log_request_phases(self):
+        network_attrs = attributes.NetworkAttributes(extract_header=lambda _: None)
+        http_attrs = attributes.HttpAttributes(
+            extract_header=lambda _: None,
+            url="https://www.example.com/ok",
+            method="GET",
+            status_code=200
+        )
+        phases = {"before_hooks": 1500, "handler": 2000000, "total": 2501500}
+
+        with self.assertLogs("muselog.util") as cm:
+            util.log_request("/ok", None, network_attrs, http_attrs, phases=phases)
+        record = cm.records[0].__dict__
+        self.assertEqual(record["duration"], 2501500)
+        self.assertNotIn("timing.total", record)
+        self.assertIn("2.50ms", cm.output[0])
+
+        with patch.object(util, "REQUEST_PHASES", True), self.assertLogs("muselog.util") as cm:
+            util.log_request("/ok", None, network_attrs, http_attrs, phases=phases)
+        record = cm.records[0].__dict__
+        self.assertEqual(record["timing.before_hooks"], 1500)
+        self.assertEqual(record["timing.handler"], 2000000)
+        self.assertEqual(record["timing.total"], 2501500)
+
+
+class RequestTimerTestCase(unittest.TestCase):
+
+    def test_phases(self):
+        with freeze_time("2019-04-03 20:00:00") as frozen:
+            timer = util.RequestTimer()
+            frozen.tick(0.001)
+            timer.hooks_done()
+            frozen.tick(0.010)
+            timer.handler_done()
+            frozen.tick(0.002)
+            timer.first_byte()
+            frozen.tick(0.003)
+            timer.first_byte()
+            self.assertEqual(timer.phases(), {
+                "before_hooks": 1000000,
+                "handler": 10000000,
+                "ttfb": 13000000,
+                "total": 16000000,
+            })
+
+    def test_unobserved_phases(self):
+        timer = util.RequestTimer()
+        self.assertEqual(list(timer.phases()), ["total"])
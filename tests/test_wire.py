@@ -0,0 +1,177 @@
+import json
+import logging
+import socketserver
+import subprocess
+import sys
+import threading
+import unittest
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import msgpack
+
+from muselog import context, util
+from muselog.datadog import DataDogTcpHandler, DatadogJSONFormatter
+from muselog.logger import get_logger_with_context
+from muselog.wire import HEADER, FrameDecoder, MsgpackFormatter, decode_frames, to_datadog_json
+
+from .support import ClearContext
+
+
+class _Capture(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class MsgpackFormatterTestCase(ClearContext, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.capture = _Capture()
+        self.logger = logging.getLogger("test.wire")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.capture)
+        self.addCleanup(self.logger.removeHandler, self.capture)
+
+    def assertSameAsJSON(self, record, **kwargs):
+        frame = MsgpackFormatter(**kwargs).encode_frame(record)
+        (record_dict,) = decode_frames(frame)
+        self.assertEqual(to_datadog_json(record_dict), DatadogJSONFormatter(**kwargs).format(record))
+        return record_dict
+
+    def test_frame_is_length_prefixed(self):
+        self.logger.info("Hello %s", "world")
+        frame = MsgpackFormatter().encode_frame(self.capture.records[0])
+        (length,) = HEADER.unpack_from(frame)
+        self.assertEqual(length, len(frame) - HEADER.size)
+        self.assertEqual(msgpack.unpackb(frame[HEADER.size:])["message"], "Hello world")
+
+    def test_converts_to_same_json(self):
+        context.bind(request_id="abc", user={"id": 7})
+        logger = get_logger_with_context(self.logger, service="web")
+        logger.info("Paid", amount=1.5, when=datetime(2024, 1, 2, tzinfo=timezone.utc), big=2 ** 70, tags=("a", "b"))
+        record_dict = self.assertSameAsJSON(self.capture.records[0])
+        self.assertEqual(record_dict["ctx"]["request_id"], "abc")
+        self.assertEqual(record_dict["ctx"]["big"], 2 ** 70)
+
+    def test_converts_any_values_to_same_json(self):
+        logger = get_logger_with_context(self.logger)
+        logger.info("Received", payload=b"\x00raw", when=datetime(2024, 1, 2), handler=_Capture(),
+                    extra={"digest": b"\xff"})
+        record_dict = self.assertSameAsJSON(self.capture.records[0])
+        self.assertEqual(record_dict["ctx"]["payload"], b"\x00raw")
+
+    def test_converts_exceptions_to_same_json(self):
+        try:
+            raise ValueError("failure")
+        except ValueError:
+            self.logger.exception("Failed")
+        record_dict = self.assertSameAsJSON(self.capture.records[0])
+        self.assertEqual(record_dict["error.kind"], "ValueError")
+
+    def test_converts_access_logs_to_same_json(self):
+        self.logger.info(util.ACCESS_LOG_MESSAGE, HTTPStatus.OK, "GET", "/", "127.0.0.1", 1.5,
+                         extra={"http.status_code": 200, "http.method": "GET", "duration": 1500000})
+        self.assertSameAsJSON(self.capture.records[0])
+
+    def test_applies_budgets(self):
+        self.logger.info("x" * 1000)
+        record_dict = self.assertSameAsJSON(self.capture.records[0], max_field_size=100)
+        self.assertLess(len(record_dict["message"]), 200)
+
+    def test_format_is_json(self):
+        self.logger.info("Hello")
+        record = self.capture.records[0]
+        self.assertEqual(MsgpackFormatter().format(record), DatadogJSONFormatter().format(record))
+
+
+class FrameDecoderTestCase(unittest.TestCase):
+
+    def frames(self, *records):
+        return b"".join(HEADER.pack(len(packed)) + packed for packed in map(msgpack.packb, records))
+
+    def test_decodes_any_chunks(self):
+        data = self.frames({"message": "a"}, {"message": "b" * 300}, {"message": "c"})
+        for size in (1, 3, 7, len(data)):
+            decoder = FrameDecoder()
+            records = []
+            for start in range(0, len(data), size):
+                records.extend(decoder.feed(data[start:start + size]))
+            self.assertEqual([r["message"] for r in records], ["a", "b" * 300, "c"])
+            self.assertEqual(decoder.pending, 0)
+
+    def test_keeps_partial_frame(self):
+        data = self.frames({"message": "a"})
+        decoder = FrameDecoder()
+        self.assertEqual(decoder.feed(data[:-1]), [])
+        self.assertEqual(decoder.pending, len(data) - 1)
+        with self.assertRaises(ValueError):
+            list(decode_frames(data[:-1]))
+
+    def test_command_converts_stdin(self):
+        data = self.frames({"message": "a", "ctx": {"n": 1}}, {"message": "b"})
+        result = subprocess.run([sys.executable, "-m", "muselog.wire"], input=data, capture_output=True, check=True)
+        self.assertEqual(result.stdout.decode().splitlines(), ['{"message": "a", "ctx": {"n": 1}}', '{"message": "b"}'])
+
+
+class _FrameAgentStandIn(socketserver.ThreadingTCPServer):
+    """Local TCP server that decodes the frames it receives, like a sidecar reading the wire format."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.records = []
+        self.received = threading.Condition()
+        super().__init__(("127.0.0.1", 0), _FrameRequestHandler)
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    def wait_for_records(self, count, timeout=5):
+        with self.received:
+            return self.received.wait_for(lambda: len(self.records) >= count, timeout)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _FrameRequestHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        decoder = FrameDecoder()
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            with self.server.received:
+                self.server.records.extend(decoder.feed(data))
+                self.server.received.notify_all()
+
+
+class TcpHandlerFramesTestCase(ClearContext, unittest.TestCase):
+
+    def test_sends_frames(self):
+        agent = _FrameAgentStandIn()
+        self.addCleanup(agent.stop)
+        logger = logging.getLogger("test.wire.tcp")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = DataDogTcpHandler("127.0.0.1", agent.server_address[1], linger=0.01)
+        handler.setFormatter(MsgpackFormatter())
+        logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        self.addCleanup(logger.removeHandler, handler)
+
+        for i in range(100):
+            logger.info("record %d", i, extra={"ctx": {"i": i}})
+        handler.flush()
+
+        self.assertTrue(agent.wait_for_records(100))
+        self.assertEqual([r["message"] for r in agent.records], [f"record {i}" for i in range(100)])
+        self.assertEqual(json.loads(to_datadog_json(agent.records[5]))["ctx"], {"i": 5})